@@ -0,0 +1,105 @@
+"""
+Benchmarks injecting the console error detection script into HTML responses.
+
+* parser: the previous mechanism, the document is parsed with BeautifulSoup's
+  "html.parser" and re-encoded after the script is inserted into its' head
+* bytes: the current mechanism, `seproxer.html_injection.inject_script`, which splices the
+  script after the head tag found in the raw bytes and only parses documents that it can't
+  scan, such as documents with unterminated comments
+
+Documents:
+
+* large: a ~2 MB server rendered page
+* malformed: a ~2 MB page with unclosed and misnested tags
+* commented: a ~2 MB page with a conditional comment and an inline script before its' head
+
+Usage: python benchmarks/inject_script.py [iterations]
+"""
+import statistics
+import sys
+import time
+
+import bs4
+
+from seproxer import html_injection
+
+
+JAVASCRIPT = "window.__seproxer_logs = [];"
+
+ROW = (
+    b'<tr class="row"><td><a href="/item?id=1&amp;ref=list">Item</a></td>'
+    b'<td><span data-value="42">42</span></td><td><img src="/i.png" alt=""></td></tr>\n'
+)
+MALFORMED_ROW = (
+    b'<tr class=row><td><a href=/item?id=1&ref=list>Item<td><b><i>42</b></i>'
+    b'<td><img src="/i.png" alt=""><p>unclosed\n'
+)
+HEAD = b'<head>\n<meta charset="utf-8"><title>Page</title></head>\n'
+
+
+def _document(row, rows=13000, prefix=b""):
+    return b"".join((
+        b"<!DOCTYPE html>\n<html>\n", prefix, HEAD,
+        b"<body><table>\n", row * rows, b"</table></body></html>\n",
+    ))
+
+
+DOCUMENTS = [
+    ("large", _document(ROW)),
+    ("malformed", _document(MALFORMED_ROW)),
+    ("commented", _document(ROW, prefix=(
+        b"<!--[if IE]><p>Old browser</p><![endif]-->\n"
+        b"<script>document.write('<head></head>');</script>\n"
+    ))),
+]
+
+
+def inject_parser(html):
+    bs_html = bs4.BeautifulSoup(html, "html.parser")
+    if not bs_html.head:
+        return None
+
+    injected_script = bs_html.new_tag(
+        name="script",
+        type="application/javascript",
+    )
+    injected_script.string = JAVASCRIPT
+    bs_html.head.insert(0, injected_script)
+
+    return bs_html.encode()
+
+
+def inject_bytes(html, script_tag=html_injection.script_tag(JAVASCRIPT)):
+    return html_injection.inject_script(html, JAVASCRIPT, encoded_script_tag=script_tag)
+
+
+def _bench(inject, html, iterations):
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        injected = inject(html)
+        timings.append(time.perf_counter() - start)
+        assert injected is not None and JAVASCRIPT.encode() in injected
+    return timings
+
+
+def _report(name, timings):
+    print("{:>20}: mean {:9.3f} ms  median {:9.3f} ms  max {:9.3f} ms".format(
+        name,
+        statistics.mean(timings) * 1000,
+        statistics.median(timings) * 1000,
+        max(timings) * 1000,
+    ))
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+
+    for name, html in DOCUMENTS:
+        print("{} ({:.1f} MB)".format(name, len(html) / 1024 / 1024))
+        _report("parser", _bench(inject_parser, html, iterations))
+        _report("bytes", _bench(inject_bytes, html, iterations))
+
+
+if __name__ == "__main__":
+    main()
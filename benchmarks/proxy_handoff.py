@@ -0,0 +1,142 @@
+"""
+Benchmarks the latency of handing the recorded flows of a page from the proxy process back
+to the controlling process, through the real `Runner` -> `ProxyMaster` -> `FlowDump` path.
+
+Every iteration requests a page's worth of responses from a local origin server through the
+proxy, waits for the proxy's network to be idle, as a worker does once a page has loaded,
+and then measures:
+
+* handoff: `Runner.get_results`, the proxy serializes the session's completed flows to its'
+  spool and hands the `FlowDump` describing the file back over the results pipe
+* read: reading the serialized flows of the claimed `FlowDump`
+
+Usage: python benchmarks/proxy_handoff.py [iterations] [flows per page] [body bytes]
+"""
+import http.server
+import socket
+import socketserver
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+import seproxer.options
+import seproxer.proxy
+from seproxer import flow_archive
+
+
+class _OriginHandler(http.server.BaseHTTPRequestHandler):
+    body = b""
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/javascript")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
+class _OriginServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_origin(body_size):
+    _OriginHandler.body = b"x" * body_size
+    server = _OriginServer(("127.0.0.1", 0), _OriginHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _load_page(opener, origin_port, flows):
+    for i in range(flows):
+        url = "http://127.0.0.1:{}/asset/{}.js".format(origin_port, i)
+        with opener.open(url) as response:
+            response.read()
+
+
+def bench_handoff(iterations, flows, body_size):
+    origin = _start_origin(body_size)
+    origin_port = origin.server_address[1]
+
+    results_directory = tempfile.mkdtemp(prefix="seproxer-bench-")
+    options = seproxer.options.Options(
+        mitmproxy_port=_free_port(),
+        results_directory=results_directory,
+    )
+    options.setup_file_results_dir()
+    runner = seproxer.proxy.Runner.from_options(options)
+    runner.run()
+
+    proxy_url = "http://127.0.0.1:{}".format(options.mitmproxy_port)
+    opener = urllib.request.build_opener(
+        urllib.request.ProxyHandler({"http": proxy_url}))
+
+    handoff_timings = []
+    read_timings = []
+    recorded_flows = []
+    try:
+        # The proxy process may take a moment to listen
+        deadline = time.time() + 30
+        while True:
+            try:
+                _load_page(opener, origin_port, 1)
+                break
+            except OSError:
+                if time.time() > deadline:
+                    raise
+                time.sleep(0.1)
+        runner.drop_results()
+
+        for _ in range(iterations):
+            _load_page(opener, origin_port, flows)
+            runner.wait_for_network_idle(quiet_window=0, timeout=10)
+
+            start = time.perf_counter()
+            flow_dump = runner.get_results()
+            handoff_timings.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            with flow_dump.open() as fp:
+                recorded_flows.append(sum(1 for _ in flow_archive.iter_flow_states(fp)))
+            read_timings.append(time.perf_counter() - start)
+    finally:
+        runner.done()
+        origin.shutdown()
+
+    return handoff_timings, read_timings, recorded_flows
+
+
+def _report(name, timings):
+    print("{:>8}: mean {:8.3f} ms  median {:8.3f} ms  max {:8.3f} ms".format(
+        name,
+        statistics.mean(timings) * 1000,
+        statistics.median(timings) * 1000,
+        max(timings) * 1000,
+    ))
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    flows = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    body_size = int(sys.argv[3]) if len(sys.argv) > 3 else 16 * 1024
+
+    handoff_timings, read_timings, recorded_flows = bench_handoff(iterations, flows, body_size)
+    _report("handoff", handoff_timings)
+    _report("read", read_timings)
+    print("{:>8}: {} of {} flows per page".format(
+        "flows", min(recorded_flows), flows))
+
+
+if __name__ == "__main__":
+    main()
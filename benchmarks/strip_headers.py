@@ -0,0 +1,113 @@
+"""
+Benchmarks matching the flows of a page against many `strip_headers` rules.
+
+* sequential: the previous mechanism, every rule's filter is called for every flow
+* matcher: the current mechanism, `HeaderStripMatcher`, which groups the rules, gates the
+  domain rules with a single combined regex and caches the domain rules of every host
+
+Parsing the rules happens once per configuration, it is reported separately from matching.
+
+Usage: python benchmarks/strip_headers.py [iterations] [flows] [domain rules]
+"""
+import statistics
+import sys
+import time
+
+from mitmproxy import flowfilter
+from mitmproxy.test import tflow
+
+from seproxer.mitmproxy_extensions import addons
+
+
+# Rules that don't depend on the domain of the flow
+OTHER_RULES = [
+    ("~h Authorization", "Authorization"),
+    ("~hq X-Debug-Token", "X-Debug-Token"),
+    ("~m POST & ~u /login", "Cookie"),
+]
+
+
+def get_rules(domain_rules):
+    rules = []
+    for i in range(domain_rules):
+        # Every domain has its' cookies and authentication headers stripped
+        rules.append((r"~d api{}\.example\.com".format(i), "Cookie"))
+        rules.append((r"~d api{}\.example\.com".format(i), "Authorization"))
+        rules.append((r"~q & ~d cdn{}\.example\.net".format(i), "Cookie"))
+    return rules + OTHER_RULES
+
+
+def get_flows(count):
+    hosts = ["www.example.org", "static.example.org", "api3.example.com", "ads.example.io"]
+    flows = []
+    for i in range(count):
+        flow = tflow.tflow(resp=True)
+        flow.request.host = hosts[i % len(hosts)]
+        flow.request.path = "/resource/{}".format(i)
+        flow.request.headers["Cookie"] = "session=1"
+        flows.append(flow)
+    return flows
+
+
+def bench_sequential(rules, flows, iterations):
+    """
+    Returns the timings of parsing the rules and of matching the flows
+    """
+    build_timings = []
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        strip_headers_list = [(flowfilter.parse(pattern), header) for pattern, header in rules]
+        build_timings.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for flow in flows:
+            for flow_filter, header in strip_headers_list:
+                if flow_filter(flow):
+                    pass
+        timings.append(time.perf_counter() - start)
+    return build_timings, timings
+
+
+def bench_matcher(rules, flows, iterations):
+    """
+    Returns the timings of building the matcher and of matching the flows, every iteration
+    uses a new matcher so that its' host cache starts empty
+    """
+    build_timings = []
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        matcher = addons.HeaderStripMatcher(rules)
+        build_timings.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for flow in flows:
+            matcher.get_headers(flow)
+        timings.append(time.perf_counter() - start)
+    return build_timings, timings
+
+
+def _report(name, timings):
+    print("{:>16}: mean {:8.3f} ms  median {:8.3f} ms  max {:8.3f} ms".format(
+        name,
+        statistics.mean(timings) * 1000,
+        statistics.median(timings) * 1000,
+        max(timings) * 1000,
+    ))
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    flows = get_flows(int(sys.argv[2]) if len(sys.argv) > 2 else 500)
+    rules = get_rules(int(sys.argv[3]) if len(sys.argv) > 3 else 20)
+
+    print("{} rules, {} flows".format(len(rules), len(flows)))
+    for name, bench in (("sequential", bench_sequential), ("matcher", bench_matcher)):
+        build_timings, timings = bench(rules, flows, iterations)
+        _report(name, timings)
+        _report("{} build".format(name), build_timings)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,9 @@ import argparse
 
 import seproxer.seproxer_enums
 from seproxer import options
+from seproxer import url_sources
+from seproxer import mitmproxy_extensions
+import seproxer.mitmproxy_extensions.addons  # NOQA
 
 import mitmproxy.addons.setheaders
 import mitmproxy.exceptions
@@ -50,12 +53,17 @@ class EnumAction(argparse.Action):
 
 
 class UrlFile(argparse.Action):
+    """
+    Sets a lazy `url_sources.UrlSource` so that URLs are only read once they are tested
+    """
     def __call__(self, parser, namespace, values, option_string=None):
+        _ = parser, option_string  # NOQA
+
+        urls = url_sources.UrlSource(values)
         try:
-            with open(values) as fp:
-                urls = [url.strip() for url in fp.readlines() if url]
-        except IOError as e:
-            raise argparse.ArgumentError(self, "Unable to read URL file: {}".format(e))
+            urls.check()
+        except url_sources.UrlSourceError as e:
+            raise argparse.ArgumentError(self, str(e))
 
         setattr(namespace, self.dest, urls)
 
@@ -101,7 +109,8 @@ def add_proxy_options(parser: argparse.ArgumentParser):
         type=int,
         default=options.Defaults.PROXY_PORT.value,
         help="Specify the port that mitmproxy will use.  The Selenium browser will "
-             "also be configured to use this port.",
+             "also be configured to use this port.  When multiple workers are used, each "
+             "worker will use the next consecutive port.",
     )
     group.add_argument(
         "--set-headers",
@@ -119,6 +128,37 @@ def add_proxy_options(parser: argparse.ArgumentParser):
         help="Define a pattern to strip headers from the stored flows.  This is like the "
              "set-header parameter; however, no value is required",
     )
+    group.add_argument(
+        "--proxy-memory-limit",
+        type=int,
+        default=options.Defaults.PROXY_MEMORY_LIMIT.value,
+        metavar="BYTES",
+        help="The number of bytes of flows, per browser, that the proxy keeps in memory.  "
+             "Flows exceeding this limit are spilled to a file in the results directory.",
+    )
+    group.add_argument(
+        "--network-idle-window",
+        type=float,
+        default=options.Defaults.NETWORK_IDLE_WINDOW.value,
+        metavar="SECONDS",
+        help="After a URL is loaded, wait until there was no network activity for "
+             "this many seconds",
+    )
+    group.add_argument(
+        "--network-idle-max-requests",
+        type=int,
+        dest="network_idle_max_in_flight",
+        default=options.Defaults.NETWORK_IDLE_MAX_IN_FLIGHT.value,
+        help="The number of requests that may remain pending while the network is "
+             "considered idle, for example long polling requests",
+    )
+    group.add_argument(
+        "--network-idle-timeout",
+        type=float,
+        default=options.Defaults.NETWORK_IDLE_TIMEOUT.value,
+        metavar="SECONDS",
+        help="The maximum length of time to wait for the network to be idle for each URL",
+    )
     group.add_argument(
         "--ignore-certificates",
         action="store_true",
@@ -127,6 +167,70 @@ def add_proxy_options(parser: argparse.ArgumentParser):
     )
 
 
+def add_capture_options(parser: argparse.ArgumentParser):
+    group = parser.add_argument_group("Capture arguments")
+    group.add_argument(
+        "--capture-filter",
+        type=str,
+        default=None,
+        metavar="PATTERN",
+        help="Only record the flows that match this mitmproxy filter expression",
+    )
+    group.add_argument(
+        "--capture-body-limit",
+        type=int,
+        default=None,
+        metavar="BYTES",
+        help="Truncate recorded request and response contents to this number of bytes, "
+             "truncated messages are marked with the {} header".format(
+                 mitmproxy_extensions.addons.TRUNCATED_HEADER),
+    )
+    group.add_argument(
+        "--capture-headers-only",
+        action="append",
+        type=str,
+        dest="capture_headers_only_types",
+        metavar="CONTENT_TYPE",
+        help="Only record the headers of responses whose content type starts with this "
+             "value, for example: image/",
+    )
+
+
+def add_asset_cache_options(parser: argparse.ArgumentParser):
+    group = parser.add_argument_group("Asset cache arguments")
+    group.add_argument(
+        "--asset-cache-size",
+        type=int,
+        default=options.Defaults.ASSET_CACHE_SIZE.value,
+        metavar="BYTES",
+        help="Serve repeated requests for static assets from a cache of this number of bytes "
+             "shared by all URLs, the least recently used assets are evicted first.  The "
+             "cache is disabled if 0 (default: %(default)s)",
+    )
+    group.add_argument(
+        "--asset-cache-filter",
+        type=str,
+        default=options.Defaults.ASSET_CACHE_FILTER.value,
+        metavar="PATTERN",
+        help="Only cache the responses that match this mitmproxy filter expression "
+             "(default: %(default)s)",
+    )
+
+
+def add_replay_options(parser: argparse.ArgumentParser):
+    group = parser.add_argument_group("Replay arguments")
+    group.add_argument(
+        "--replay",
+        action="append",
+        type=str,
+        dest="replay_flows",
+        metavar="PATH",
+        help="Answer requests with the responses stored in this flow file, or in all the flow "
+             "files of this directory, instead of sending them to the servers.  Requests that "
+             "were not recorded are answered with a 404 response.",
+    )
+
+
 def add_state_options(parser: argparse.ArgumentParser):
     group = parser.add_argument_group("State arguments")
     group.add_argument(
@@ -137,10 +241,45 @@ def add_state_options(parser: argparse.ArgumentParser):
     )
     group.add_argument(
         "--angular-state-timeout",
-        type=str,
+        type=float,
         default=options.Defaults.ANGULAR_TIMEOUT.value,
         help="The length of time to wait for an angular application before timing out",
     )
+    group.add_argument(
+        "--enable-state-activity",
+        action="store_true",
+        default=False,
+        help="Inject a script into pages that tracks pending XMLHttpRequests, fetch requests "
+             "and timers, and wait until the page is idle.  Works with any framework",
+    )
+    group.add_argument(
+        "--activity-state-timeout",
+        type=float,
+        default=options.Defaults.ACTIVITY_TIMEOUT.value,
+        help="The length of time to wait for a page to be idle before timing out",
+    )
+    group.add_argument(
+        "--activity-quiet-time",
+        type=int,
+        default=options.Defaults.ACTIVITY_QUIET_TIME.value,
+        metavar="MILLISECONDS",
+        help="The length of time a page must have no pending activity to be idle",
+    )
+    group.add_argument(
+        "--concurrent-states",
+        action="store_true",
+        default=False,
+        help="Wait for all loaded states of a page together, sharing the --state-timeout, "
+             "rather than waiting for each state with its' own timeout one after another",
+    )
+    group.add_argument(
+        "--state-timeout",
+        type=float,
+        default=options.Defaults.STATE_TIMEOUT.value,
+        metavar="SECONDS",
+        help="The length of time all loaded states of a page share to be reached when "
+             "--concurrent-states is set, 0 waits without a timeout",
+    )
 
 
 def add_validator_options(parser: argparse.ArgumentParser):
@@ -153,6 +292,23 @@ def add_validator_options(parser: argparse.ArgumentParser):
     )
 
 
+def add_worker_options(parser: argparse.ArgumentParser):
+    group = parser.add_argument_group("Worker arguments")
+    group.add_argument(
+        "--workers",
+        type=int,
+        default=options.Defaults.WORKERS.value,
+        help="The number of browser and proxy pairs that will test URLs concurrently",
+    )
+    group.add_argument(
+        "--shared-proxy",
+        action="store_true",
+        default=False,
+        help="All workers will share a single proxy process, each worker still uses "
+             "its' own proxy port to keep the flows of every worker separate",
+    )
+
+
 def add_storage_options(parser: argparse.ArgumentParser):
     group = parser.add_argument_group("Storage arguments")
     group.add_argument(
@@ -175,18 +331,114 @@ def add_storage_options(parser: argparse.ArgumentParser):
         action=EnumAction,
         enum_type=seproxer.seproxer_enums.ResultLevel,
     )
+    group.add_argument(  # type: ignore
+        "--results-file-format",
+        default=options.Defaults.RESULTS_FILE_FORMAT.value,
+        help="The format of the results file.  JSON rewrites the whole results file for "
+             "every result, JSONL appends every result to a JSON Lines file named after the "
+             "results file with a .jsonl extension",
+        action=EnumAction,
+        enum_type=seproxer.seproxer_enums.ResultsFileFormat,
+    )
+    group.add_argument(
+        "--assemble-results-file",
+        action="store_true",
+        default=False,
+        help="When the results file format is JSONL, assemble the results file in the JSON "
+             "format from the JSON Lines results once all URLs were tested",
+    )
+    group.add_argument(
+        "--results-database",
+        type=str,
+        default=None,
+        metavar="FILE_NAME",
+        help="Store results in this SQLite database, in the results directory, which can be "
+             "queried with seproxer-query.  Results of every run are added to the database",
+    )
+    group.add_argument(  # type: ignore
+        "--results-database-level",
+        default=options.Defaults.RESULTS_DATABASE_LEVEL.value,
+        help="The minimum level in which results will be stored in the results database",
+        action=EnumAction,
+        enum_type=seproxer.seproxer_enums.ResultLevel,
+    )
+    group.add_argument(
+        "--fingerprint-report",
+        type=str,
+        default=None,
+        metavar="FILE_NAME",
+        help="Write a report, in the results directory, of the distinct validator messages "
+             "with the number of results they occurred in and their URLs.  Messages of the "
+             "same validator and level that only differ by line numbers, query strings or "
+             "ids are grouped",
+    )
+    group.add_argument(  # type: ignore
+        "--fingerprint-level",
+        default=options.Defaults.FINGERPRINT_LEVEL.value,
+        help="The minimum level of the messages in the fingerprint report",
+        action=EnumAction,
+        enum_type=seproxer.seproxer_enums.ResultLevel,
+    )
+    group.add_argument(
+        "--handler-queue-size",
+        type=int,
+        default=options.Defaults.HANDLER_QUEUE_SIZE.value,
+        metavar="RESULTS",
+        help="The maximum number of results queued for every result handler, such as the "
+             "results file and flow storage, unbounded if 0 (default: %(default)s)",
+    )
+    group.add_argument(  # type: ignore
+        "--handler-queue-policy",
+        default=options.Defaults.HANDLER_QUEUE_POLICY.value,
+        help="What happens to a result when a handler's queue is full: BLOCK waits for the "
+             "handler, DROP_OLDEST drops the oldest queued result and DROP_BELOW_LEVEL drops "
+             "results below the --handler-queue-drop-level and waits for the others",
+        action=EnumAction,
+        enum_type=seproxer.seproxer_enums.QueuePolicy,
+    )
+    group.add_argument(  # type: ignore
+        "--handler-queue-drop-level",
+        default=options.Defaults.HANDLER_QUEUE_DROP_LEVEL.value,
+        help="Results below this level may be dropped by the DROP_BELOW_LEVEL policy",
+        action=EnumAction,
+        enum_type=seproxer.seproxer_enums.ResultLevel,
+    )
+    group.add_argument(
+        "--pooled-handlers",
+        action="store_true",
+        default=False,
+        help="Run the CPU bound result handlers, such as the results file, results database "
+             "and flow archive, in worker processes so that they don't slow down the browsers",
+    )
     group.add_argument(
         "--disable-file-results",
         action="store_true",
         default=False,
         help="Setting this option will not save results to a file",
     )
+    group.add_argument(
+        "--resume",
+        action="store_true",
+        default=False,
+        help="Skip URLs that were completed by a previous run, completed URLs are recorded "
+             "in a journal file in the results directory.  Runs without this option move the "
+             "journal of the previous run aside and start a new journal",
+    )
     group.add_argument(
         "--disable-flow-storage",
         action="store_true",
         default=False,
         help="Setting this option will not save any mitmproxy flows",
     )
+    group.add_argument(
+        "--flow-archive",
+        type=str,
+        default=None,
+        metavar="FILE_NAME",
+        help="Store the mitmproxy flows in this archive, in the results directory, instead of "
+             "a flow file per result.  Response bodies are compressed and stored once, use "
+             "seproxer-archive to export the flows of a result to a flow file",
+    )
 
 
 def get_parsed_args(args=None):
@@ -213,13 +465,19 @@ def get_parsed_args(args=None):
         metavar="URL_FILE",
         type=str,
         action=UrlFile,
-        help="Specify a file that contains URLs separated by newlines"
+        help="Specify a file that contains URLs separated by newlines, the file may be gzip "
+             "compressed.  Use '-' to read URLs from stdin.  Blank lines and lines starting "
+             "with '#' are ignored."
     )
 
     add_selenium_options(parser)
     add_proxy_options(parser)
+    add_capture_options(parser)
+    add_asset_cache_options(parser)
+    add_replay_options(parser)
     add_state_options(parser)
     add_validator_options(parser)
+    add_worker_options(parser)
     add_storage_options(parser)
 
     try:
@@ -244,13 +502,42 @@ def get_seproxer_options(parsed_args) -> seproxer.options.Options:
         selenium_webdriver_path=parsed_args.driver_path,
         mitmproxy_port=parsed_args.proxy_port,
         ignore_certificates=parsed_args.ignore_certificates,
+        proxy_memory_limit=parsed_args.proxy_memory_limit,
+        capture_filter=parsed_args.capture_filter,
+        capture_body_limit=parsed_args.capture_body_limit,
+        capture_headers_only_types=parsed_args.capture_headers_only_types,
+        asset_cache_size=parsed_args.asset_cache_size,
+        asset_cache_filter=parsed_args.asset_cache_filter,
+        replay_flows=parsed_args.replay_flows,
+        network_idle_window=parsed_args.network_idle_window,
+        network_idle_max_in_flight=parsed_args.network_idle_max_in_flight,
+        network_idle_timeout=parsed_args.network_idle_timeout,
         flow_storage_level=flow_storage_level,
+        flow_archive=parsed_args.flow_archive,
         file_results_level=file_storage_level,
         results_directory=parsed_args.results_directory,
         file_results_file_name=parsed_args.results_file_name,
+        file_results_format=parsed_args.results_file_format,
+        assemble_results_file=parsed_args.assemble_results_file,
+        fingerprint_report=parsed_args.fingerprint_report,
+        fingerprint_level=parsed_args.fingerprint_level,
+        results_database=parsed_args.results_database,
+        results_database_level=parsed_args.results_database_level,
+        handler_queue_size=parsed_args.handler_queue_size,
+        handler_queue_policy=parsed_args.handler_queue_policy,
+        handler_queue_drop_level=parsed_args.handler_queue_drop_level,
+        pooled_handlers=parsed_args.pooled_handlers,
         set_headers=parsed_args.set_headers,
         strip_headers=parsed_args.strip_headers,
         check_angular_state=not parsed_args.disable_state_angular,
         angular_state_timeout=parsed_args.angular_state_timeout,
+        check_activity_state=parsed_args.enable_state_activity,
+        activity_state_timeout=parsed_args.activity_state_timeout,
+        activity_quiet_time=parsed_args.activity_quiet_time,
+        concurrent_states=parsed_args.concurrent_states,
+        state_timeout=parsed_args.state_timeout,
         console_error_detection=not parsed_args.ignore_console,
+        workers=parsed_args.workers,
+        shared_proxy=parsed_args.shared_proxy,
+        resume=parsed_args.resume,
     )
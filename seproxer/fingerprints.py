@@ -0,0 +1,164 @@
+"""
+This module fingerprints validator messages, messages that describe the same error share
+a fingerprint so that errors can be grouped and searched across URLs and runs.
+
+Messages are normalized before they are hashed together with the name of their validator
+and their level, the details that vary between occurrences of the same error are replaced
+by placeholders:
+
+* Query strings and fragments of URLs, such as cache busting parameters
+* Line and column numbers
+* UUIDs, hexadecimal hashes and numeric ids, such as path segments and long numbers
+"""
+import typing as t
+import re
+import json
+import hashlib
+
+
+# The number of hexadecimal digits of a fingerprint
+FINGERPRINT_LENGTH = 16
+
+# (pattern, replacement) pairs applied in order
+NORMALIZATION_PATTERNS = [
+    # URL query strings and fragments
+    (
+        re.compile(r"""((?:[a-z][a-z0-9+.-]*:)?//[^\s?#"'<>]+)[?#][^\s"'<>]*""", re.IGNORECASE),
+        r"\1",
+    ),
+    # UUIDs
+    (
+        re.compile(r"\b[0-9a-f]{8}-(?:[0-9a-f]{4}-){3}[0-9a-f]{12}\b", re.IGNORECASE),
+        "<uuid>",
+    ),
+    # Line and column numbers, for example: "url 12:34" or app.js:12:34
+    (re.compile(r"\b\d+:\d+\b"), "<line>"),
+    (re.compile(r"(?<=\S):\d+(?::\d+)?\b"), ":<line>"),
+    # Hexadecimal hashes and ids that contain at least one digit, such as bundle hashes
+    (re.compile(r"\b(?=[0-9a-f]*\d)[0-9a-f]{8,}\b", re.IGNORECASE), "<hex>"),
+    # Numeric ids, that is, path segments and long numbers, short numbers such as status
+    # codes are kept
+    (re.compile(r"(?<=/)\d+\b|\b\d{4,}\b"), "<n>"),
+]
+
+
+def normalize_message(message: str) -> str:
+    """
+    Returns the message with the details that vary between occurrences of the same error
+    replaced by placeholders
+    """
+    for pattern, replacement in NORMALIZATION_PATTERNS:
+        message = pattern.sub(replacement, message)
+    return " ".join(message.split())
+
+
+def _hash(normalized_message: str, validator: str, level: str) -> str:
+    key = "\n".join((validator, level, normalized_message))
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:FINGERPRINT_LENGTH]
+
+
+def fingerprint(message: str, validator: str, level: str) -> str:
+    """
+    :param validator: The name of the validator that reported the message
+    :param level: The name of the message's result level, messages of the same error that
+        are reported at different levels, such as a warning and an error, are distinct
+    """
+    return _hash(normalize_message(message), validator, level)
+
+
+def message_texts(data) -> t.List[str]:
+    """
+    Returns the texts of a validator result's data, every message of a list, such as the
+    console messages, is a separate text
+    """
+    if data is None:
+        return []
+    if isinstance(data, (list, tuple, set)):
+        return [d if isinstance(d, str) else json.dumps(d, sort_keys=True) for d in data]
+    if isinstance(data, str):
+        return [data]
+    return [json.dumps(data, sort_keys=True)]
+
+
+def result_texts(validator_result) -> t.List[str]:
+    """
+    Returns the message texts of a validator result, a result without data is a single text
+    of the result's message
+    """
+    return message_texts(validator_result.data) or [validator_result.message or ""]
+
+
+class Fingerprint:
+    """
+    The occurrences of the messages that share a fingerprint and the URLs of the results
+    they occurred in
+    """
+    __slots__ = ("fingerprint", "level", "validator", "normalized", "example", "results", "urls")
+
+    def __init__(self, fingerprint: str, level: str, validator: str, normalized: str,
+                 example: str) -> None:
+        self.fingerprint = fingerprint
+        self.level = level
+        self.validator = validator
+        self.normalized = normalized
+        self.example = example
+        # The number of results the messages occurred in
+        self.results = 0
+        self.urls = []  # type: t.List[str]
+
+    def as_dict(self) -> t.Dict[str, t.Any]:
+        return {
+            "fingerprint": self.fingerprint,
+            "level": self.level,
+            "validator": self.validator,
+            "message": self.normalized,
+            "example": self.example,
+            "results": self.results,
+            "url_count": len(self.urls),
+            "urls": self.urls,
+        }
+
+
+class FingerprintIndex:
+    """
+    An in-memory index from the fingerprints of validator messages to the URLs they
+    occurred on
+    """
+    def __init__(self) -> None:
+        self._fingerprints = {}  # type: t.Dict[str, Fingerprint]
+
+    def __len__(self) -> int:
+        return len(self._fingerprints)
+
+    def add(self, url: str, validator_results: t.Iterable) -> t.Set[str]:
+        """
+        Adds the messages of a result's validator results, returns the fingerprints of the
+        result.  Every fingerprint is counted once per result.
+        """
+        result_fingerprints = set()  # type: t.Set[str]
+        for validator_result in validator_results:
+            level = validator_result.status.name
+            for text in result_texts(validator_result):
+                normalized = normalize_message(text)
+                key = _hash(normalized, validator_result.name, level)
+                if key in result_fingerprints:
+                    continue
+                result_fingerprints.add(key)
+
+                entry = self._fingerprints.get(key)
+                if entry is None:
+                    entry = self._fingerprints[key] = Fingerprint(
+                        key, level, validator_result.name, normalized, text,
+                    )
+                entry.results += 1
+                entry.urls.append(url)
+        return result_fingerprints
+
+    def report(self) -> t.List[t.Dict[str, t.Any]]:
+        """
+        Returns the fingerprints, the most common first
+        """
+        entries = sorted(
+            self._fingerprints.values(), key=lambda e: (-e.results, e.fingerprint),
+        )
+        return [e.as_dict() for e in entries]
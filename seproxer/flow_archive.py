@@ -0,0 +1,253 @@
+"""
+This module implements a content addressed archive of mitmproxy flows.  The flows of every
+result are split into their metadata and their message bodies, bodies are compressed and
+stored once by their content hash regardless of how many flows they appear in.  The flows
+of a result can be exported back to a regular mitmproxy flow file.
+
+The archive is a SQLite database, flows are stored as their serialized mitmproxy state, so
+that an exported flow file is identical to the flow file the flows were archived from.
+"""
+import typing as t
+import argparse
+import hashlib
+import sqlite3
+import sys
+import zlib
+
+from seproxer import flow_dumps
+
+from mitmproxy.contrib import tnetstring
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bodies (
+    hash TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS flows (
+    id INTEGER PRIMARY KEY,
+    uuid TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    state BLOB NOT NULL,
+    request_body TEXT REFERENCES bodies (hash),
+    response_body TEXT REFERENCES bodies (hash)
+);
+CREATE INDEX IF NOT EXISTS flows_uuid ON flows (uuid, position);
+"""
+
+# The zlib compression level of bodies and flow states
+COMPRESSION_LEVEL = 6
+
+# The messages of a flow state whose bodies are stored separately
+BODY_MESSAGES = ("request", "response")
+
+
+class Error(Exception):
+    """
+    Generic module level error
+    """
+
+
+class ArchiveClosedError(Error):
+    """
+    Exception is raised when using an archive that has been closed
+    """
+
+
+class UnknownResultError(Error):
+    """
+    The archive contains no flows for the specified result uuid
+    """
+
+
+def body_hash(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()
+
+
+def iter_flow_states(fp: t.BinaryIO) -> t.Iterator[dict]:
+    """
+    Yields the serialized states of the flows in a mitmproxy flow file, the flows are
+    neither migrated nor loaded
+    """
+    while True:
+        try:
+            yield tnetstring.load(fp)
+        except ValueError as e:
+            if str(e) == "not a tnetstring: empty file":
+                return
+            raise
+
+
+class FlowArchive:
+    """
+    Stores the flows of results, writes are only committed when `commit` is called so that
+    flows can be archived in batched transactions.
+    """
+    def __init__(self, path: str) -> None:
+        self.path = path
+        # The connection is created by one thread and may be closed by another once it is idle
+        self._connection = sqlite3.connect(
+            path, check_same_thread=False,
+        )  # type: t.Optional[sqlite3.Connection]
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(SCHEMA)
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            raise ArchiveClosedError("The archive {} is closed".format(self.path))
+        return self._connection
+
+    def _store_body(self, body: t.Optional[bytes]) -> t.Optional[str]:
+        """
+        Stores the body unless it is already stored, returns its' hash
+        """
+        if not body:
+            return None
+
+        content_hash = body_hash(body)
+        exists = self.connection.execute(
+            "SELECT 1 FROM bodies WHERE hash = ?", (content_hash,),
+        ).fetchone()
+        if not exists:
+            self.connection.execute(
+                "INSERT INTO bodies (hash, size, data) VALUES (?, ?, ?)",
+                (content_hash, len(body), zlib.compress(body, COMPRESSION_LEVEL)),
+            )
+        return content_hash
+
+    def _load_body(self, content_hash: str) -> bytes:
+        row = self.connection.execute(
+            "SELECT data FROM bodies WHERE hash = ?", (content_hash,),
+        ).fetchone()
+        if row is None:
+            raise Error("Body {} is missing from archive {}".format(content_hash, self.path))
+        return zlib.decompress(row[0])
+
+    def add_state(self, result_uuid: str, position: int, state: dict):
+        body_hashes = []  # type: t.List[t.Optional[str]]
+        for message_name in BODY_MESSAGES:
+            message = state.get(message_name)
+            if not isinstance(message, dict) or not message.get("content"):
+                body_hashes.append(None)
+                continue
+            body_hashes.append(self._store_body(message["content"]))
+            # The body is restored from the bodies table on export
+            message["content"] = b""
+
+        self.connection.execute(
+            "INSERT INTO flows (uuid, position, state, request_body, response_body) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (
+                result_uuid, position,
+                zlib.compress(tnetstring.dumps(state), COMPRESSION_LEVEL),
+                body_hashes[0], body_hashes[1],
+            ),
+        )
+
+    def add(self, result_uuid: str, flow_dump: flow_dumps.FlowDump) -> int:
+        """
+        Archives the flows of a result, returns the number of archived flows
+        """
+        position = 0
+        with flow_dump.open() as fp:
+            for position, state in enumerate(iter_flow_states(fp), 1):
+                self.add_state(result_uuid, position, state)
+        return position
+
+    def count(self, result_uuid: str) -> int:
+        """
+        Returns the number of archived flows of a result
+        """
+        return self.connection.execute(
+            "SELECT COUNT(*) FROM flows WHERE uuid = ?", (result_uuid,),
+        ).fetchone()[0]
+
+    def uuids(self) -> t.List[str]:
+        return [
+            row[0] for row in
+            self.connection.execute("SELECT DISTINCT uuid FROM flows ORDER BY uuid")
+        ]
+
+    def iter_states(self, result_uuid: str) -> t.Iterator[dict]:
+        """
+        Yields the restored serialized states of the flows of a result in their order
+        """
+        rows = self.connection.execute(
+            "SELECT state, request_body, response_body FROM flows WHERE uuid = ? "
+            "ORDER BY position",
+            (result_uuid,),
+        )
+        for state_data, *hashes in rows:
+            state = tnetstring.loads(zlib.decompress(state_data))
+            for message_name, content_hash in zip(BODY_MESSAGES, hashes):
+                if content_hash is not None:
+                    state[message_name]["content"] = self._load_body(content_hash)
+            yield state
+
+    def export(self, result_uuid: str, fp: t.BinaryIO) -> int:
+        """
+        Writes the flows of a result to a mitmproxy flow file, returns the number of flows
+
+        :raises UnknownResultError: If the archive has no flows for the result
+        """
+        count = 0
+        for count, state in enumerate(self.iter_states(result_uuid), 1):
+            tnetstring.dump(state, fp)
+
+        if not count:
+            raise UnknownResultError("No flows archived for result {}".format(result_uuid))
+        return count
+
+    def commit(self):
+        self.connection.commit()
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.commit()
+            self._connection.close()
+            self._connection = None
+
+
+def main(args=None):
+    """
+    The seproxer-archive command line interface, lists and exports archived flows
+    """
+    parser = argparse.ArgumentParser(
+        prog="seproxer-archive",
+        description="List and export the flows of a seproxer flow archive",
+    )
+    parser.add_argument("archive", metavar="ARCHIVE", type=str, help="The flow archive")
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.required = True
+
+    subparsers.add_parser("list", help="List the uuids of the archived results")
+    export_parser = subparsers.add_parser(
+        "export", help="Export the flows of a result to a mitmproxy flow file",
+    )
+    export_parser.add_argument("uuid", type=str, help="The result uuid")
+    export_parser.add_argument(
+        "output", type=str, help="The flow file that is written, for example: <uuid>.flow",
+    )
+    parsed_args = parser.parse_args(args=args)
+
+    archive = FlowArchive(parsed_args.archive)
+    try:
+        if parsed_args.command == "list":
+            for result_uuid in archive.uuids():
+                print(result_uuid)
+        else:
+            if not archive.count(parsed_args.uuid):
+                raise UnknownResultError("No flows archived for result {}".format(parsed_args.uuid))
+            with open(parsed_args.output, "wb") as fp:
+                count = archive.export(parsed_args.uuid, fp)
+            print("Exported {} flows to {}".format(count, parsed_args.output))
+    except UnknownResultError as e:
+        sys.exit(str(e))
+    finally:
+        archive.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+This module describes serialized mitmproxy flows that are spooled to disk, this allows
+the flows to be handed between processes without copying them through a pipe.
+"""
+import io
+import os
+import shutil
+import tempfile
+import typing as t  # NOQA
+
+
+# The default number of bytes a spooled flow buffer keeps in memory
+DEFAULT_MEMORY_LIMIT = 32 * 1024 * 1024
+
+
+class FlowDump:
+    """
+    Describes serialized mitmproxy flows that were spooled to a file.
+
+    A descriptor that owns the spooled file removes it once it is garbage collected.  Pickled
+    copies of a descriptor never own the file, the receiving side must `claim` it.
+    """
+    __slots__ = ("path", "size", "_owner")
+
+    def __init__(self, path: str, size: int) -> None:
+        self.path = path
+        self.size = size
+        self._owner = False
+
+    def __reduce__(self):
+        return FlowDump, (self.path, self.size)
+
+    def __repr__(self):
+        return "FlowDump(path={!r}, size={})".format(self.path, self.size)
+
+    @property
+    def is_owner(self) -> bool:
+        return self._owner
+
+    def claim(self):
+        """
+        Takes ownership of the spooled file, it will be removed once this descriptor is
+        garbage collected.
+        """
+        self._owner = True
+
+    def open(self) -> t.BinaryIO:
+        return open(self.path, "rb")
+
+    def read(self) -> bytes:
+        with self.open() as fp:
+            return fp.read()
+
+    def link_to(self, destination: str):
+        """
+        Stores the flows at the destination path.  The spooled file is hard linked when
+        possible so that the flows are never copied, otherwise the file is copied.
+        """
+        try:
+            os.link(self.path, destination)
+        except OSError:
+            shutil.copyfile(self.path, destination)
+
+    def release(self):
+        """
+        Removes the spooled file if this descriptor owns it
+        """
+        if not self._owner:
+            return
+        self._owner = False
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def __del__(self):
+        try:
+            self.release()
+        except Exception:
+            # The interpreter may be shutting down, nothing else we can do
+            pass
+
+    @staticmethod
+    def spool(data: t.Union[bytes, memoryview], directory: str) -> "FlowDump":
+        """
+        Writes the serialized flows to a new file in the specified directory
+        """
+        fd, path = tempfile.mkstemp(suffix=".flow", dir=directory)
+        with os.fdopen(fd, "wb") as fp:
+            fp.write(data)
+        return FlowDump(path, len(data))
+
+
+class SpooledFlowBuffer:
+    """
+    A writable buffer for serialized flows that is kept in memory until it exceeds its'
+    memory limit, the buffer is then spilled to a file so that memory usage remains bounded
+    regardless of how many flows are written.
+    """
+    def __init__(self, directory: str, memory_limit: int=DEFAULT_MEMORY_LIMIT) -> None:
+        """
+        :param directory: The directory the buffer spills to and is spooled to
+        :param memory_limit: The maximum number of bytes kept in memory
+        """
+        self.directory = directory
+        self.memory_limit = memory_limit
+        self.size = 0
+
+        self._buffer = io.BytesIO()
+        self._file = None  # type: t.Optional[t.BinaryIO]
+        self._path = None  # type: t.Optional[str]
+
+    @property
+    def is_spilled(self) -> bool:
+        return self._file is not None
+
+    def _spill(self):
+        fd, self._path = tempfile.mkstemp(suffix=".flow", dir=self.directory)
+        self._file = os.fdopen(fd, "wb")
+        self._file.write(self._buffer.getbuffer())
+        self._buffer = io.BytesIO()
+
+    def write(self, data: bytes) -> int:
+        if self._file is None and self.size + len(data) > self.memory_limit:
+            self._spill()
+
+        if self._file is not None:
+            self._file.write(data)
+        else:
+            self._buffer.write(data)
+
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+
+    def dump(self) -> FlowDump:
+        """
+        Spools the buffered flows to a file, a spilled buffer is handed over as is.  The buffer
+        must not be written to afterwards.
+        """
+        if self._file is None:
+            return FlowDump.spool(self._buffer.getbuffer(), self.directory)
+
+        self._file.close()
+        self._file = None
+        return FlowDump(self._path, self.size)
+
+    def discard(self):
+        """
+        Discards the buffered flows, removing the spilled file if there is one
+        """
+        self._buffer = io.BytesIO()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            os.remove(self._path)
@@ -1,6 +1,9 @@
 import typing as t
 import os
 import abc
+import multiprocessing
+import multiprocessing.pool  # NOQA
+import signal
 import threading
 import queue
 import json
@@ -8,8 +11,13 @@ import uuid
 import asyncio
 import logging
 import datetime
+import time
 
 import seproxer.options
+import seproxer.fingerprints
+import seproxer.flow_archive
+import seproxer.journal
+import seproxer.result_database
 from seproxer import seproxer_enums
 
 
@@ -29,12 +37,132 @@ class ThreadStartedError(Error):
     """
 
 
+class HandlerClosedError(Error):
+    """
+    Exception occurs when a result is processed by a handler that was already closed
+    """
+
+
+class BoundedResultQueue(queue.Queue):
+    """
+    A results queue with a maximum size, the policy determines what happens when a result is
+    put into a full queue:
+
+    * BLOCK: blocks until a result is taken from the queue
+    * DROP_OLDEST: the oldest queued result is dropped
+    * DROP_BELOW_LEVEL: the result is dropped if its' level is below the drop level,
+                        otherwise blocks
+
+    Dropped results are passed to the `on_drop` callback.
+    """
+    def __init__(self,
+                 maxsize: int,
+                 policy: seproxer_enums.QueuePolicy=seproxer_enums.QueuePolicy.BLOCK,
+                 drop_level: seproxer_enums.ResultLevel=seproxer_enums.ResultLevel.WARNING,
+                 ) -> None:
+        super().__init__(maxsize=maxsize)
+        self.policy = policy
+        self.drop_level = drop_level
+        self.max_depth = 0
+        self.on_drop = None  # type: t.Optional[t.Callable[[t.Any], None]]
+
+    def _drop(self, result):
+        if self.on_drop:
+            self.on_drop(result)
+
+    def _put(self, item):
+        # Called by the queue with its' mutex held
+        super()._put(item)
+        self.max_depth = max(self.max_depth, self._qsize())
+
+    def put(self, item, block=True, timeout=None):
+        if not block or self.policy is seproxer_enums.QueuePolicy.BLOCK:
+            return super().put(item, block=block, timeout=timeout)
+
+        if self.policy is seproxer_enums.QueuePolicy.DROP_BELOW_LEVEL:
+            if item.status_code.value >= self.drop_level.value:
+                return super().put(item, block=block, timeout=timeout)
+            try:
+                return super().put(item, block=False)
+            except queue.Full:
+                return self._drop(item)
+
+        # Drop the oldest results until the result fits, the handler may take results
+        # in the meantime
+        while True:
+            try:
+                return super().put(item, block=False)
+            except queue.Full:
+                pass
+            try:
+                oldest = self.get(block=False)
+            except queue.Empty:
+                continue
+            self.task_done()
+            self._drop(oldest)
+
+
+class HandlerMetrics:
+    """
+    The metrics of a single handler
+    """
+    __slots__ = ("processed", "failed", "dropped", "processing_time", "_lock")
+
+    def __init__(self) -> None:
+        self.processed = 0
+        self.failed = 0
+        self.dropped = 0
+        # The total number of seconds spent processing results
+        self.processing_time = 0.0
+        self._lock = threading.Lock()
+
+    def record_processed(self, processing_time: float, failed: bool=False):
+        with self._lock:
+            self.processed += 1
+            self.failed += int(failed)
+            self.processing_time += processing_time
+
+    def record_dropped(self):
+        with self._lock:
+            self.dropped += 1
+
+    def as_dict(self) -> t.Dict[str, t.Any]:
+        with self._lock:
+            return {
+                "processed": self.processed,
+                "failed": self.failed,
+                "dropped": self.dropped,
+                "processing_time": self.processing_time,
+            }
+
+
 class ResultHandler(threading.Thread, metaclass=abc.ABCMeta):
+    # Set this to True in inherited classes that process the proxy results of a result,
+    # the proxy results of results no handler requires are never retrieved from the proxy
+    requires_proxy_results = False
+    # Set this to True in inherited classes that spend most of their time holding the GIL, such
+    # as serializing or compressing results, they may be run in a process, see
+    # `PooledResultHandler`
+    cpu_bound = False
+    # Set this to True in inherited classes that buffer their output, such as batched
+    # transactions, and call `results_flushed` whenever the output was written.  The processed
+    # callbacks of their results, which journal the results, are deferred until then.
+    buffers_results = False
+
     def __init__(self, results_queue: t.Optional[queue.Queue]=None) -> None:
         super().__init__(daemon=True)
         if not results_queue:
             results_queue = queue.Queue()
         self._results_queue = results_queue
+        self._processed_callbacks = []  # type: t.List[t.Callable[[t.Any, bool], None]]
+        self._dropped_callbacks = []  # type: t.List[t.Callable[[t.Any], None]]
+        self.metrics = HandlerMetrics()
+        # Overrides `has_pending_results` when results are processed by a process pool
+        self._has_pending_results = None  # type: t.Optional[bool]
+        # The processed results of buffering handlers that were not flushed yet, without their
+        # proxy results so that those can be released
+        self._unflushed_results = []  # type: t.List[SerializedResult]
+        self._is_flushed = False
 
     @classmethod
     def class_name(cls):
@@ -57,6 +185,59 @@ class ResultHandler(threading.Thread, metaclass=abc.ABCMeta):
 
         return self._results_queue
 
+    def set_queue(self, results_queue: queue.Queue):
+        """
+        Replaces the results queue, for example, with a `BoundedResultQueue`
+        """
+        if self.is_alive():
+            raise ThreadStartedError("Cannot set queue while thread is alive!")
+
+        if isinstance(results_queue, BoundedResultQueue):
+            results_queue.on_drop = self._result_dropped
+        self._results_queue = results_queue
+
+    def get_metrics(self) -> t.Dict[str, t.Any]:
+        """
+        Returns the handler's metrics including the current and maximum depth of its' queue
+        """
+        metrics = self.metrics.as_dict()
+        metrics["depth"] = self._results_queue.qsize()
+        metrics["max_depth"] = getattr(self._results_queue, "max_depth", None)
+        return metrics
+
+    def _result_dropped(self, result):
+        self.metrics.record_dropped()
+        logger.warning("Handler '{}' dropped result {} of {}".format(
+            self.handler_name, result.uuid, result.url))
+        for callback in self._dropped_callbacks:
+            try:
+                callback(result)
+            except Exception:
+                logger.exception(
+                    "Error in dropped callback of handler '{}'".format(self.handler_name)
+                )
+
+    def add_dropped_callback(self, callback: t.Callable[[t.Any], None]):
+        """
+        Adds a callback that is called with every result that is dropped from the queue
+        without being processed
+        """
+        if self.is_alive():
+            raise ThreadStartedError("Cannot add a callback while thread is alive!")
+
+        self._dropped_callbacks.append(callback)
+
+    def add_processed_callback(self, callback: t.Callable[[t.Any, bool], None]):
+        """
+        Adds a callback that is called with every result after it has been processed,
+        regardless of whether processing the result succeeded.  The callback is called with
+        the result and whether processing it failed.
+        """
+        if self.is_alive():
+            raise ThreadStartedError("Cannot add a callback while thread is alive!")
+
+        self._processed_callbacks.append(callback)
+
     @abc.abstractmethod
     def supported_handle_types(self) -> tuple:
         """
@@ -72,18 +253,223 @@ class ResultHandler(threading.Thread, metaclass=abc.ABCMeta):
         Implement this method for processing!
         """
 
+    def close(self):
+        """
+        Called once all results were processed, implement this method to release resources
+        such as open files.  The output of buffering handlers must be written once closed.
+        """
+
+    def finish(self):
+        """
+        Closes the handler and completes the results whose output was buffered
+        """
+        failed = False
+        try:
+            self.close()
+        except Exception:
+            failed = True
+            logger.exception("Error closing handler '{}'".format(self.handler_name))
+        self._complete_results(self._pop_unflushed_results(), failed)
+
+    def results_flushed(self):
+        """
+        Call this method in buffering handlers once the output of all processed results was
+        written, see `buffers_results`
+        """
+        self._is_flushed = True
+
+    def _pop_unflushed_results(self) -> t.List["SerializedResult"]:
+        results = self._unflushed_results
+        self._unflushed_results = []
+        self._is_flushed = False
+        return results
+
+    def _complete_results(self, results: t.Iterable[t.Any], failed: bool):
+        for result in results:
+            for callback in self._processed_callbacks:
+                try:
+                    callback(result, failed)
+                except Exception:
+                    logger.exception(
+                        "Error in processed callback of handler '{}'".format(self.handler_name)
+                    )
+
+    def has_pending_results(self) -> bool:
+        """
+        Indicates whether more results are waiting to be processed, handlers may defer
+        flushing their output until there are none
+        """
+        if self._has_pending_results is not None:
+            return self._has_pending_results
+        return not self._results_queue.empty()
+
+    def process_pooled_result(self, result: "SerializedResult", has_pending_results: bool
+                              ) -> bool:
+        """
+        Processes a result in a process pool worker, see `PooledResultHandler`.  Returns
+        whether the output of the handler was flushed.
+        """
+        self._has_pending_results = has_pending_results
+        self._is_flushed = False
+        self.process_result(result)
+        return self._is_flushed
+
     def run(self):
         # Run continuously until we retrieve a result from the queue and then process it
         while True:
             result_to_process = self._results_queue.get()
+            start_time = time.perf_counter()
+            failed = False
             try:
                 self.process_result(result_to_process)
             except Exception:
+                failed = True
                 logger.exception("Error processing handler '{}'".format(self.handler_name))
             finally:
+                self.metrics.record_processed(time.perf_counter() - start_time, failed=failed)
+                if not self.buffers_results:
+                    self._complete_results((result_to_process,), failed)
+                else:
+                    self._unflushed_results.append(SerializedResult.from_result(
+                        result_to_process, include_proxy_results=False))
+                    # A failure may have lost the buffered output of the previous results too
+                    if failed or self._is_flushed:
+                        self._complete_results(self._pop_unflushed_results(), failed)
                 self._results_queue.task_done()
 
 
+class SerializedResult:
+    """
+    A compact, picklable form of a `seproxer.main.SeproxerUrlResult` that is sent to process
+    pool workers.  The proxy results are a `flow_dumps.FlowDump`, which is pickled without
+    owning its' file, the original result must be kept until the worker is done with it.
+    """
+    __slots__ = (
+        "url", "status_code", "state_results", "validator_results", "proxy_results", "uuid",
+    )
+
+    def __init__(self, url, uuid, status_code, state_results, validator_results,
+                 proxy_results=None) -> None:
+        self.url = url
+        self.uuid = uuid
+        self.status_code = status_code
+        self.state_results = state_results
+        self.validator_results = validator_results
+        self.proxy_results = proxy_results
+
+    def __reduce__(self):
+        return SerializedResult, (
+            self.url, self.uuid, self.status_code, self.state_results, self.validator_results,
+            self.proxy_results,
+        )
+
+    @staticmethod
+    def from_result(result, include_proxy_results: bool=True) -> "SerializedResult":
+        return SerializedResult(
+            url=result.url,
+            uuid=result.uuid,
+            status_code=result.status_code,
+            state_results=result.state_results,
+            validator_results=result.validator_results,
+            proxy_results=result.proxy_results if include_proxy_results else None,
+        )
+
+
+# The handlers of a process pool worker by handler class and arguments
+_pooled_handlers = {}  # type: t.Dict[t.Tuple[type, str], ResultHandler]
+
+
+def _get_pooled_handler(handler_class: type, handler_kwargs: dict) -> ResultHandler:
+    key = handler_class, repr(sorted(handler_kwargs.items()))
+    handler = _pooled_handlers.get(key)
+    if handler is None:
+        # The handler's thread is never started, results are processed by the worker
+        handler = _pooled_handlers[key] = handler_class(**handler_kwargs)
+    return handler
+
+
+def _process_pooled_result(handler_class: type, handler_kwargs: dict,
+                           result: SerializedResult, has_pending_results: bool) -> bool:
+    return _get_pooled_handler(handler_class, handler_kwargs).process_pooled_result(
+        result, has_pending_results)
+
+
+def _close_pooled_handler(handler_class: type, handler_kwargs: dict):
+    _get_pooled_handler(handler_class, handler_kwargs).close()
+
+
+def _init_pool_worker():
+    # Interrupts are handled by the main process, which closes the pooled handlers
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+class PooledResultHandler(ResultHandler):
+    """
+    Runs a handler in a dedicated worker process so that CPU bound processing doesn't hold
+    the GIL of the process driving the browsers.  The handler is created in the worker from
+    its' class and keyword arguments, results are sent to it as `SerializedResult`s.
+
+    The worker process is a single process pool, results are processed one at a time and
+    in order, as they are by a handler's thread.  The worker is spawned, rather than forked
+    from a process running browser and handler threads, when the handler is created and it
+    ignores SIGINT.
+    """
+    # Forking a process that runs threads may deadlock the child and would inherit the
+    # parent's signal handlers
+    START_METHOD = "spawn"
+
+    def __init__(self, handler_class: type, handler_kwargs: t.Optional[dict]=None) -> None:
+        super().__init__()
+        self._handler_class = handler_class
+        self._handler_kwargs = handler_kwargs or {}
+        # Handles the handler's properties, it is never started in this process
+        self._local_handler = handler_class(**self._handler_kwargs)  # type: ResultHandler
+        self.requires_proxy_results = self._local_handler.requires_proxy_results
+        self.buffers_results = self._local_handler.buffers_results
+
+        self._pool = multiprocessing.get_context(self.START_METHOD).Pool(
+            1, initializer=_init_pool_worker,
+        )  # type: t.Optional[multiprocessing.pool.Pool]
+
+    @property
+    def handler_name(self) -> str:
+        return "{}[pooled]".format(self._local_handler.handler_name)
+
+    def supported_handle_types(self):
+        return self._local_handler.supported_handle_types()
+
+    @property
+    def pool(self) -> multiprocessing.pool.Pool:
+        if self._pool is None:
+            raise HandlerClosedError("Handler '{}' is closed".format(self.handler_name))
+        return self._pool
+
+    def process_result(self, result):
+        serialized_result = SerializedResult.from_result(
+            result, include_proxy_results=self.requires_proxy_results,
+        )
+        # Waiting for the worker keeps the result, which owns the proxy results, alive
+        is_flushed = self.pool.apply(_process_pooled_result, (
+            self._handler_class, self._handler_kwargs,
+            serialized_result, self.has_pending_results(),
+        ))
+        if is_flushed:
+            self.results_flushed()
+
+    def close(self):
+        if self._pool is None:
+            return
+        try:
+            self._pool.apply(_close_pooled_handler, (self._handler_class, self._handler_kwargs))
+            self._pool.close()
+        except Exception:
+            self._pool.terminate()
+            raise
+        finally:
+            self._pool.join()
+            self._pool = None
+
+
 async def await_for_queues(queues):
     loop = asyncio.get_event_loop()
     blocking_queue_joins = [loop.run_in_executor(None, q.join) for q in queues]
@@ -91,8 +477,26 @@ async def await_for_queues(queues):
 
 
 class ResultHandlerManager:
-    def __init__(self, initial_handlers: t.Optional[t.Iterable[ResultHandler]]=None) -> None:
+    def __init__(self,
+                 initial_handlers: t.Optional[t.Iterable[ResultHandler]]=None,
+                 journal: t.Optional[seproxer.journal.ResultJournal]=None) -> None:
+        """
+        :param initial_handlers: The handlers that will be started and handle results
+        :param journal: When specified, every result is recorded to the journal once all of
+                        the handlers that support it have processed it.
+        """
         self._handlers = []  # type: t.List[ResultHandler]
+        self._journal = journal
+
+        # The number of handlers, by result uuid, that have yet to process a result
+        self._pending_handler_counts = {}  # type: t.Dict[str, int]
+        # The uuids of pending results that were dropped by a handler or that a handler failed
+        # to process, they are never recorded to the journal so that they are tested again
+        # when resuming
+        self._incomplete_uuids = set()  # type: t.Set[str]
+        self._pending_lock = threading.Lock()
+        # Results handled once the manager is done are ignored, the journal is closed
+        self._is_done = False
 
         if not initial_handlers:
             initial_handlers = []
@@ -101,16 +505,78 @@ class ResultHandlerManager:
             self.add_handler(handler)
 
     def add_handler(self, handler):
+        handler.add_processed_callback(self._result_processed)
+        handler.add_dropped_callback(self._result_dropped)
         self._handlers.append((handler, handler.get_queue()))
         # Start the handler
         handler.start()
 
+    def _result_processed(self, result, failed: bool=False):
+        if self._journal is None:
+            return
+
+        with self._pending_lock:
+            if failed:
+                self._incomplete_uuids.add(result.uuid)
+
+            remaining = self._pending_handler_counts[result.uuid] - 1
+            if remaining:
+                self._pending_handler_counts[result.uuid] = remaining
+                return
+            del self._pending_handler_counts[result.uuid]
+
+            if result.uuid in self._incomplete_uuids:
+                self._incomplete_uuids.discard(result.uuid)
+                return
+
+        self._journal.record(result.url, result.uuid)
+
+    def _result_dropped(self, result):
+        self._result_processed(result, failed=True)
+
+    def metrics(self) -> t.Dict[str, t.Dict[str, t.Any]]:
+        """
+        Returns the metrics of every handler by handler name
+        """
+        return {handler.handler_name: handler.get_metrics() for handler, _ in self._handlers}
+
+    def requires_proxy_results(self, status_code: seproxer_enums.ResultLevel) -> bool:
+        """
+        Indicates whether any handler will process the proxy results of a result with the
+        specified status
+        """
+        return any(
+            handler.requires_proxy_results and status_code in handler.supported_handle_types()
+            for handler, _ in self._handlers
+        )
+
     def handle(self, result):
-        for handler, handler_queue in self._handlers:
-            if result.status_code in handler.supported_handle_types():
-                handler_queue.put(result)
+        handler_queues = [
+            handler_queue for handler, handler_queue in self._handlers
+            if result.status_code in handler.supported_handle_types()
+        ]
+
+        with self._pending_lock:
+            # A worker may finish a URL after the manager is done, for example, once
+            # interrupted, the result is neither handled nor journaled
+            if self._is_done:
+                logger.warning("Ignoring result {} of {}, handlers are done".format(
+                    result.uuid, result.url))
+                return
+
+            if self._journal is not None:
+                if not handler_queues:
+                    self._journal.record(result.url, result.uuid)
+                else:
+                    self._pending_handler_counts[result.uuid] = len(handler_queues)
+
+        for handler_queue in handler_queues:
+            handler_queue.put(result)
 
     def done(self):
+        with self._pending_lock:
+            self._is_done = True
+
         # All we need to do is simply wait for all of our queues to be empty
         loop = asyncio.get_event_loop()
         queues = (h[1] for h in self._handlers)
@@ -118,30 +584,79 @@ class ResultHandlerManager:
             loop.run_until_complete(await_for_queues(queues))
         finally:
             loop.close()
+            for handler_name, metrics in self.metrics().items():
+                logger.info("Handler '{}' metrics: {}".format(handler_name, metrics))
+            for handler, _ in self._handlers:
+                handler.finish()
+            if self._journal is not None:
+                self._journal.close()
 
     @staticmethod
-    def from_options(options: seproxer.options.Options) -> "ResultHandlerManager":
-        initial_handlers = []  # type: t.List[ResultHandler]
+    def from_options(options: seproxer.options.Options,
+                     journal: t.Optional[seproxer.journal.ResultJournal]=None
+                     ) -> "ResultHandlerManager":
+        # The class and keyword arguments of every handler
+        handler_specs = []  # type: t.List[t.Tuple[type, t.Dict[str, t.Any]]]
         if options.file_results_level is not None:
-            initial_handlers.append(
-                FileLogHandler(
+            if options.file_results_format is seproxer_enums.ResultsFileFormat.JSONL:
+                handler_specs.append((JsonLinesLogHandler, dict(
+                    results_directory=options.results_directory,
+                    results_file_name=options.file_results_jsonl_file_name,
+                    file_level=options.file_results_level,
+                    assembled_file_name=(
+                        options.file_results_file_name if options.assemble_results_file
+                        else None
+                    ),
+                )))
+            else:
+                handler_specs.append((FileLogHandler, dict(
                     results_directory=options.results_directory,
                     results_file_name=options.file_results_file_name,
                     file_level=options.file_results_level,
-                )
-            )
+                )))
+        if options.results_database is not None:
+            handler_specs.append((SqliteResultHandler, dict(
+                database_path=options.results_database_path,
+                store_level=options.results_database_level,
+            )))
+        if options.fingerprint_report is not None:
+            handler_specs.append((ErrorFingerprintHandler, dict(
+                report_path=options.fingerprint_report_path,
+                fingerprint_level=options.fingerprint_level,
+            )))
         if options.flow_storage_level is not None:
-            initial_handlers.append(
-                FlowFileHandler(
+            if options.flow_archive is not None:
+                handler_specs.append((FlowArchiveHandler, dict(
+                    archive_path=options.flow_archive_path,
+                    store_flow_level=options.flow_storage_level,
+                )))
+            else:
+                handler_specs.append((FlowFileHandler, dict(
                     results_directory=options.results_directory,
                     store_flow_level=options.flow_storage_level,
-                )
-            )
+                )))
+
+        initial_handlers = []  # type: t.List[ResultHandler]
+        for handler_class, handler_kwargs in handler_specs:
+            if options.pooled_handlers and handler_class.cpu_bound:
+                initial_handlers.append(PooledResultHandler(handler_class, handler_kwargs))
+            else:
+                initial_handlers.append(handler_class(**handler_kwargs))
 
-        return ResultHandlerManager(initial_handlers=initial_handlers)
+        if options.handler_queue_size:
+            for handler in initial_handlers:
+                handler.set_queue(BoundedResultQueue(
+                    maxsize=options.handler_queue_size,
+                    policy=options.handler_queue_policy,
+                    drop_level=options.handler_queue_drop_level,
+                ))
+
+        return ResultHandlerManager(initial_handlers=initial_handlers, journal=journal)
 
 
 class FlowFileHandler(ResultHandler):
+    requires_proxy_results = True
+
     def __init__(self,
                  results_directory: str,
                  store_flow_level: seproxer_enums.ResultLevel=seproxer_enums.ResultLevel.ERROR
@@ -158,11 +673,58 @@ class FlowFileHandler(ResultHandler):
 
     def process_result(self, result):
         flow_file = self._flow_file_format.format(result.uuid)
-        with open(flow_file, "wb") as fp:
-            fp.write(result.proxy_results)
+        # The proxy results are a spooled flow dump, linking it avoids copying the flows
+        result.proxy_results.link_to(flow_file)
+
+
+class FlowArchiveHandler(ResultHandler):
+    """
+    Stores the flows of results in a content addressed archive, see `seproxer.flow_archive`,
+    instead of a flow file per result.  Flows are archived in batched transactions, a
+    transaction is committed once it contains `BATCH_SIZE` results or there are no results
+    left to process.
+    """
+    requires_proxy_results = True
+    cpu_bound = True
+    buffers_results = True
+    BATCH_SIZE = 20
+
+    def __init__(self,
+                 archive_path: str,
+                 store_flow_level: seproxer_enums.ResultLevel=seproxer_enums.ResultLevel.ERROR
+                 ) -> None:
+        super().__init__()
+
+        self._archive_path = archive_path
+        self._supported_handle_types = store_flow_level.cascaded()
+
+        self._archive = None  # type: t.Optional[seproxer.flow_archive.FlowArchive]
+        self._batch_size = 0
+
+    def supported_handle_types(self):
+        return self._supported_handle_types
+
+    def process_result(self, result):
+        if self._archive is None:
+            self._archive = seproxer.flow_archive.FlowArchive(self._archive_path)
+
+        self._archive.add(result.uuid, result.proxy_results)
+        self._batch_size += 1
+
+        if self._batch_size >= self.BATCH_SIZE or not self.has_pending_results():
+            self._archive.commit()
+            self._batch_size = 0
+            self.results_flushed()
+
+    def close(self):
+        if self._archive is not None:
+            self._archive.close()
+            self._archive = None
 
 
 class FileLogHandler(ResultHandler):
+    cpu_bound = True
+
     def __init__(self, results_directory, results_file_name,
                  file_level: seproxer_enums.ResultLevel=seproxer_enums.ResultLevel.ERROR) -> None:
         super().__init__()
@@ -183,10 +745,15 @@ class FileLogHandler(ResultHandler):
                 s.name: s.is_state_reached
                 for s in result.state_results if s.is_supported
             },
+            "state_times": {
+                s.name: round(s.elapsed_time, 3)
+                for s in result.state_results if s.elapsed_time is not None
+            },
             "status": result.status_code.name,
             "successes": [r.as_dict() for r in result.validator_results.ok],
             "errors": [r.as_dict() for r in result.validator_results.error],
             "warnings": [r.as_dict() for r in result.validator_results.warning],
+            "skipped_validators": result.validator_results.skipped,
         }
 
     def supported_handle_types(self):
@@ -229,3 +796,193 @@ class FileLogHandler(ResultHandler):
         # Finally, write the saved data
         with open(self._results_file_path, "w") as fp:
             fp.write(json.dumps(saved_data, indent=2, sort_keys=True))
+
+
+class JsonLinesLogHandler(FileLogHandler):
+    """
+    Appends every result as a single line of JSON to the results file, the file is never
+    read or rewritten.  Results are buffered and flushed whenever there are no results left
+    to process or the buffer is full, results are only journaled once flushed.
+
+    The JSON results file, as written by `FileLogHandler`, may be assembled from all the
+    results of the JSON Lines file once all results were processed.
+    """
+    # The number of bytes of results buffered before they are written
+    BUFFER_SIZE = 64 * 1024
+    buffers_results = True
+
+    def __init__(self, results_directory, results_file_name,
+                 file_level: seproxer_enums.ResultLevel=seproxer_enums.ResultLevel.ERROR,
+                 assembled_file_name: t.Optional[str]=None) -> None:
+        """
+        :param results_directory: The directory that the results are written to
+        :param results_file_name: The name of the JSON Lines file that results are appended to
+        :param file_level: The minimum level of the results that are written
+        :param assembled_file_name: When specified, the JSON results file with this name is
+                                    assembled from the JSON Lines file once closed
+        """
+        super().__init__(results_directory, results_file_name, file_level=file_level)
+
+        self._assembled_file_path = None  # type: t.Optional[str]
+        if assembled_file_name:
+            self._assembled_file_path = "{}/{}".format(results_directory, assembled_file_name)
+        self._fp = None  # type: t.Optional[t.TextIO]
+        self._buffered_size = 0
+
+    def process_result(self, result):
+        if self._fp is None:
+            self._fp = open(self._results_file_path, "a", buffering=self.BUFFER_SIZE)
+
+        line = json.dumps(self._result_template(result), sort_keys=True) + "\n"
+        self._fp.write(line)
+        self._buffered_size += len(line)
+
+        if self._buffered_size >= self.BUFFER_SIZE or not self.has_pending_results():
+            self._fp.flush()
+            self._buffered_size = 0
+            self.results_flushed()
+
+    def assemble(self, assembled_file_path: str):
+        """
+        Writes the results of the JSON Lines file as a JSON array, formatted as the
+        `FileLogHandler` formats it.  Results are streamed one at a time.
+        """
+        temporary_file_path = "{}.{}.tmp".format(assembled_file_path, str(uuid.uuid4())[:8])
+        with open(temporary_file_path, "w") as out_fp:
+            separator = "[\n"
+            try:
+                with open(self._results_file_path) as in_fp:
+                    for line_number, line in enumerate(in_fp, 1):
+                        if not line.strip():
+                            continue
+                        try:
+                            result_data = json.loads(line)
+                        except json.JSONDecodeError as e:
+                            logger.error("Skipping line {} of {}: {}".format(
+                                line_number, self._results_file_path, e))
+                            continue
+
+                        # Indented as an element of the array
+                        result_json = json.dumps(result_data, indent=2, sort_keys=True)
+                        result_lines = result_json.splitlines()
+                        out_fp.write(separator)
+                        out_fp.write("\n".join("  " + json_line for json_line in result_lines))
+                        separator = ",\n"
+            except FileNotFoundError:
+                pass
+
+            # An empty array is written as json.dumps writes it
+            out_fp.write("[]" if separator == "[\n" else "\n]")
+
+        os.replace(temporary_file_path, assembled_file_path)
+
+    def close(self):
+        if self._fp is not None:
+            self._fp.close()
+            self._fp = None
+
+        if self._assembled_file_path:
+            self.assemble(self._assembled_file_path)
+
+
+class SqliteResultHandler(ResultHandler):
+    """
+    Stores results in an indexed SQLite database, see `seproxer.result_database`.  Results
+    are inserted in batched transactions, a transaction is committed once it contains
+    `BATCH_SIZE` results or there are no results left to process.
+    """
+    cpu_bound = True
+    buffers_results = True
+    BATCH_SIZE = 100
+
+    def __init__(self,
+                 database_path: str,
+                 store_level: seproxer_enums.ResultLevel=seproxer_enums.ResultLevel.OK
+                 ) -> None:
+        super().__init__()
+
+        self._database_path = database_path
+        self._supported_handle_types = store_level.cascaded()
+
+        self._database = None  # type: t.Optional[seproxer.result_database.ResultDatabase]
+        self._run_id = None  # type: t.Optional[int]
+        self._batch_size = 0
+
+    def supported_handle_types(self):
+        return self._supported_handle_types
+
+    def process_result(self, result):
+        if self._database is None:
+            self._database = seproxer.result_database.ResultDatabase(self._database_path)
+            self._run_id = self._database.start_run()
+
+        self._database.insert_result(self._run_id, result)
+        self._batch_size += 1
+
+        if self._batch_size >= self.BATCH_SIZE or not self.has_pending_results():
+            self._database.commit()
+            self._batch_size = 0
+            self.results_flushed()
+
+    def close(self):
+        if self._database is not None:
+            self._database.close()
+            self._database = None
+
+
+class ErrorFingerprintHandler(ResultHandler):
+    """
+    Groups the validator messages of results by their fingerprint, see
+    `seproxer.fingerprints`, and writes a report of the distinct messages with the number
+    of results they occurred in and all of their URLs.
+
+    The report is rewritten once all results were processed, and at most every
+    `REPORT_INTERVAL` seconds whenever there are no results left to process.
+    """
+    REPORT_INTERVAL = 30.0
+
+    def __init__(self,
+                 report_path: str,
+                 fingerprint_level: seproxer_enums.ResultLevel=seproxer_enums.ResultLevel.WARNING,
+                 ) -> None:
+        super().__init__()
+
+        self._report_path = report_path
+        self._fingerprint_level = fingerprint_level
+        self._supported_handle_types = fingerprint_level.cascaded()
+        self._index = seproxer.fingerprints.FingerprintIndex()
+        self._last_report_time = time.time()
+
+    def supported_handle_types(self):
+        return self._supported_handle_types
+
+    def process_result(self, result):
+        # Only the messages of the fingerprinted levels are indexed, results of a
+        # fingerprinted level may contain messages of lower levels
+        self._index.add(result.url, (
+            validator_result
+            for level in self._supported_handle_types
+            for validator_result in self._level_results(result.validator_results, level)
+        ))
+
+        now = time.time()
+        if not self.has_pending_results() and now - self._last_report_time >= self.REPORT_INTERVAL:
+            self.write_report()
+            self._last_report_time = now
+
+    @staticmethod
+    def _level_results(validator_results, level: seproxer_enums.ResultLevel):
+        if level is seproxer_enums.ResultLevel.ERROR:
+            return validator_results.error
+        if level is seproxer_enums.ResultLevel.WARNING:
+            return validator_results.warning
+        return validator_results.ok
+
+    def write_report(self):
+        temporary_report_path = "{}.{}.tmp".format(self._report_path, str(uuid.uuid4())[:8])
+        with open(temporary_report_path, "w") as fp:
+            fp.write(json.dumps(self._index.report(), indent=2, sort_keys=True))
+        os.replace(temporary_report_path, self._report_path)
+
+    def close(self):
+        self.write_report()
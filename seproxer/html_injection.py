@@ -0,0 +1,107 @@
+"""
+This module injects scripts into HTML documents.  The insertion point is found by scanning
+the raw bytes of the document so that it is neither parsed nor re-encoded, the document is
+only parsed when the scan can't reliably locate its' head.
+"""
+import re
+import typing as t  # NOQA
+
+import bs4
+
+
+# The markup that the scan stops at: comments, elements whose raw text content may contain
+# tags (the same elements as python's html.parser) and the head tag
+MARKUP_PATTERN = re.compile(
+    rb"<!--|<(script|style|head)(?=[\s/>])",
+    re.IGNORECASE,
+)
+# The remainder of an opening tag, attribute values may be quoted and contain ">"
+TAG_REMAINDER_PATTERN = re.compile(rb"""(?:[^>"']|"[^"]*"|'[^']*')*>""")
+
+COMMENT_END = b"-->"
+HEAD_TAG_NAME = b"head"
+
+
+def script_tag(javascript: str) -> bytes:
+    return b'<script type="application/javascript">' + javascript.encode() + b"</script>"
+
+
+def _end_of_tag(html: bytes, position: int) -> int:
+    tag_match = TAG_REMAINDER_PATTERN.match(html, position)
+    if tag_match is None:
+        raise ValueError("Unterminated tag at offset {}".format(position))
+    return tag_match.end()
+
+
+def find_head_insertion_point(html: bytes) -> t.Optional[int]:
+    """
+    Returns the offset right after the opening head tag of the document, `None` if the
+    document has no head tag.  Head tags within comments, scripts and styles are skipped.
+
+    :raises ValueError: If the head tag can't be located without parsing the document
+    """
+    position = 0
+    while True:
+        markup_match = MARKUP_PATTERN.search(html, position)
+        if markup_match is None:
+            # The parser doesn't synthesize a head either
+            return None
+
+        tag_name = markup_match.group(1)
+        if tag_name is None:
+            comment_end = html.find(COMMENT_END, markup_match.end())
+            if comment_end == -1:
+                raise ValueError("Unterminated comment at offset {}".format(markup_match.start()))
+            position = comment_end + len(COMMENT_END)
+            continue
+
+        tag_end = _end_of_tag(html, markup_match.end())
+        if tag_name.lower() == HEAD_TAG_NAME:
+            return tag_end
+
+        end_tag_match = re.compile(b"</" + tag_name, re.IGNORECASE).search(html, tag_end)
+        if end_tag_match is None:
+            raise ValueError("Unterminated {} element at offset {}".format(
+                tag_name.decode(), markup_match.start()))
+        position = end_tag_match.end()
+
+
+def _parse_and_inject(html: bytes, javascript: str) -> t.Optional[bytes]:
+    bs_html = bs4.BeautifulSoup(html, "html.parser")
+    if not bs_html.head:
+        return None
+
+    injected_script = bs_html.new_tag(
+        name="script",
+        type="application/javascript",
+    )
+    injected_script.string = javascript
+    bs_html.head.insert(0, injected_script)
+
+    return bs_html.encode()
+
+
+def inject_script(html: bytes,
+                  javascript: str,
+                  encoded_script_tag: t.Optional[bytes]=None) -> t.Optional[bytes]:
+    """
+    Inserts a script as the first element of the document's head, the document is only
+    parsed if the scan of its' bytes fails, see `find_head_insertion_point`.
+
+    :param html: The HTML document
+    :param javascript: The javascript that will be injected
+    :param encoded_script_tag: The script tag of the javascript, see `script_tag`, it may
+                               be provided to avoid encoding it for every document
+    :return: The document with the injected script or `None` if the document has no head
+    """
+    try:
+        insertion_point = find_head_insertion_point(html)
+    except ValueError:
+        return _parse_and_inject(html, javascript)
+
+    if insertion_point is None:
+        return None
+
+    if encoded_script_tag is None:
+        encoded_script_tag = script_tag(javascript)
+    return b"".join((html[:insertion_point], encoded_script_tag, html[insertion_point:]))
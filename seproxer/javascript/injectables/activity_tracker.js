@@ -0,0 +1,159 @@
+/**
+ * Self injecting script that tracks the in-flight activity of a page, that is, pending
+ * XMLHttpRequests, fetch requests and short timers, and the document's ready state.  The
+ * activity is exposed through "window.__seproxer_activity" which reports whether the page
+ * is idle, regardless of the framework the page is built with.
+ *
+ * Short timers that are scheduled by the callback of a short timer once the document is
+ * loaded are not tracked, such chains are usually polling loops that would keep the page
+ * busy forever.
+ */
+(function($window) {
+    if($window.__seproxer_activity !== undefined) {
+        return;
+    }
+
+    // Timers with longer delays, such as polling intervals, do not keep the page busy
+    var MAX_TRACKED_TIMER_DELAY = 1000;
+    // The interval at which waiting callbacks check whether the page became idle
+    var WAIT_INTERVAL = 50;
+
+    var originalSetTimeout = $window.setTimeout;
+    var originalClearTimeout = $window.clearTimeout;
+
+    var now = function() {
+        return new Date().getTime();
+    };
+
+    var activity = $window.__seproxer_activity = {
+        pending: {
+            xhr: 0,
+            fetch: 0,
+            timers: 0
+        },
+        lastActivity: now()
+    };
+
+    var begin = function(type) {
+        activity.pending[type]++;
+        activity.lastActivity = now();
+    };
+
+    var end = function(type) {
+        activity.pending[type] = Math.max(activity.pending[type] - 1, 0);
+        activity.lastActivity = now();
+    };
+
+    // A setTimeout that is not tracked, for scripts that wait for the page
+    activity.setTimeout = function() {
+        return originalSetTimeout.apply($window, arguments);
+    };
+
+    activity.isBusy = function() {
+        return $window.document.readyState !== "complete" ||
+            activity.pending.xhr + activity.pending.fetch + activity.pending.timers > 0;
+    };
+
+    activity.isIdle = function(quietTime) {
+        return !activity.isBusy() && (now() - activity.lastActivity) >= (quietTime || 0);
+    };
+
+    // Calls the callback with true once the page has been idle for the quiet time
+    activity.whenIdle = function(quietTime, callback) {
+        var check = function() {
+            if(activity.isIdle(quietTime)) {
+                callback(true);
+                return;
+            }
+            var wait = activity.isBusy() ?
+                WAIT_INTERVAL : quietTime - (now() - activity.lastActivity);
+            originalSetTimeout.call($window, check, Math.max(wait, 1));
+        };
+        check();
+    };
+
+    $window.document.addEventListener("readystatechange", function() {
+        activity.lastActivity = now();
+    });
+
+    // XMLHttpRequests are pending from being sent until they either load, fail or abort
+    var originalSend = $window.XMLHttpRequest.prototype.send;
+    $window.XMLHttpRequest.prototype.send = function() {
+        var ended = false;
+        var onEnd = function() {
+            if(!ended) {
+                ended = true;
+                end("xhr");
+            }
+        };
+        begin("xhr");
+        this.addEventListener("loadend", onEnd);
+        try {
+            return originalSend.apply(this, arguments);
+        } catch(e) {
+            onEnd();
+            throw e;
+        }
+    };
+
+    if($window.fetch !== undefined) {
+        var originalFetch = $window.fetch;
+        $window.fetch = function() {
+            begin("fetch");
+            var request;
+            try {
+                request = originalFetch.apply(this, arguments);
+            } catch(e) {
+                end("fetch");
+                throw e;
+            }
+            // The original promise is returned so that rejections are still handled by the page
+            request.then(function() {
+                end("fetch");
+            }, function() {
+                end("fetch");
+            });
+            return request;
+        };
+    }
+
+    // Short timers are pending until their callback was called or they were cleared
+    var pendingTimers = {};
+    // The number of short timer callbacks that are being called
+    var timerCallbackDepth = 0;
+    $window.setTimeout = function(callback, delay) {
+        if((typeof callback) !== "function" || (delay || 0) > MAX_TRACKED_TIMER_DELAY) {
+            return originalSetTimeout.apply($window, arguments);
+        }
+
+        var isTracked = timerCallbackDepth === 0 || $window.document.readyState !== "complete";
+        var args = Array.prototype.slice.call(arguments, 2);
+        var timerId = originalSetTimeout.call($window, function() {
+            if(isTracked) {
+                delete pendingTimers[timerId];
+            }
+            timerCallbackDepth++;
+            try {
+                callback.apply($window, args);
+            } finally {
+                timerCallbackDepth--;
+                if(isTracked) {
+                    end("timers");
+                }
+            }
+        }, delay);
+        if(isTracked) {
+            pendingTimers[timerId] = true;
+            begin("timers");
+        }
+        return timerId;
+    };
+    $window.clearTimeout = function(timerId) {
+        if(pendingTimers[timerId]) {
+            delete pendingTimers[timerId];
+            end("timers");
+        }
+        return originalClearTimeout.apply($window, arguments);
+    };
+
+})(window);
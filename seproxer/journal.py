@@ -0,0 +1,139 @@
+"""
+This module implements an append-only journal of the URLs that have been completely
+handled, which allows a run to be resumed after it was interrupted.
+"""
+import typing as t
+import os
+import hashlib
+import threading
+import logging
+import datetime
+
+import seproxer.options
+
+
+logger = logging.getLogger(__name__)
+
+# Each journal entry is a single line: "<result uuid><separator><url>\n"
+ENTRY_SEPARATOR = "\t"
+
+
+class Error(Exception):
+    """
+    Generic module level error
+    """
+
+
+class JournalClosedError(Error):
+    """
+    Exception is raised when recording to a journal that has been closed
+    """
+
+
+def _url_key(url: str) -> int:
+    # Only a 64 bit digest of every URL is kept in memory, this keeps memory usage low for
+    # journals with millions of entries while collisions remain negligible.
+    return int.from_bytes(hashlib.sha1(url.encode("utf-8")).digest()[:8], "little")
+
+
+class ResultJournal:
+    """
+    Records the URL and result uuid of every completed result, entries are flushed as
+    soon as they are recorded so that the journal survives a crashed run.
+    """
+    def __init__(self, path: str, resume: bool=False) -> None:
+        """
+        :param path: The path of the journal file
+        :param resume: Load the existing journal entries and append to the journal, otherwise
+                       a new journal is started and an existing journal is kept as a backup,
+                       see `_backup`.
+        """
+        self.path = path
+        self._completed = set()  # type: t.Set[int]
+        self._lock = threading.Lock()
+
+        if resume:
+            self._load()
+        else:
+            self._backup()
+        self._fp = open(path, "a", encoding="utf-8")  # type: t.Optional[t.TextIO]
+
+    def _backup(self):
+        """
+        Moves the journal of a previous run aside so that a run started without resuming it,
+        for example by mistake, doesn't lose its' progress
+        """
+        try:
+            if not os.path.getsize(self.path):
+                return
+        except FileNotFoundError:
+            return
+
+        backup_path = "{}.{}".format(
+            self.path, datetime.datetime.now().strftime("%Y%m%d%H%M%S"))
+        os.replace(self.path, backup_path)
+        logger.warning(
+            "Replacing journal {0} of a previous run, it was moved to {1}.  Move {1} back to "
+            "{0} and use --resume to resume the previous run".format(self.path, backup_path)
+        )
+
+    def _load(self):
+        try:
+            fp = open(self.path, encoding="utf-8")
+        except FileNotFoundError:
+            return
+
+        with fp:
+            for line in fp:
+                # Skip a partially written entry from a crashed run
+                if not line.endswith("\n"):
+                    continue
+                _, separator, url = line[:-1].partition(ENTRY_SEPARATOR)
+                if not separator:
+                    logger.warning("Ignoring malformed journal entry: {!r}".format(line))
+                    continue
+                self._completed.add(_url_key(url))
+
+        logger.info("Loaded {} completed URLs from journal {}".format(
+            len(self._completed), self.path))
+
+    def __contains__(self, url: str) -> bool:
+        return _url_key(url) in self._completed
+
+    def __len__(self) -> int:
+        return len(self._completed)
+
+    def record(self, url: str, result_uuid: str):
+        """
+        Appends a completed URL to the journal
+        """
+        with self._lock:
+            if not self._fp:
+                raise JournalClosedError("Cannot record {} to a closed journal".format(url))
+            self._fp.write("{}{}{}\n".format(result_uuid, ENTRY_SEPARATOR, url))
+            self._fp.flush()
+            self._completed.add(_url_key(url))
+
+    def filter_completed(self, urls: t.Iterable[str]) -> t.Iterator[str]:
+        """
+        Yields the URLs that have not been completed yet
+        """
+        for url in urls:
+            if url in self:
+                logger.debug("Skipping completed URL: {}".format(url))
+                continue
+            yield url
+
+    def close(self):
+        with self._lock:
+            if self._fp:
+                self._fp.close()
+                self._fp = None
+
+    @staticmethod
+    def from_options(options: seproxer.options.Options) -> "ResultJournal":
+        path = os.path.join(
+            os.path.expanduser(options.results_directory),
+            options.journal_file_name,
+        )
+        return ResultJournal(path, resume=options.resume)
@@ -1,6 +1,7 @@
 import typing as t
 import uuid
 import logging
+import threading
 
 import seproxer.selenium_extensions.states.managers
 import seproxer.selenium_extensions.validators.managers
@@ -8,9 +9,11 @@ import seproxer.selenium_extensions.validators.managers
 from seproxer.selenium_extensions import controller
 
 import seproxer.handlers
+import seproxer.journal
 import seproxer.proxy
 
 import seproxer.options
+from seproxer import seproxer_enums
 
 logger = logging.getLogger(__name__)
 
@@ -26,7 +29,7 @@ class SeproxerUrlResult:
         "url", "status_code", "state_results", "validator_results", "proxy_results", "uuid",
     )
 
-    def __init__(self, url, driver_results, proxy_results):
+    def __init__(self, url, driver_results, proxy_results=None):
         self.url = url
         self.state_results = driver_results.state_results
         self.validator_results = driver_results.validator_results
@@ -37,63 +40,253 @@ class SeproxerUrlResult:
         self.uuid = str(uuid.uuid4())
 
 
-class ProxyWaitForPendingRequests(controller.ControllerWait):
+class ProxyNetworkIdleWait(controller.ControllerWait):
     """
-    Class implements a wait that waits for all network requests to be fulfilled.
+    Class implements a wait that waits for the network of a proxy session to be idle, that
+    is, no more than `max_in_flight` requests are pending and there was no network activity
+    for `quiet_window` seconds.  The proxy notifies the wait of all network activity, so
+    the wait completes as soon as the network is idle.
     """
-    # TODO: Implement option for timeout!
-    def __init__(self, proxy: seproxer.proxy.Runner) -> None:
+    def __init__(self,
+                 proxy: seproxer.proxy.Runner,
+                 session: t.Optional[int]=None,
+                 quiet_window: float=seproxer.options.Defaults.NETWORK_IDLE_WINDOW.value,
+                 max_in_flight: int=seproxer.options.Defaults.NETWORK_IDLE_MAX_IN_FLIGHT.value,
+                 timeout: float=seproxer.options.Defaults.NETWORK_IDLE_TIMEOUT.value) -> None:
         self._proxy = proxy
-        super().__init__()
+        self._session = session
+        self._quiet_window = quiet_window
+        self._max_in_flight = max_in_flight
+        super().__init__(timeout=timeout)
 
     def check(self) -> bool:
-        return not self._proxy.has_pending_requests()
+        return self._proxy.wait_for_network_idle(
+            self._session,
+            quiet_window=self._quiet_window,
+            max_in_flight=self._max_in_flight,
+            timeout=0,
+        )
 
+    def wait_until(self, timeout: t.Optional[float]=None):
+        if timeout is None:
+            timeout = self._timeout
 
-class Seproxer:
+        is_idle = self._proxy.wait_for_network_idle(
+            self._session,
+            quiet_window=self._quiet_window,
+            max_in_flight=self._max_in_flight,
+            timeout=timeout,
+        )
+        if not is_idle:
+            raise controller.ControllerWaitTimeout(
+                "Timed out waiting for the network of proxy session {} to be idle".format(
+                    self._session)
+            )
+
+    @staticmethod
+    def from_options(options: seproxer.options.Options,
+                     proxy: seproxer.proxy.Runner,
+                     session: t.Optional[int]=None) -> "ProxyNetworkIdleWait":
+        return ProxyNetworkIdleWait(
+            proxy,
+            session=session,
+            quiet_window=options.network_idle_window,
+            max_in_flight=options.network_idle_max_in_flight,
+            timeout=options.network_idle_timeout,
+        )
+
+
+class SeproxerWorker:
+    """
+    A browser and proxy pair that produces a result for each URL it is given
+    """
     def __init__(self,
                  driver_controller: controller.DriverController,
                  proxy: seproxer.proxy.Runner,
-                 result_handler: seproxer.handlers.ResultHandlerManager) -> None:
+                 session: t.Optional[int]=None,
+                 network_idle_wait: t.Optional[ProxyNetworkIdleWait]=None) -> None:
+        """
+        :param driver_controller: The controller of the browser used by this worker
+        :param proxy: The proxy that the browser is configured to use
+        :param session: The proxy session of the browser, defaults to the proxy's default session
+        :param network_idle_wait: Waits for the network to be idle after a URL is loaded,
+                                  defaults to a wait with the default options
+        """
         self._driver_controller = driver_controller
         self._proxy = proxy
+        self._session = session
+
+        if network_idle_wait is None:
+            network_idle_wait = ProxyNetworkIdleWait(proxy, session)
+        self._network_idle_wait = network_idle_wait
+
+    @property
+    def proxy(self) -> seproxer.proxy.Runner:
+        return self._proxy
+
+    def get_result(self,
+                   url: str,
+                   requires_proxy_results: t.Callable[[seproxer_enums.ResultLevel], bool]
+                   ) -> SeproxerUrlResult:
+        """
+        :param url: The URL to test
+        :param requires_proxy_results: Called with the status of the URL to determine if the
+                                       proxy results are required, otherwise they are dropped
+                                       by the proxy without being serialized.
+        """
+        # TODO: Handle both of these failing
+        driver_results = self._driver_controller.get_results(
+            url=url,
+            controller_wait=self._network_idle_wait,
+        )
+        proxy_results = None
+        if requires_proxy_results(driver_results.validator_results.overall_status()):
+            proxy_results = self._proxy.get_results(self._session)
+        else:
+            self._proxy.drop_results(self._session)
+
+        return SeproxerUrlResult(
+            url=url,
+            driver_results=driver_results,
+            proxy_results=proxy_results,
+        )
+
+    def done(self):
+        self._driver_controller.done()
+
+    @staticmethod
+    def from_options(options: seproxer.options.Options,
+                     proxy_port: t.Optional[int]=None,
+                     proxy: t.Optional[seproxer.proxy.Runner]=None) -> "SeproxerWorker":
+        """
+        :param options: The seproxer options used to configure the worker
+        :param proxy_port: The proxy port that the worker's browser will use
+        :param proxy: A proxy shared between workers, the session of this worker will be its'
+                      proxy port.  When not specified, a proxy is created for this worker.
+        """
+        if proxy is None:
+            listen_ports = [proxy_port] if proxy_port is not None else None
+            proxy = seproxer.proxy.Runner.from_options(options, listen_ports=listen_ports)
+        driver_controller = controller.DriverController.from_options(
+            options, proxy_port=proxy_port)
+
+        return SeproxerWorker(
+            driver_controller=driver_controller,
+            proxy=proxy,
+            session=proxy_port,
+            network_idle_wait=ProxyNetworkIdleWait.from_options(options, proxy, proxy_port),
+        )
+
+
+class Seproxer:
+    def __init__(self,
+                 workers: t.Sequence[SeproxerWorker],
+                 result_handler: seproxer.handlers.ResultHandlerManager,
+                 resume_journal: t.Optional[seproxer.journal.ResultJournal]=None) -> None:
+        """
+        :param workers: The workers that will test the URLs
+        :param result_handler: Handles the results of every tested URL
+        :param resume_journal: URLs completed in this journal will not be tested
+        """
+        if not workers:
+            raise Error("At least one worker is required")
+
+        self._workers = workers
         self._result_handler = result_handler
+        self._resume_journal = resume_journal
 
-        # TODO: Make this an option
-        self._proxy_pending_requests_wait = ProxyWaitForPendingRequests(proxy)
-        self._proxy.run()
+        # Used to stop workers from retrieving more URLs once we are done
+        self._done_event = threading.Event()
+        self._urls_lock = threading.Lock()
 
-    def test_urls(self, urls: t.Iterable[str]):
-        self._proxy.clear_flows()
-        for url in urls:
-            # TODO: Handle both of these failing
-            driver_results = self._driver_controller.get_results(
-                url=url,
-                controller_wait=self._proxy_pending_requests_wait,
-            )
-            proxy_results = self._proxy.get_results()
+        for proxy in self._proxies():
+            proxy.run()
 
-            result = SeproxerUrlResult(
-                url=url,
-                driver_results=driver_results,
-                proxy_results=proxy_results,
-            )
+    def _proxies(self) -> t.List[seproxer.proxy.Runner]:
+        # Workers may share a proxy, ensure that we only ever reference each proxy once
+        proxies = []  # type: t.List[seproxer.proxy.Runner]
+        for worker in self._workers:
+            if worker.proxy not in proxies:
+                proxies.append(worker.proxy)
+        return proxies
+
+    def _next_url(self, urls: t.Iterator[str]) -> t.Optional[str]:
+        with self._urls_lock:
+            if self._done_event.is_set():
+                return None
+            return next(urls, None)
+
+    def _test_urls_with_worker(self, worker: SeproxerWorker, urls: t.Iterator[str]):
+        while True:
+            url = self._next_url(urls)
+            if url is None:
+                return
+            result = worker.get_result(url, self._result_handler.requires_proxy_results)
             self._result_handler.handle(result)
 
+    def test_urls(self, urls: t.Iterable[str]):
+        for proxy in self._proxies():
+            proxy.clear_flows()
+
+        if self._resume_journal is not None:
+            urls = self._resume_journal.filter_completed(urls)
+
+        url_iterator = iter(urls)
+        if len(self._workers) == 1:
+            self._test_urls_with_worker(self._workers[0], url_iterator)
+            return
+
+        errors = []  # type: t.List[Exception]
+
+        def worker_target(worker: SeproxerWorker):
+            try:
+                self._test_urls_with_worker(worker, url_iterator)
+            except Exception as e:
+                logger.exception("Worker failed testing URLs, stopping all workers")
+                errors.append(e)
+                self._done_event.set()
+
+        threads = [
+            threading.Thread(target=worker_target, args=(worker,), daemon=True)
+            for worker in self._workers
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if errors:
+            raise errors[0]
+
     def done(self):
-        if self._proxy.is_running:
-            self._proxy.done()
+        self._done_event.set()
+        for proxy in self._proxies():
+            if proxy.is_running:
+                proxy.done()
         self._result_handler.done()
-        self._driver_controller.done()
+        for worker in self._workers:
+            worker.done()
 
     @staticmethod
     def from_options(options: seproxer.options.Options) -> "Seproxer":
-        proxy = seproxer.proxy.Runner.from_options(options)
-        driver_controller = controller.DriverController.from_options(options)
-        result_handler = seproxer.handlers.ResultHandlerManager.from_options(options)
+        # Result handlers are created first, pooled handlers start their worker processes
+        # before any proxy or browser is started
+        journal = seproxer.journal.ResultJournal.from_options(options)
+        result_handler = seproxer.handlers.ResultHandlerManager.from_options(
+            options, journal=journal)
+
+        proxy_ports = options.worker_proxy_ports()
+        shared_proxy = None
+        if options.shared_proxy:
+            shared_proxy = seproxer.proxy.Runner.from_options(options, listen_ports=proxy_ports)
+
+        workers = [
+            SeproxerWorker.from_options(options, proxy_port=port, proxy=shared_proxy)
+            for port in proxy_ports
+        ]
 
         return Seproxer(
-            driver_controller=driver_controller,
-            proxy=proxy,
+            workers=workers,
             result_handler=result_handler,
+            resume_journal=journal if options.resume else None,
         )
@@ -1,87 +1,514 @@
 """
 This module contains custom mitmproxy addons.
 """
-import io
-import bs4
+import collections
+import email.utils
+import logging
+import os
+import re
+import threading
+import time
+import typing as t  # NOQA
 
 from seproxer import resources
+from seproxer import flow_dumps
+from seproxer import html_injection
 import seproxer.resources.injectable_js  # NOQA
 
 import mitmproxy.io
 import mitmproxy.exceptions
+import mitmproxy.flow
 from mitmproxy import flowfilter
 
 import mitmproxy.http
+import mitmproxy.tcp
+
+
+logger = logging.getLogger(__name__)
+
+
+# The flow metadata key that stores the session that a flow is attributed to
+SESSION_METADATA_KEY = "seproxer_session"
+
+
+def get_flow_session(flow):
+    return flow.metadata.get(SESSION_METADATA_KEY)
+
+
+# The flow metadata key that is set on flows whose response was served from the asset cache
+CACHE_HIT_METADATA_KEY = "seproxer_cache_hit"
+
+# The flow metadata key that is set on flows whose response was replayed from stored flows
+REPLAY_METADATA_KEY = "seproxer_replayed"
+
+# The header that is added to replayed responses for requests that were never recorded
+REPLAY_MISS_HEADER = "X-Seproxer-Replay-Miss"
+
+# The header that is added to recorded messages whose content was truncated, its' value is
+# the length of the original content
+TRUNCATED_HEADER = "X-Seproxer-Truncated"
+
+# Approximate number of bytes a flow occupies in memory excluding its' contents
+FLOW_SIZE_OVERHEAD = 1024
+
+
+def estimate_flow_size(flow) -> int:
+    """
+    Returns an approximation of the number of bytes the flow occupies when serialized
+    """
+    size = FLOW_SIZE_OVERHEAD
+    if isinstance(flow, mitmproxy.http.HTTPFlow):
+        for message in (flow.request, flow.response):
+            if message is not None and message.raw_content:
+                size += len(message.raw_content)
+    elif isinstance(flow, mitmproxy.tcp.TCPFlow):
+        size += sum(len(m.content) for m in flow.messages)
+    return size
+
+
+class HeaderStripRule:
+    """
+    The headers stripped from the requests of flows that match a filter pattern.  Filters
+    that require a domain, that is, `~d` filters and conjunctions containing one, are split
+    into the domain regex and the rest of the filter so that the domain can be matched
+    separately, see `HeaderStripMatcher`.
+    """
+    __slots__ = ("pattern", "headers", "domain_re", "_filters")
+
+    def __init__(self, pattern: str, flow_filter) -> None:
+        self.pattern = pattern
+        self.headers = []  # type: t.List[str]
+        self.domain_re = None  # type: t.Optional[t.Pattern]
+
+        filters = [flow_filter]
+        if isinstance(flow_filter, flowfilter.FAnd):
+            filters = list(flow_filter.lst)
+        for i, f in enumerate(filters):
+            if isinstance(f, flowfilter.FDomain):
+                self.domain_re = f.re
+                del filters[i]
+                break
+        self._filters = filters  # type: t.List[t.Callable[[mitmproxy.flow.Flow], bool]]
+
+    def matches_rest(self, flow) -> bool:
+        """
+        Returns whether the flow matches the filter apart from its' domain
+        """
+        return all(f(flow) for f in self._filters)
+
+
+class HeaderStripMatcher:
+    """
+    Matches flows against the `strip_headers` rules with as few filter calls as possible:
+
+    * Rules with identical patterns are grouped and their filter is parsed once
+    * The domain regexes of all domain rules are combined into a single regex, flows whose
+      host doesn't match it skip all domain rules at once
+    * The domain rules matching a host are cached, hosts repeat for most flows of a page
+
+    Domain regexes are matched against the hosts the `~d` filter matches.  mitmproxy 2
+    compiles them as bytes and matches the request's host, later versions compile them as
+    str and match either the request's host or its' pretty host.
+    """
+    # The number of hosts whose matching domain rules are cached
+    HOST_CACHE_SIZE = 1024
+
+    def __init__(self, strip_headers: t.Iterable[t.Tuple[str, str]]) -> None:
+        rules = collections.OrderedDict()  # type: t.MutableMapping[str, HeaderStripRule]
+        for flow_pattern, header in strip_headers:
+            if flow_pattern not in rules:
+                flow_filter = flowfilter.parse(flow_pattern)
+                if not flow_filter:
+                    raise mitmproxy.exceptions.OptionsError(
+                        "Invalid strip_headers filter pattern {}".format(flow_pattern))
+                rules[flow_pattern] = HeaderStripRule(flow_pattern, flow_filter)
+            rules[flow_pattern].headers.append(header)
+
+        self.rules = list(rules.values())
+        self._domain_rules = [r for r in self.rules if r.domain_re is not None]
+        self._other_rules = [r for r in self.rules if r.domain_re is None]
+        self._domains_re = self._combine_domains(self._domain_rules)
+        self._is_binary = bool(self._domain_rules) and isinstance(
+            self._domain_rules[0].domain_re.pattern, bytes)
+        self._host_rules = {}  # type: t.Dict[tuple, t.List[HeaderStripRule]]
+
+    @staticmethod
+    def _combine_domains(rules: t.Sequence[HeaderStripRule]) -> t.Optional[t.Pattern]:
+        """
+        Returns a regex matching any of the rules' domains, `None` if they can't be combined.
+        Regexes with groups could contain backreferences that change meaning once combined.
+        """
+        if not rules or any(r.domain_re.groups or r.domain_re.flags & re.VERBOSE for r in rules):
+            return None
+        pattern = "|".join("(?:{})".format(
+            r.domain_re.pattern.decode("latin-1") if isinstance(r.domain_re.pattern, bytes)
+            else r.domain_re.pattern
+        ) for r in rules)
+        if isinstance(rules[0].domain_re.pattern, bytes):
+            pattern = pattern.encode("latin-1")
+        try:
+            return re.compile(pattern, re.IGNORECASE)
+        except (re.error, UnicodeEncodeError):
+            return None
+
+    def _get_hosts(self, flow) -> tuple:
+        """
+        Returns the hosts of the flow that the `~d` filter matches
+        """
+        if self._is_binary:
+            return flow.request.data.host,
+        host, pretty_host = flow.request.host, flow.request.pretty_host
+        return (host,) if host == pretty_host else (host, pretty_host)
+
+    def _get_host_rules(self, hosts: tuple) -> t.List[HeaderStripRule]:
+        host_rules = self._host_rules.get(hosts)
+        if host_rules is None:
+            if self._domains_re is not None and not any(
+                    self._domains_re.search(host) for host in hosts):
+                host_rules = []
+            else:
+                host_rules = [
+                    r for r in self._domain_rules
+                    if any(r.domain_re.search(host) for host in hosts)
+                ]
+
+            if len(self._host_rules) >= self.HOST_CACHE_SIZE:
+                self._host_rules.clear()
+            self._host_rules[hosts] = host_rules
+        return host_rules
+
+    def get_headers(self, flow) -> t.List[str]:
+        """
+        Returns the headers that should be stripped from the flow's request
+        """
+        if not self.rules or not isinstance(flow, mitmproxy.http.HTTPFlow):
+            return []
+
+        headers = []
+        if self._domain_rules:
+            for rule in self._get_host_rules(self._get_hosts(flow)):
+                if rule.matches_rest(flow):
+                    headers.extend(rule.headers)
+        for rule in self._other_rules:
+            if rule.matches_rest(flow):
+                headers.extend(rule.headers)
+        return headers
+
+
+class SessionFlows:
+    """
+    The flows of a single session.  Completed flows are kept unserialized until they are
+    requested so that no work is wasted on flows that will be dropped.  When the completed
+    flows exceed the memory limit they are serialized into a `flow_dumps.SpooledFlowBuffer`,
+    which spills them to disk.
+
+    Only completed flows are recorded, active flows are still changed by the proxy's
+    connection threads.  Completed flows are processed as they complete, on the mitmproxy
+    master's thread, after which they are no longer changed and may be serialized by
+    another thread.
+    """
+    def __init__(self,
+                 spool_directory: str,
+                 memory_limit: int,
+                 process_flow: t.Callable[[mitmproxy.flow.Flow], None],
+                 capture_flow: t.Callable[[mitmproxy.flow.Flow], t.Optional[mitmproxy.flow.Flow]],
+                 carried_flows: t.Optional[t.Set[mitmproxy.flow.Flow]]=None,
+                 ) -> None:
+        """
+        :param spool_directory: The directory that flows are spilled and spooled to
+        :param memory_limit: The number of bytes of flows kept in memory
+        :param process_flow: Called with every recorded flow as soon as it completes
+        :param capture_flow: Called with every flow to record, returns the flow that will be
+                             recorded or `None` if the flow should not be recorded at all
+        :param carried_flows: The flows that were active when the session's previous flows
+                              were retrieved or dropped, they are in flight until they
+                              complete but are not recorded
+        """
+        self.memory_limit = memory_limit
+        self.active_flows = set()  # type: t.Set[mitmproxy.flow.Flow]
+        self.carried_flows = carried_flows or set()  # type: t.Set[mitmproxy.flow.Flow]
+
+        self._process_flow = process_flow
+        self._capture_flow = capture_flow
+        self._flows = []  # type: t.List[mitmproxy.flow.Flow]
+        self._flows_size = 0
+        self._buffer = flow_dumps.SpooledFlowBuffer(spool_directory, memory_limit)
+        self._writer = mitmproxy.io.FlowWriter(self._buffer)
+
+    @property
+    def buffer(self) -> flow_dumps.SpooledFlowBuffer:
+        return self._buffer
+
+    @property
+    def in_flight_flows(self) -> t.Set[mitmproxy.flow.Flow]:
+        return self.active_flows | self.carried_flows
+
+    def _serialize(self, flows: t.Iterable[mitmproxy.flow.Flow]):
+        for flow in flows:
+            self._writer.add(flow)
+
+    def complete(self, flow: mitmproxy.flow.Flow):
+        """
+        Records an active flow that has completed.  Flows that were started before the
+        session's flows were last retrieved or dropped are no longer in flight, they are not
+        recorded.
+        """
+        if flow in self.carried_flows:
+            self.carried_flows.discard(flow)
+            return
+        if flow not in self.active_flows:
+            return
+        self.active_flows.discard(flow)
+
+        flow = self._capture_flow(flow)
+        if flow is None:
+            return
+
+        self._process_flow(flow)
+        self._flows.append(flow)
+        self._flows_size += estimate_flow_size(flow)
+
+        if self._flows_size > self.memory_limit:
+            self._serialize(self._flows)
+            self._flows = []
+            self._flows_size = 0
+
+    def serialize(self) -> flow_dumps.SpooledFlowBuffer:
+        """
+        Serializes all completed flows and returns the buffer they were written to
+        """
+        self._serialize(self._flows)
+        self._flows = []
+        self._flows_size = 0
+        return self._buffer
+
+    def discard(self):
+        self._flows = []
+        self._flows_size = 0
+        self._buffer.discard()
 
 
 class MemoryStream:
     """
     A similar concept to `mitmproxy.addons.streamfile` but instead of writing to a file
-    it writes to an in memory ByteIO object essentially storing flows in memory.
+    it stores flows in memory, see `SessionFlows`.  Flows are only serialized when they
+    are requested or once they exceed the `stream_memory_limit` option, in which case they
+    are spilled to a file in the `flow_spool_directory` option.
+
+    Flows are stored separately for every session they are attributed to, see
+    `SESSION_METADATA_KEY`.  Flows that are not attributed to a session are stored
+    in the `None` session.
+
+    The stored flows may be retrieved from another thread than the mitmproxy master
+    as long as the `lock` is held, flows that are active when they are retrieved are not
+    recorded.
     """
     def __init__(self):
-        self.stream = None
-        self.active_flows = None
-        self.strip_headers_list = []
+        self.sessions = {}  # type: t.Dict[t.Any, SessionFlows]
+        self.strip_headers_matcher = HeaderStripMatcher([])
+        self.lock = threading.RLock()
+
+        self.spool_directory = None  # type: t.Optional[str]
+        self.memory_limit = flow_dumps.DEFAULT_MEMORY_LIMIT
+
+        self.capture_filter = None
+        self.capture_body_limit = None  # type: t.Optional[int]
+        self.capture_headers_only_types = ()  # type: t.Tuple[bytes, ...]
+
+        # Called with the session and its' number of in flight flows on every request and
+        # response of the session's flows
+        self.activity_callback = None  # type: t.Optional[t.Callable[[t.Any, int], None]]
 
     @classmethod
     def get_class_name(cls):
         return cls.__name__.lower()
 
     def configure(self, options, updated):
+        if "flow_spool_directory" in updated or "stream_memory_limit" in updated:
+            with self.lock:
+                self.spool_directory = options.flow_spool_directory
+                self.memory_limit = options.stream_memory_limit
+                # Sessions are started before the addon is configured, start them again
+                for session in list(self.sessions):
+                    self.start(session)
+
         if "strip_headers" in updated:
-            self.strip_headers_list = []
-            for flow_pattern, header in options.strip_headers:
-                flow_filter = flowfilter.parse(flow_pattern)
-                if not flow_filter:
+            self.strip_headers_matcher = HeaderStripMatcher(options.strip_headers)
+
+        if "capture_filter" in updated:
+            self.capture_filter = None
+            if options.capture_filter:
+                self.capture_filter = flowfilter.parse(options.capture_filter)
+                if not self.capture_filter:
                     raise mitmproxy.exceptions.OptionsError(
-                        "Invalid strip_headers filter pattern {}".format(flow_pattern))
+                        "Invalid capture_filter pattern {}".format(options.capture_filter))
+
+        if "capture_body_limit" in updated:
+            self.capture_body_limit = options.capture_body_limit
+
+        if "capture_headers_only_types" in updated:
+            self.capture_headers_only_types = tuple(
+                content_type.lower().encode() for content_type in options.capture_headers_only_types
+            )
+
+    @staticmethod
+    def _truncate_content(message, limit: int):
+        original_length = len(message.raw_content)
+        if limit:
+            # Truncate the decoded content, truncated encoded content could not be decoded
+            message.decode(strict=False)
+            original_length = len(message.raw_content)
+            message.raw_content = message.raw_content[:limit]
+        else:
+            message.raw_content = b""
+        message.headers[TRUNCATED_HEADER] = str(original_length)
 
-                self.strip_headers_list.append((flow_filter, header))
+    def _is_headers_only(self, flow: mitmproxy.http.HTTPFlow) -> bool:
+        if not self.capture_headers_only_types or not flow.response:
+            return False
+        content_type = flow.response.headers.get("content-type", "").lower().encode()
+        return content_type.startswith(self.capture_headers_only_types)
+
+    def capture_flow(self, flow):
+        """
+        Returns the flow that will be recorded for the specified flow or `None` if the flow
+        is not captured.  Flows with content that needs to be truncated are copied, the
+        flow that is sent to the client is never modified.
+        """
+        if self.capture_filter and not self.capture_filter(flow):
+            return None
+        if not isinstance(flow, mitmproxy.http.HTTPFlow):
+            return flow
+
+        limit = self.capture_body_limit
+        truncate_request = bool(limit and len(flow.request.raw_content or b"") > limit)
+        headers_only = self._is_headers_only(flow)
+        truncate_response = headers_only or bool(
+            limit and flow.response and len(flow.response.raw_content or b"") > limit
+        )
+        if not truncate_request and not truncate_response:
+            return flow
+
+        recorded_flow = flow.copy()
+        if truncate_request:
+            self._truncate_content(recorded_flow.request, limit)
+        if truncate_response:
+            self._truncate_content(recorded_flow.response, 0 if headers_only else limit)
+        return recorded_flow
 
     def process_flow(self, flow):
-        # If we have a strip headers list, let's remove all headers that match!
-        for flow_filter, header in self.strip_headers_list:
-            if flow_filter(flow):
-                flow.request.headers.pop(header, None)
+        # If we have strip headers rules, let's remove all headers that match!
+        for header in self.strip_headers_matcher.get_headers(flow):
+            flow.request.headers.pop(header, None)
+
+    def _get_session_flows(self, flow) -> SessionFlows:
+        session = get_flow_session(flow)
+        if session not in self.sessions:
+            self.start(session)
+        return self.sessions[session]
+
+    def _notify_activity(self, flow):
+        if self.activity_callback is not None:
+            session = get_flow_session(flow)
+            self.activity_callback(session, self.count_active_flows(session))
 
     def tcp_start(self, flow):
-        if self.stream:
-            self.active_flows.add(flow)
+        with self.lock:
+            self._get_session_flows(flow).active_flows.add(flow)
+        self._notify_activity(flow)
 
     def tcp_end(self, flow):
-        if self.stream:
-            self.stream.add(flow)
-            self.active_flows.discard(flow)
+        with self.lock:
+            self._get_session_flows(flow).complete(flow)
+        self._notify_activity(flow)
 
     def response(self, flow):
-        if self.stream:
-            self.process_flow(flow)
-            self.stream.add(flow)
-            self.active_flows.discard(flow)
+        with self.lock:
+            self._get_session_flows(flow).complete(flow)
+        self._notify_activity(flow)
+
+    def error(self, flow):
+        # Flows that error never receive a response, they would otherwise remain active
+        with self.lock:
+            self._get_session_flows(flow).complete(flow)
+        self._notify_activity(flow)
 
     def request(self, flow):
-        if self.stream:
-            self.active_flows.add(flow)
+        with self.lock:
+            self._get_session_flows(flow).active_flows.add(flow)
+        self._notify_activity(flow)
+
+    def _new_session(self, session):
+        # The flows in flight remain in flight for the new session's flows until they complete
+        carried_flows = None
+        if session in self.sessions:
+            carried_flows = self.sessions[session].in_flight_flows
+        self.sessions[session] = SessionFlows(
+            self.spool_directory, self.memory_limit, self.process_flow, self.capture_flow,
+            carried_flows=carried_flows,
+        )
+
+    def start(self, session=None):
+        """
+        Starts storing flows for the specified session anew, discarding any stored flows.  This
+        is also the mitmproxy start event, which is invoked without a session.
+        """
+        with self.lock:
+            if session in self.sessions:
+                self.sessions[session].discard()
+            self._new_session(session)
 
-    def start(self):
-        self.stream = mitmproxy.io.FlowWriter(io.BytesIO())
-        self.active_flows = set()
+    def done(self):
+        with self.lock:
+            for session_flows in self.sessions.values():
+                session_flows.discard()
+            self.sessions = {}
 
-    def has_active_flows(self) -> bool:
+    def has_active_flows(self, session=None) -> bool:
         """
         Indicates whether or not we have any active flows, that is, any
         requests with pending responses.
         """
-        return bool(self.active_flows)
+        return bool(self.count_active_flows(session))
 
-    def get_stream(self):
-        # Add any remaining flows in the active flows
-        for flow in self.active_flows:
-            self.process_flow(flow)
-            self.stream.add(flow)
+    def count_active_flows(self, session=None) -> int:
+        """
+        Returns the number of the session's flows in flight, including the flows that were
+        active when the session's flows were last retrieved or dropped
+        """
+        with self.lock:
+            session_flows = self.sessions.get(session)
+            return len(session_flows.in_flight_flows) if session_flows else 0
 
-        return self.stream.fo
+    def get_stream(self, session=None) -> flow_dumps.SpooledFlowBuffer:
+        """
+        Serializes the completed flows of the session and returns the buffer they were
+        written to.  The buffer is backed by a file once it exceeded the memory limit.
+        """
+        with self.lock:
+            if session not in self.sessions:
+                self.start(session)
+            return self.sessions[session].serialize()
+
+    def pop_stream(self, session=None) -> flow_dumps.SpooledFlowBuffer:
+        """
+        Returns the buffer of the session's flows, as `get_stream` does, and starts storing
+        the session's flows anew.  The caller is responsible for the returned buffer.
+        """
+        with self.lock:
+            if session not in self.sessions:
+                self.start(session)
+            session_flows = self.sessions[session]
+            self._new_session(session)
+        # The master thread no longer records flows to the popped session's flows, they are
+        # serialized without holding up the master thread
+        return session_flows.serialize()
+
+    def drop_stream(self, session=None):
+        """
+        Discards the flows of the session without serializing them
+        """
+        self.start(session)
 
 
 class JSConsoleErrorInjection:
@@ -93,31 +520,347 @@ class JSConsoleErrorInjection:
     such as Firefox.  Can't blame though, w3c webdriver spec does not specify that it
     is required :-(
     """
+    # The option that enables the injection and the option of the filter of injected flows
+    ENABLED_OPTION = "inject_js_error_detection"
+    FILTER_OPTION = "inject_js_error_detection_filter"
+
     def __init__(self):
         self._filter = None
+        self._javascript = self.get_javascript_resource().javascript
+        self._script_tag = html_injection.script_tag(self._javascript)
+
+    @staticmethod
+    def get_javascript_resource() -> resources.JavascriptResource:
+        return resources.injectable_js.console_error_detection
 
     def configure(self, options, updated):
-        if "inject_js_error_detection" in updated and options.inject_js_error_detection:
-            pattern = options.inject_js_error_detection_filter
+        if self.ENABLED_OPTION in updated and getattr(options, self.ENABLED_OPTION):
+            pattern = getattr(options, self.FILTER_OPTION)
             self._filter = flowfilter.parse(pattern)
             if not self._filter:
                 raise mitmproxy.exceptions.OptionsError(
-                    "Invalid inject_js_error_detection_filter pattern {}".format(pattern)
+                    "Invalid {} pattern {}".format(self.FILTER_OPTION, pattern)
                 )
 
     def response(self, flow: mitmproxy.http.HTTPFlow):
         if flow.response.status_code != 200 or not self._filter or not self._filter(flow):
             return
 
-        bs_html = bs4.BeautifulSoup(flow.response.content, "html.parser")
-        if not bs_html.head:
+        content = flow.response.content
+        if flow.metadata.get(REPLAY_METADATA_KEY) and self._javascript.encode() in content:
+            # The response was recorded after the script was injected into it
             return
 
-        injected_script = bs_html.new_tag(
-            name="script",
-            type="application/javascript",
+        injected_content = html_injection.inject_script(
+            content, self._javascript, encoded_script_tag=self._script_tag,
         )
-        injected_script.string = resources.injectable_js.console_error_detection.javascript
-        bs_html.head.insert(0, injected_script)
+        if injected_content is not None:
+            flow.response.content = injected_content
+
+
+class JSActivityTrackerInjection(JSConsoleErrorInjection):
+    """
+    Injects javascript into HTML pages that tracks pending XMLHttpRequests, fetch requests
+    and timers within the "window.__seproxer_activity" object, which allows the browser to
+    wait until any page, regardless of its' framework, is idle.
+    """
+    ENABLED_OPTION = "inject_js_activity_tracker"
+    FILTER_OPTION = "inject_js_activity_tracker_filter"
+
+    @staticmethod
+    def get_javascript_resource() -> resources.JavascriptResource:
+        return resources.injectable_js.activity_tracker
+
+
+class ServerReplay:
+    """
+    Answers requests with the responses recorded in the flow files of the `replay_flows`
+    option instead of sending them to the server, this makes testing a URL deterministic
+    and independent of the network.
+
+    The recorded responses are indexed by request method and URL once, when the option is
+    configured.  Requests that were recorded several times are answered with their responses
+    in the recorded order, the last response is then repeated.  The order is tracked for
+    every session and starts over once the session's flows are retrieved, see
+    `reset_session`, so that every URL is answered the same way regardless of other sessions.
+
+    Requests that were never recorded, or whose recorded content was truncated, are answered
+    with a 404 response marked with the `REPLAY_MISS_HEADER` header.
+    """
+    FLOW_FILE_EXTENSION = ".flow"
+
+    def __init__(self):
+        self.enabled = False
+        self._responses = {}  # type: t.Dict[t.Tuple[str, str], t.List[mitmproxy.http.HTTPResponse]]
+        # The positions of the next responses of every request key, by session
+        self._positions = collections.defaultdict(
+            collections.Counter)  # type: t.DefaultDict[t.Any, t.Counter[t.Tuple[str, str]]]
+
+    @classmethod
+    def get_flow_files(cls, paths: t.Iterable[str]) -> t.List[str]:
+        """
+        Returns the flow files of the paths, directories are expanded to the flow files
+        that they contain
+        """
+        flow_files = []
+        for path in paths:
+            if os.path.isdir(path):
+                flow_files.extend(sorted(
+                    os.path.join(path, name) for name in os.listdir(path)
+                    if name.endswith(cls.FLOW_FILE_EXTENSION)
+                ))
+            else:
+                flow_files.append(path)
+        return flow_files
+
+    @staticmethod
+    def _get_key(request) -> t.Tuple[str, str]:
+        return request.method, request.url
+
+    @staticmethod
+    def _is_replayable(flow) -> bool:
+        # Flows recorded with a body limit or as headers only lack their original content
+        return (
+            isinstance(flow, mitmproxy.http.HTTPFlow) and
+            flow.response is not None and
+            TRUNCATED_HEADER not in flow.response.headers and
+            TRUNCATED_HEADER not in flow.request.headers
+        )
+
+    def load(self, flow_files: t.Iterable[str]):
+        responses = collections.defaultdict(list)  # type: t.DefaultDict[t.Tuple[str, str], list]
+        truncated_count = 0
+        for flow_file in flow_files:
+            try:
+                with open(flow_file, "rb") as fp:
+                    for flow in mitmproxy.io.FlowReader(fp).stream():
+                        if self._is_replayable(flow):
+                            responses[self._get_key(flow.request)].append(flow.response)
+                        elif isinstance(flow, mitmproxy.http.HTTPFlow) and flow.response:
+                            truncated_count += 1
+            except (OSError, mitmproxy.exceptions.FlowReadException) as e:
+                raise mitmproxy.exceptions.OptionsError(
+                    "Unable to load replay flows from {}: {}".format(flow_file, e))
+
+        if truncated_count:
+            logger.warning(
+                "Skipped {} replay flows with truncated content, they are replayed as "
+                "misses".format(truncated_count))
+        self._responses = dict(responses)
+        self._positions.clear()
+
+    def reset_session(self, session):
+        """
+        Starts answering the requests of the session with their first recorded responses
+        """
+        self._positions.pop(session, None)
+
+    def configure(self, options, updated):
+        if "replay_flows" in updated:
+            self.enabled = bool(options.replay_flows)
+            self.load(self.get_flow_files(options.replay_flows))
+
+    def request(self, flow: mitmproxy.http.HTTPFlow):
+        if not self.enabled or flow.response:
+            return
+
+        key = self._get_key(flow.request)
+        responses = self._responses.get(key)
+        if responses:
+            positions = self._positions[get_flow_session(flow)]
+            position = min(positions[key], len(responses) - 1)
+            positions[key] = position + 1
+            response = responses[position].copy()
+        else:
+            response = mitmproxy.http.HTTPResponse.make(
+                404, b"", {REPLAY_MISS_HEADER: "1", "Content-Type": "text/plain"},
+            )
+
+        # Setting the response prevents mitmproxy from sending the request to the server
+        response.timestamp_start = response.timestamp_end = time.time()
+        flow.response = response
+        flow.metadata[REPLAY_METADATA_KEY] = True
+
+
+class StaticAssetCache:
+    """
+    Serves repeated cacheable GET requests from a local cache instead of requesting them
+    from the server again, entries are evicted in least recently used order once the cache
+    exceeds the `asset_cache_size` option (in bytes).
+
+    Responses are cached by URL and by the request headers that can change the response,
+    which are the `KEY_HEADERS` and the headers in the response's Vary header.  Only responses
+    that match the `asset_cache_filter` option are cached.
+
+    Responses that must be revalidated, that are already stale or that answer requests with
+    an Authorization header are not cached.  Responses are only served while they are fresh
+    according to their max-age or Expires header, responses without either are served for
+    as long as they are cached.
+
+    Cache hits are regular flows with a response, so they are still recorded, they can be
+    identified by the `CACHE_HIT_METADATA_KEY` flow metadata.
+    """
+    # Request headers that are always part of the cache key
+    KEY_HEADERS = ("accept-encoding",)
+    UNCACHEABLE_DIRECTIVES = ("no-store", "private", "no-cache", "must-revalidate")
+
+    def __init__(self):
+        self.max_size = 0
+        self.size = 0
+        self._filter = None
+
+        # Cached responses, their sizes and the time they expire at, or None if they don't,
+        # by (URL, key header values)
+        self._entries = collections.OrderedDict()  # type: t.MutableMapping[tuple, tuple]
+        # The key headers and number of cached responses, by URL
+        self._url_key_headers = {}  # type: t.Dict[str, t.Tuple[str, ...]]
+        self._url_entry_counts = collections.Counter()  # type: t.Counter[str]
+
+    def configure(self, options, updated):
+        if "asset_cache_filter" in updated:
+            self._filter = flowfilter.parse(options.asset_cache_filter)
+            if not self._filter:
+                raise mitmproxy.exceptions.OptionsError(
+                    "Invalid asset_cache_filter pattern {}".format(options.asset_cache_filter)
+                )
+
+        if "asset_cache_size" in updated:
+            self.max_size = options.asset_cache_size or 0
+            self._evict()
+
+    @staticmethod
+    def _get_key(request, key_headers: t.Tuple[str, ...]) -> tuple:
+        return request.url, tuple(request.headers.get(h, "") for h in key_headers)
+
+    def _remove(self, key: tuple):
+        url, _ = key
+        _, size, _ = self._entries.pop(key)
+        self.size -= size
+        self._url_entry_counts[url] -= 1
+        if not self._url_entry_counts[url]:
+            del self._url_entry_counts[url]
+            del self._url_key_headers[url]
+
+    def _evict(self):
+        while self._entries and self.size > self.max_size:
+            self._remove(next(iter(self._entries)))
+
+    @staticmethod
+    def _get_cache_control(response) -> t.Dict[str, str]:
+        directives = {}
+        for directive in response.headers.get("cache-control", "").lower().split(","):
+            name, _, value = directive.partition("=")
+            if name.strip():
+                directives[name.strip()] = value.strip().strip('"')
+        return directives
+
+    @staticmethod
+    def _parse_http_date(value: t.Optional[str]) -> t.Optional[float]:
+        parsed = email.utils.parsedate_tz(value) if value else None
+        if parsed is None:
+            return None
+        return email.utils.mktime_tz(parsed)
+
+    def _get_expiry(self, response, cache_control: t.Dict[str, str]) -> t.Optional[float]:
+        """
+        Returns the time the response expires at, None if it doesn't expire.  Responses that
+        already expired, or whose expiry can't be parsed, expire now.
+        """
+        now = time.time()
+        max_age = cache_control.get("s-maxage", cache_control.get("max-age"))
+        if max_age is not None:
+            try:
+                age = int(response.headers.get("age", "0"))
+                return now + int(max_age) - age
+            except ValueError:
+                return now
+
+        if "expires" not in response.headers:
+            return None
+        expires = self._parse_http_date(response.headers["expires"])
+        if expires is None:
+            return now
+        # The lifetime is relative to the server's clock
+        date = self._parse_http_date(response.headers.get("date"))
+        return now + expires - (date if date is not None else now)
+
+    def _get_key_headers(self, response) -> t.Optional[t.Tuple[str, ...]]:
+        vary_headers = {
+            h.strip().lower() for h in response.headers.get("vary", "").split(",") if h.strip()
+        }
+        if "*" in vary_headers:
+            return None
+        return self.KEY_HEADERS + tuple(sorted(vary_headers.difference(self.KEY_HEADERS)))
+
+    def _is_cacheable(self, flow: mitmproxy.http.HTTPFlow) -> bool:
+        if flow.metadata.get(CACHE_HIT_METADATA_KEY) or flow.metadata.get(REPLAY_METADATA_KEY):
+            return False
+        if flow.request.method != "GET" or flow.response.status_code != 200:
+            return False
+        if "set-cookie" in flow.response.headers or "authorization" in flow.request.headers:
+            return False
+
+        cache_control = self._get_cache_control(flow.response)
+        if any(directive in cache_control for directive in self.UNCACHEABLE_DIRECTIVES):
+            return False
+
+        return bool(self._filter and self._filter(flow))
+
+    def request(self, flow: mitmproxy.http.HTTPFlow):
+        if not self.max_size or flow.response or flow.request.method != "GET":
+            return
+        if "authorization" in flow.request.headers:
+            return
+
+        key_headers = self._url_key_headers.get(flow.request.url)
+        if key_headers is None:
+            return
+
+        key = self._get_key(flow.request, key_headers)
+        entry = self._entries.get(key)
+        if entry is None:
+            return
+
+        cached_response, _, expiry = entry
+        if expiry is not None and expiry <= time.time():
+            self._remove(key)
+            return
+        self._entries.move_to_end(key)
+
+        # Setting the response prevents mitmproxy from requesting it from the server
+        flow.response = cached_response.copy()
+        flow.response.timestamp_start = flow.response.timestamp_end = time.time()
+        flow.metadata[CACHE_HIT_METADATA_KEY] = True
+
+    def response(self, flow: mitmproxy.http.HTTPFlow):
+        if not self.max_size or not self._is_cacheable(flow):
+            return
+
+        key_headers = self._get_key_headers(flow.response)
+        if key_headers is None:
+            return
+
+        expiry = self._get_expiry(flow.response, self._get_cache_control(flow.response))
+        if expiry is not None and expiry <= time.time():
+            return
+
+        size = len(flow.response.raw_content or b"") + len(bytes(flow.response.headers))
+        if size > self.max_size:
+            return
+
+        url = flow.request.url
+        if self._url_key_headers.get(url, key_headers) != key_headers:
+            # The Vary header of the URL changed, previously cached responses can't be reused
+            for key in [k for k in self._entries if k[0] == url]:
+                self._remove(key)
+
+        key = self._get_key(flow.request, key_headers)
+        if key in self._entries:
+            self._remove(key)
+
+        self._entries[key] = (flow.response.copy(), size, expiry)
+        self.size += size
+        self._url_key_headers[url] = key_headers
+        self._url_entry_counts[url] += 1
 
-        flow.response.content = bs_html.encode()
+        self._evict()
@@ -1,74 +1,165 @@
 """
 Extensions to mitmproxy master.
 """
-import multiprocessing
+import multiprocessing.connection
+import threading
+import logging
+import typing as t  # NOQA
 
 from seproxer import mitmproxy_extensions
+from seproxer import network_activity
 import seproxer.mitmproxy_extensions.addons  # NOQA
 import seproxer.mitmproxy_extensions.options
 
 import mitmproxy.addons
+import mitmproxy.controller
+import mitmproxy.flow
 import mitmproxy.proxy.server
 import mitmproxy.master
 
 
+logger = logging.getLogger(__name__)
+
+# Requests that are received through the results connection as (request, session) tuples
+REQUEST_RESULTS = "results"
+REQUEST_DROP = "drop"
+
+
+class SessionChannel(mitmproxy.controller.Channel):
+    """
+    A mitmproxy channel that attributes every flow sent through it to a session, this
+    allows a single master to tell apart the flows of multiple proxy servers.
+    """
+    def __init__(self, q, should_exit, session) -> None:
+        super().__init__(q, should_exit)
+        self.session = session
+
+    def _attribute(self, m):
+        if isinstance(m, mitmproxy.flow.Flow):
+            m.metadata.setdefault(mitmproxy_extensions.addons.SESSION_METADATA_KEY, self.session)
+
+    def ask(self, mtype, m):
+        self._attribute(m)
+        return super().ask(mtype, m)
+
+    def tell(self, mtype, m):
+        self._attribute(m)
+        super().tell(mtype, m)
+
+
 class ProxyMaster(mitmproxy.master.Master):
     """
-    Implements mitmproxy master to produce flows through a shared Queue and a shared
-    state attribute that specifies if there are any responses pending
+    Implements mitmproxy master to produce flows through a connection and to share the
+    network activity of every session
     """
     def __init__(self,  # type: ignore # (mypy doesn't like multiprocessing lib)
                  options: seproxer.mitmproxy_extensions.options,
                  server: mitmproxy.proxy.server,
-                 results_queue: multiprocessing.Queue,
-                 push_event: multiprocessing.Event,
-                 active_flows_state: multiprocessing.Value,
+                 results_connection: multiprocessing.connection.Connection,
+                 session_network_activity: network_activity.NetworkActivity,
+                 session_servers: t.Optional[t.Sequence[t.Tuple[int, mitmproxy.proxy.server]]]=None,
                  ) -> None:
         """
         :param options: The extended mitmproxy options, used to configure our addons
-        :param server: The mitmproxy server that the proxy will be interfacing with
-        :param results_queue: The mitmproxy flows will be pushed into this queue
-        :param push_event: When this event is set, the stored flows will
-                           be pushed into the `results_queue`
-        :param active_flows_state: A shared state that determines if there are any active flows,
-                                   that is, if any requests have pending responses
+        :param server: The mitmproxy server that the proxy will be interfacing with, its' session
+                       is the listen port specified in the `options`
+        :param results_connection: Receives (request, session) tuples.  For a `REQUEST_RESULTS`
+                                   request the completed flows of the session are serialized and
+                                   spooled to a file in the `flow_spool_directory` option, a
+                                   `flow_dumps.FlowDump` describing the file is sent back.  For a
+                                   `REQUEST_DROP` request the stored flows are discarded without
+                                   being serialized and `None` is sent back.  Requests are
+                                   served by a dedicated thread as soon as they are received
+                                   rather than by the master's event loop.
+        :param session_network_activity: Updated on every request and response of a session
+                                         with its' number of flows in flight, that is,
+                                         requests with pending responses
+        :param session_servers: Additional (session, server) pairs that will share this master,
+                                all flows of a server will be attributed to its' session
         """
         super().__init__(options, server)
+        self.session_servers = [(options.listen_port, server)]
+        self.session_servers.extend(session_servers or [])
+        for session, session_server in self.session_servers:
+            session_server.set_channel(
+                SessionChannel(self.event_queue, self.should_exit, session)
+            )
+        self.sessions = [session for session, _ in self.session_servers]
+
         # This addon will allow us to modify headers, this is particularly useful for appending
         # authentication cookies since selenium_extensions cannot modify HTTP ONLY cookies
         self.addons.add(mitmproxy.addons.setheaders.SetHeaders())
+        # This addon answers requests with stored responses when replaying flow files, it
+        # must precede the addons that may answer or modify requests
+        self._server_replay_addon = mitmproxy_extensions.addons.ServerReplay()
+        self.addons.add(self._server_replay_addon)
+        # This addon serves repeated requests for static assets from a cache shared by all
+        # sessions, cached responses are still recorded by the memory stream
+        self.addons.add(mitmproxy_extensions.addons.StaticAssetCache())
         # This add-on hooks into javascript window.onerror and all the console logging
         # methods to log message into our defined "window.__seproxer_logs" object
         self.addons.add(mitmproxy_extensions.addons.JSConsoleErrorInjection())
+        # This add-on wraps XMLHttpRequest, fetch and setTimeout to track the pending activity
+        # of pages in the "window.__seproxer_activity" object
+        self.addons.add(mitmproxy_extensions.addons.JSActivityTrackerInjection())
         # This addon will be responsible for storing our requests / responses in memory
-        # and will allow us to push the results through out results_queue
+        # and will allow us to send the results through our results_connection
         self._memory_stream_addon = mitmproxy_extensions.addons.MemoryStream()
+        self._memory_stream_addon.activity_callback = self._update_network_activity
         self.addons.add(self._memory_stream_addon)
 
-        self.results_queue = results_queue
-        self.push_event = push_event
-        self.active_flows_state = active_flows_state
+        self.results_connection = results_connection
+        self.session_network_activity = session_network_activity
+
+    def _update_network_activity(self, session, in_flight: int):
+        # Flows that aren't attributed to a session aren't tracked
+        if session in self.sessions:
+            self.session_network_activity.update(session, in_flight)
 
-    def tick(self, timeout):
+    def _serve_results(self):
         """
-        Extends the Master's tick method to update our active flows state and to push
-        our results into the results queue if the push_event is set
+        Blocks on the results connection and serves each request as soon as it is received
         """
-        tick_result = super().tick(timeout)
+        while not self.should_exit.is_set():
+            try:
+                request, session = self.results_connection.recv()
+            except (EOFError, OSError):
+                logger.debug("Results connection closed, no longer serving results")
+                return
+
+            if request == REQUEST_RESULTS:
+                # Get the flow results, this also starts a new stream for the session
+                flow_dump = self._memory_stream_addon.pop_stream(session).dump()
+                # Only the small descriptor is sent, the receiver takes ownership of the file
+                self.results_connection.send(flow_dump)
+            elif request == REQUEST_DROP:
+                self._memory_stream_addon.drop_stream(session)
+                self.results_connection.send(None)
+            else:
+                logger.error("Unknown results request: {!r}".format(request))
+                self.results_connection.send(None)
+                continue
 
-        # Update our active flow state
-        has_active_flows = self._memory_stream_addon.has_active_flows()
-        if has_active_flows != self.active_flows_state.value:
-            with self.active_flows_state.get_lock():
-                self.active_flows_state.value = has_active_flows
+            # The session's next URL is replayed from the first recorded responses
+            self._server_replay_addon.reset_session(session)
+            # The session's flows in flight remain in flight, retrieving or dropping the
+            # flows is no network activity
+            self.session_network_activity.update(
+                session, self._memory_stream_addon.count_active_flows(session),
+                is_activity=False,
+            )
 
-        if self.push_event.is_set():
-            # Get the flow results and restart by calling start again
-            flow_results = self._memory_stream_addon.get_stream()
-            self._memory_stream_addon.start()
+    def start(self):
+        super().start()
+        # The first session server is started by the mitmproxy master
+        for _, session_server in self.session_servers[1:]:
+            mitmproxy.master.ServerThread(session_server).start()
 
-            # Push the results to the result queue1
-            self.results_queue.put(flow_results)
-            self.push_event.clear()
+        threading.Thread(
+            target=self._serve_results, name="ResultsConnectionThread", daemon=True,
+        ).start()
 
-        return tick_result
+    def shutdown(self):
+        super().shutdown()
+        for _, session_server in self.session_servers[1:]:
+            session_server.shutdown()
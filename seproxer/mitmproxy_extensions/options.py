@@ -1,4 +1,7 @@
 import typing as t
+import tempfile
+
+from seproxer import flow_dumps
 
 import mitmproxy.options
 
@@ -8,10 +11,38 @@ class MitmproxyExtendedOptions(mitmproxy.options.Options):
                  strip_headers: t.Optional[t.Iterable[t.Tuple[str, str]]]=None,
                  inject_js_error_detection: bool=True,
                  inject_js_error_detection_filter: str="~t text/html",
+                 inject_js_activity_tracker: bool=False,
+                 inject_js_activity_tracker_filter: str="~t text/html",
+                 flow_spool_directory: t.Optional[str]=None,
+                 stream_memory_limit: int=flow_dumps.DEFAULT_MEMORY_LIMIT,
+                 capture_filter: t.Optional[str]=None,
+                 capture_body_limit: t.Optional[int]=None,
+                 capture_headers_only_types: t.Optional[t.Sequence[str]]=None,
+                 asset_cache_size: int=0,
+                 asset_cache_filter: str="~t javascript | ~t css | ~t font",
+                 replay_flows: t.Optional[t.Sequence[str]]=None,
                  **kwargs) -> None:
 
         self.strip_headers = strip_headers or []
         self.inject_js_error_detection = inject_js_error_detection
         self.inject_js_error_detection_filter = inject_js_error_detection_filter
+        self.inject_js_activity_tracker = inject_js_activity_tracker
+        self.inject_js_activity_tracker_filter = inject_js_activity_tracker_filter
+        # The directory that flows are spooled to when they are handed to seproxer
+        self.flow_spool_directory = flow_spool_directory or tempfile.gettempdir()
+        # The number of bytes of flows, per session, kept in memory before spilling to disk
+        self.stream_memory_limit = stream_memory_limit
+        # Only flows matching this filter are recorded
+        self.capture_filter = capture_filter
+        # Recorded request and response contents are truncated to this number of bytes
+        self.capture_body_limit = capture_body_limit
+        # Only the headers of responses with these content type prefixes are recorded
+        self.capture_headers_only_types = capture_headers_only_types or []
+        # The number of bytes of responses cached across URLs, the cache is disabled if 0
+        self.asset_cache_size = asset_cache_size
+        # Only responses matching this filter are cached
+        self.asset_cache_filter = asset_cache_filter
+        # Flow files, or directories of flow files, that requests are answered from
+        self.replay_flows = replay_flows or []
 
         super().__init__(**kwargs)
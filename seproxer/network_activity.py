@@ -0,0 +1,100 @@
+"""
+This module shares the network activity of every proxy session between the proxy
+process and seproxer, waiters are notified by the proxy as soon as the activity changes.
+"""
+import typing as t
+import ctypes
+import multiprocessing
+import time
+
+
+class Error(Exception):
+    """
+    Generic module level error
+    """
+
+
+class UnknownSessionError(Error):
+    """
+    The session is not tracked by the network activity
+    """
+
+
+class NetworkActivity:
+    """
+    Tracks the number of in flight requests and the time of the last network activity of
+    every session.  The proxy process updates the activity and seproxer waits on it.
+    """
+    def __init__(self, sessions: t.Sequence[t.Any]) -> None:
+        self.sessions = list(sessions)
+        # The condition guards both arrays and notifies waiters of every change
+        self._condition = multiprocessing.Condition()
+        self._in_flight = multiprocessing.Array(ctypes.c_int, len(self.sessions), lock=False)
+        self._last_activity = multiprocessing.Array(
+            ctypes.c_double, len(self.sessions), lock=False)
+
+    def _index(self, session) -> int:
+        try:
+            return self.sessions.index(session)
+        except ValueError:
+            raise UnknownSessionError("No network activity is tracked for session {}".format(
+                session))
+
+    def update(self, session, in_flight: int, is_activity: bool=True):
+        """
+        Updates the number of in flight requests of the session and wakes up all waiters.
+
+        :param is_activity: Whether the update is caused by network activity, such as a
+                            request or response, which restarts the session's quiet window
+                            even when the number of in flight requests is unchanged
+        """
+        index = self._index(session)
+        with self._condition:
+            if not is_activity and self._in_flight[index] == in_flight:
+                return
+            self._in_flight[index] = in_flight
+            if is_activity:
+                self._last_activity[index] = time.time()
+            self._condition.notify_all()
+
+    def in_flight(self, session) -> int:
+        index = self._index(session)
+        with self._condition:
+            return self._in_flight[index]
+
+    def wait_for_idle(self,
+                      session,
+                      quiet_window: float,
+                      max_in_flight: int=0,
+                      timeout: t.Optional[float]=None) -> bool:
+        """
+        Blocks until the session is idle, that is, at most `max_in_flight` requests are in
+        flight and there was no network activity for `quiet_window` seconds.
+
+        :param session: The session to wait for
+        :param quiet_window: The number of seconds without any network activity
+        :param max_in_flight: The number of requests that may remain in flight, for example
+                              long polling requests that never complete
+        :param timeout: The maximum number of seconds to wait, waits indefinitely if `None`
+        :return: True if the session became idle, False if the timeout was reached
+        """
+        index = self._index(session)
+        deadline = None if timeout is None else time.time() + timeout
+
+        with self._condition:
+            while True:
+                now = time.time()
+                wait_time = None  # type: t.Optional[float]
+                if self._in_flight[index] <= max_in_flight:
+                    quiet_time = now - self._last_activity[index]
+                    if quiet_time >= quiet_window:
+                        return True
+                    wait_time = quiet_window - quiet_time
+
+                if deadline is not None:
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        return False
+                    wait_time = remaining if wait_time is None else min(wait_time, remaining)
+
+                self._condition.wait(wait_time)
@@ -3,6 +3,7 @@ import enum
 import os
 
 from seproxer import seproxer_enums
+from seproxer import flow_dumps
 
 
 class OptionError(Exception):
@@ -21,14 +22,38 @@ class Defaults(enum.Enum):
     WEBDRIVER_TYPE = seproxer_enums.SeleniumBrowserTypes.PHANTOM_JS
 
     PROXY_PORT = 5050
+    PROXY_MEMORY_LIMIT = flow_dumps.DEFAULT_MEMORY_LIMIT
+
+    ASSET_CACHE_SIZE = 0
+    ASSET_CACHE_FILTER = "~t javascript | ~t css | ~t font"
+
+    WORKERS = 1
+
+    NETWORK_IDLE_WINDOW = 0.5
+    NETWORK_IDLE_MAX_IN_FLIGHT = 0
+    NETWORK_IDLE_TIMEOUT = 20.0
 
     RESULTS_DIRECTORY = "results"
     RESULTS_FILE_NAME = "results.json"
     RESULTS_FILE_LEVEL = seproxer_enums.ResultLevel.WARNING
+    RESULTS_FILE_FORMAT = seproxer_enums.ResultsFileFormat.JSON
+
+    JOURNAL_FILE_NAME = "journal.tsv"
+
+    RESULTS_DATABASE_LEVEL = seproxer_enums.ResultLevel.OK
+
+    FINGERPRINT_LEVEL = seproxer_enums.ResultLevel.WARNING
+
+    HANDLER_QUEUE_SIZE = 100
+    HANDLER_QUEUE_POLICY = seproxer_enums.QueuePolicy.BLOCK
+    HANDLER_QUEUE_DROP_LEVEL = seproxer_enums.ResultLevel.WARNING
 
     FLOW_STORAGE_LEVEL = seproxer_enums.ResultLevel.WARNING
 
     ANGULAR_TIMEOUT = 20
+    STATE_TIMEOUT = 30
+    ACTIVITY_TIMEOUT = 20
+    ACTIVITY_QUIET_TIME = 500
 
     # The following class methods is to make mypy happy!
 
@@ -40,6 +65,26 @@ class Defaults(enum.Enum):
     def results_file_level(cls) -> seproxer_enums.ResultLevel:
         return cls.RESULTS_FILE_LEVEL.value
 
+    @classmethod
+    def results_file_format(cls) -> seproxer_enums.ResultsFileFormat:
+        return cls.RESULTS_FILE_FORMAT.value
+
+    @classmethod
+    def results_database_level(cls) -> seproxer_enums.ResultLevel:
+        return cls.RESULTS_DATABASE_LEVEL.value
+
+    @classmethod
+    def handler_queue_policy(cls) -> seproxer_enums.QueuePolicy:
+        return cls.HANDLER_QUEUE_POLICY.value
+
+    @classmethod
+    def handler_queue_drop_level(cls) -> seproxer_enums.ResultLevel:
+        return cls.HANDLER_QUEUE_DROP_LEVEL.value
+
+    @classmethod
+    def fingerprint_level(cls) -> seproxer_enums.ResultLevel:
+        return cls.FINGERPRINT_LEVEL.value
+
     @classmethod
     def flow_level(cls) -> seproxer_enums.ResultLevel:
         return cls.FLOW_STORAGE_LEVEL.value
@@ -52,6 +97,24 @@ class Options:
             selenium_webdriver_path: t.Optional[str]=None,
             mitmproxy_port: int=Defaults.PROXY_PORT.value,
             ignore_certificates: bool=False,
+            # Number of bytes of flows the proxy keeps in memory before spilling them to disk
+            proxy_memory_limit: int=Defaults.PROXY_MEMORY_LIMIT.value,
+            # Limit which flows and how much of their contents are recorded
+            capture_filter: t.Optional[str]=None,
+            capture_body_limit: t.Optional[int]=None,
+            capture_headers_only_types: t.Optional[t.Sequence[str]]=None,
+            # Cache static assets, such as scripts and stylesheets, across URLs
+            asset_cache_size: int=Defaults.ASSET_CACHE_SIZE.value,
+            asset_cache_filter: str=Defaults.ASSET_CACHE_FILTER.value,
+            # Answer requests from stored flow files instead of the servers
+            replay_flows: t.Optional[t.Sequence[str]]=None,
+            # Waiting for the network to be idle after loading a URL
+            network_idle_window: float=Defaults.NETWORK_IDLE_WINDOW.value,
+            network_idle_max_in_flight: int=Defaults.NETWORK_IDLE_MAX_IN_FLIGHT.value,
+            network_idle_timeout: float=Defaults.NETWORK_IDLE_TIMEOUT.value,
+            # Flow storing, flows are archived in this archive, relative to the results
+            # directory, instead of a flow file per result
+            flow_archive: t.Optional[str]=None,
             # Flow storing
             flow_storage_level: t.Optional[seproxer_enums.ResultLevel]=Defaults.flow_level(),
             # Log handling options
@@ -60,13 +123,45 @@ class Options:
             ),
             results_directory: str=Defaults.RESULTS_DIRECTORY.value,
             file_results_file_name: str=Defaults.RESULTS_FILE_NAME.value,
+            file_results_format: seproxer_enums.ResultsFileFormat=Defaults.results_file_format(),
+            # SQLite results database, relative to the results directory
+            results_database: t.Optional[str]=None,
+            results_database_level: seproxer_enums.ResultLevel=Defaults.results_database_level(),
+            # Report of the distinct validator messages, relative to the results directory
+            fingerprint_report: t.Optional[str]=None,
+            fingerprint_level: seproxer_enums.ResultLevel=Defaults.fingerprint_level(),
+            # Assemble the JSON results file from the JSON Lines results file once done
+            assemble_results_file: bool=False,
             # Inject headers into arbitrary requests using mitmproxy
             set_headers: t.Optional[t.Sequence[t.Tuple[str, str, str]]]=None,
             # Strip headers when storing results
             strip_headers: t.Optional[t.Sequence[t.Tuple[str, str]]]=None,
             check_angular_state: int=True,
             angular_state_timeout: int=Defaults.ANGULAR_TIMEOUT.value,
+            # Wait for pages to be idle using the activity tracker injected by the proxy
+            check_activity_state: bool=False,
+            activity_state_timeout: float=Defaults.ACTIVITY_TIMEOUT.value,
+            activity_quiet_time: int=Defaults.ACTIVITY_QUIET_TIME.value,
+            # Audit all loaded states together with a single timeout per URL
+            concurrent_states: bool=False,
+            state_timeout: float=Defaults.STATE_TIMEOUT.value,
             console_error_detection: int=True,
+            # Number of browser / proxy pairs that will test URLs concurrently
+            workers: int=Defaults.WORKERS.value,
+            # All workers share a single proxy process instead of one proxy per worker
+            shared_proxy: bool=False,
+            # The number of results queued for every handler, unbounded if 0, and what happens
+            # to results when a handler's queue is full
+            handler_queue_size: int=Defaults.HANDLER_QUEUE_SIZE.value,
+            handler_queue_policy: seproxer_enums.QueuePolicy=Defaults.handler_queue_policy(),
+            handler_queue_drop_level: seproxer_enums.ResultLevel=(
+                Defaults.handler_queue_drop_level()
+            ),
+            # Run CPU bound handlers in worker processes
+            pooled_handlers: bool=False,
+            # Journal of completed URLs, used to resume interrupted runs
+            journal_file_name: str=Defaults.JOURNAL_FILE_NAME.value,
+            resume: bool=False,
             ) -> None:
 
         self.selenium_webdriver_type = selenium_webdriver_type
@@ -74,13 +169,47 @@ class Options:
 
         self.mitmproxy_port = mitmproxy_port
         self.ignore_certificates = ignore_certificates
+        self.proxy_memory_limit = proxy_memory_limit
+
+        self.capture_filter = capture_filter
+        self.capture_body_limit = capture_body_limit
+        self.capture_headers_only_types = capture_headers_only_types or []
+
+        self.asset_cache_size = asset_cache_size
+        self.asset_cache_filter = asset_cache_filter
+
+        self.replay_flows = replay_flows or []
+
+        self.network_idle_window = network_idle_window
+        self.network_idle_max_in_flight = network_idle_max_in_flight
+        self.network_idle_timeout = network_idle_timeout
 
         self.results_directory = results_directory
 
         self.flow_storage_level = flow_storage_level
+        self.flow_archive = flow_archive
 
         self.file_results_level = file_results_level
         self.file_results_file_name = file_results_file_name
+        self.file_results_format = file_results_format
+        self.assemble_results_file = assemble_results_file
+
+        self.fingerprint_report = fingerprint_report
+        self.fingerprint_level = fingerprint_level
+
+        self.results_database = results_database
+        self.results_database_level = results_database_level
+
+        if handler_queue_size < 0:
+            raise OptionError("The handler queue size can't be negative, {} specified".format(
+                handler_queue_size))
+        self.handler_queue_size = handler_queue_size
+        self.handler_queue_policy = handler_queue_policy
+        self.handler_queue_drop_level = handler_queue_drop_level
+        self.pooled_handlers = pooled_handlers
+
+        self.journal_file_name = journal_file_name
+        self.resume = resume
 
         self.set_headers = set_headers or []
         self.strip_headers = strip_headers or []
@@ -88,16 +217,67 @@ class Options:
         # State loaders
         self.check_angular_app = check_angular_state
         self.angular_state_timeout = angular_state_timeout
+        self.check_activity_state = check_activity_state
+        self.activity_state_timeout = activity_state_timeout
+        self.activity_quiet_time = activity_quiet_time
+        self.concurrent_states = concurrent_states
+        self.state_timeout = state_timeout
 
         # Validators
         self.console_error_detection = console_error_detection
 
+        if workers < 1:
+            raise OptionError("At least one worker is required, {} specified".format(workers))
+        self.workers = workers
+        self.shared_proxy = shared_proxy
+
         # Ensure that our results file name directory is setup properly
         self.setup_file_results_dir()
 
+    def worker_proxy_ports(self) -> t.List[int]:
+        """
+        Returns the proxy port of every worker, each worker is assigned the next port
+        after the configured mitmproxy port.
+        """
+        return [self.mitmproxy_port + i for i in range(self.workers)]
+
+    @property
+    def file_results_jsonl_file_name(self) -> str:
+        """
+        The file name of the JSON Lines results, the results file name with a jsonl extension
+        """
+        return "{}.jsonl".format(os.path.splitext(self.file_results_file_name)[0])
+
+    @property
+    def results_database_path(self) -> t.Optional[str]:
+        if self.results_database is None:
+            return None
+        return os.path.join(os.path.expanduser(self.results_directory), self.results_database)
+
+    @property
+    def fingerprint_report_path(self) -> t.Optional[str]:
+        if self.fingerprint_report is None:
+            return None
+        return os.path.join(os.path.expanduser(self.results_directory), self.fingerprint_report)
+
+    @property
+    def flow_archive_path(self) -> t.Optional[str]:
+        if self.flow_archive is None:
+            return None
+        return os.path.join(os.path.expanduser(self.results_directory), self.flow_archive)
+
+    @property
+    def flow_spool_directory(self) -> str:
+        """
+        The directory that the proxy spools flows to, it is within the results directory so
+        that stored flows can be hard linked instead of copied.
+        """
+        return "{}/spool".format(os.path.expanduser(self.results_directory))
+
     def setup_file_results_dir(self):
         results_directory_path = os.path.expanduser(self.results_directory)
         os.makedirs("{}/flows".format(results_directory_path), exist_ok=True)
+        os.makedirs(self.flow_spool_directory, exist_ok=True)
 
         results_file_path = "{}/{}".format(results_directory_path, self.file_results_file_name)
         if os.path.exists(results_file_path) and not os.path.isfile(results_file_path):
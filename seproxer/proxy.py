@@ -1,13 +1,14 @@
 import multiprocessing
+import multiprocessing.connection  # NOQA
+import threading
 import signal
 import logging
-import time
 import typing as t  # NOQA
-import io
-import ctypes
 
 import seproxer.options
 from seproxer import mitmproxy_extensions
+from seproxer import flow_dumps
+from seproxer import network_activity
 import seproxer.mitmproxy_extensions.options
 import seproxer.mitmproxy_extensions.master
 from seproxer import seproxer_enums
@@ -46,48 +47,104 @@ class ProxyMalformedData(ProxyError):
 
 
 class ProxyProc(multiprocessing.Process):
-    def __init__(self, proxy_master: mitmproxy_extensions.master.ProxyMaster) -> None:
+    def __init__(self,
+                 proxy_master: mitmproxy_extensions.master.ProxyMaster,
+                 parent_connection: t.Optional[multiprocessing.connection.Connection]=None
+                 ) -> None:
+        """
+        :param parent_connection: The parent's end of the proxy master's results pipe, which
+                                  is closed in the proxy process
+        """
         super().__init__()
         self.proxy_master = proxy_master
+        self._parent_connection = parent_connection
 
     def _handle_sig(self, signum, frame):
         _ = signum, frame  # NOQA
         self.proxy_master.shutdown()
 
     def run(self):
+        if self._parent_connection is not None:
+            self._parent_connection.close()
         signal.signal(signal.SIGTERM, self._handle_sig)
         signal.signal(signal.SIGINT, self._handle_sig)
         self.proxy_master.run()
 
 
+class UnknownSessionError(ProxyError):
+    """
+    Exception is raised when an operation is performed on a session that the proxy
+    was not configured with
+    """
+
+
 class Runner:
     def __init__(self,
-                 mitmproxy_options: mitmproxy_extensions.options.MitmproxyExtendedOptions) -> None:
+                 mitmproxy_options: mitmproxy_extensions.options.MitmproxyExtendedOptions,
+                 session_options: t.Optional[
+                     t.Sequence[mitmproxy_extensions.options.MitmproxyExtendedOptions]
+                 ]=None) -> None:
+        """
+        :param mitmproxy_options: The options used to configure the proxy, the listen port of
+                                  these options is the default session.
+        :param session_options: Options for additional sessions that will share this proxy.  Each
+                                session is identified by the listen port of its' options and
+                                flows are retrieved separately for every session.
+        """
         self.mitmproxy_options = mitmproxy_options
         # setup proxy server from options
         proxy_config = mitmproxy.proxy.config.ProxyConfig(mitmproxy_options)
         self._proxy_server = mitmproxy.proxy.server.ProxyServer(proxy_config)
 
-        self._results_queue = multiprocessing.Queue()
-        self._producer_push_event = multiprocessing.Event()  # type: ignore
-        self._has_active_flows_state = multiprocessing.Value(ctypes.c_bool, False)
+        self._session_servers = [
+            (o.listen_port, mitmproxy.proxy.server.ProxyServer(
+                mitmproxy.proxy.config.ProxyConfig(o)))
+            for o in session_options or []
+        ]
+        self.sessions = [mitmproxy_options.listen_port]
+        self.sessions.extend(session for session, _ in self._session_servers)
+
+        # Sessions are sent through the results connection and the proxy responds
+        # with the serialized flows of the session, the pipe is created for every proxy process
+        self._results_connection = None  # type: t.Optional[multiprocessing.connection.Connection]
+        self._network_activity = network_activity.NetworkActivity(self.sessions)
+        # Only a single results request can be pending, otherwise the results of different
+        # sessions could be mixed up
+        self._results_lock = threading.Lock()
 
         self._proxy_proc = None  # type: t.Optional[ProxyProc]
 
+    @property
+    def default_session(self) -> int:
+        return self.sessions[0]
+
+    def _session_index(self, session: t.Optional[int]) -> int:
+        if session is None:
+            session = self.default_session
+        try:
+            return self.sessions.index(session)
+        except ValueError:
+            raise UnknownSessionError("Proxy has no session {}".format(session))
+
     def run(self):
         if self._proxy_proc:
             raise ProxyRunningError(
                 "Cannot run proxy while proxy (pid: %s) is running", self._proxy_proc.pid)
 
+        results_connection, proxy_results_connection = multiprocessing.Pipe()
         master_producer = mitmproxy_extensions.master.ProxyMaster(
             options=self.mitmproxy_options,
             server=self._proxy_server,
-            results_queue=self._results_queue,
-            push_event=self._producer_push_event,
-            active_flows_state=self._has_active_flows_state,
+            results_connection=proxy_results_connection,
+            session_network_activity=self._network_activity,
+            session_servers=self._session_servers,
         )
-        self._proxy_proc = ProxyProc(master_producer)
+        self._proxy_proc = ProxyProc(master_producer, parent_connection=results_connection)
         self._proxy_proc.start()
+        # Only the proxy process keeps its' end of the pipe open, so that receiving from the
+        # pipe raises an EOFError rather than blocking forever once the proxy process dies
+        proxy_results_connection.close()
+        self._results_connection = results_connection
 
     @property
     def is_running(self) -> bool:
@@ -103,50 +160,115 @@ class Runner:
         self._proxy_proc.terminate()
         self._proxy_proc.join()
         self._proxy_proc = None
+        if self._results_connection is not None:
+            self._results_connection.close()
+            self._results_connection = None
+
+    def _request(self, request: str, session: t.Optional[int]):
+        session = self.sessions[self._session_index(session)]
+        if not self.is_running:
+            raise ProxyNotRunningError("Cannot request results when no proxy process is running")
+
+        with self._results_lock:
+            try:
+                self._results_connection.send((request, session))
+                return self._results_connection.recv()
+            except (EOFError, OSError) as e:
+                raise ProxyMalformedData("Unable to retrieve results from proxy: {}".format(e))
+
+    def get_results(self, session: t.Optional[int]=None) -> flow_dumps.FlowDump:
+        """
+        Returns the spooled flows of the specified session and clears them from the proxy.
+        The returned dump owns the spooled file.
+
+        :param session: The session to retrieve the flows of, defaults to the default session
+        """
+        flow_dump = self._request(mitmproxy_extensions.master.REQUEST_RESULTS, session)
+        if not isinstance(flow_dump, flow_dumps.FlowDump):
+            logger.error("Expected FlowDump object, instead received {}".format(type(flow_dump)))
+            raise ProxyMalformedData("Unexpected data received from proxy")
 
-    def get_results(self) -> bytes:
-        if self._producer_push_event.is_set():
-            logger.warning("Attempted to retrieve proxy results while proxy producer has not yet "
-                           "cleared the push event")
-            while not self._producer_push_event.is_set():
-                time.sleep(0.1)
+        flow_dump.claim()
+        return flow_dump
 
-        self._producer_push_event.set()
-        queue_result = self._results_queue.get()  # type: t.Optional[io.BytesIO]
+    def drop_results(self, session: t.Optional[int]=None) -> None:
+        """
+        Discards the flows of the specified session without serializing them, this is much
+        cheaper than retrieving flows that will not be stored.
+        """
+        self._request(mitmproxy_extensions.master.REQUEST_DROP, session)
 
-        if queue_result:
-            if not isinstance(queue_result, io.BytesIO):
-                logger.error(
-                    "Expected BytesIO object, instead received {}".format(type(queue_result))
-                )
-                raise ProxyMalformedData("Unexpected data received from proxy")
-            return queue_result.getvalue()
+    def has_pending_requests(self, session: t.Optional[int]=None) -> bool:
+        session = self.sessions[self._session_index(session)]
+        return self._network_activity.in_flight(session) > 0
 
-        return bytes()
+    def wait_for_network_idle(self,
+                              session: t.Optional[int]=None,
+                              quiet_window: float=0.5,
+                              max_in_flight: int=0,
+                              timeout: t.Optional[float]=None) -> bool:
+        """
+        Blocks until the session's network is idle, the proxy notifies us of every change so
+        this returns as soon as the session becomes idle.  See
+        `network_activity.NetworkActivity.wait_for_idle`.
 
-    def has_pending_requests(self) -> bool:
-        with self._has_active_flows_state.get_lock():  # type: ignore
-            return self._has_active_flows_state.value  # type: ignore
+        :return: True if the session's network became idle, False if the timeout was reached
+        """
+        session = self.sessions[self._session_index(session)]
+        return self._network_activity.wait_for_idle(
+            session,
+            quiet_window=quiet_window,
+            max_in_flight=max_in_flight,
+            timeout=timeout,
+        )
 
     def clear_flows(self) -> None:
         """
-        Removes any flows that have been stored in memory from the proxy
+        Removes any flows that have been stored in memory from the proxy for all sessions
         """
-        try:
-            self.get_results()
-        except ProxyError:
-            return
+        for session in self.sessions:
+            try:
+                self.drop_results(session)
+            except ProxyError:
+                return
 
     @staticmethod
-    def from_options(options: seproxer.options.Options) -> "Runner":
-        mitmproxy_options = mitmproxy_extensions.options.MitmproxyExtendedOptions(
-            strip_headers=options.strip_headers,
-            inject_js_error_detection=(
-                options.selenium_webdriver_type is seproxer_enums.SeleniumBrowserTypes.FIREFOX
-            ),
-            keepserving=True,
-            listen_port=options.mitmproxy_port,
-            ssl_insecure=options.ignore_certificates,
-            setheaders=options.set_headers,
-        )
-        return Runner(mitmproxy_options)
+    def from_options(options: seproxer.options.Options,
+                     listen_ports: t.Optional[t.Sequence[int]]=None) -> "Runner":
+        """
+        :param options: The seproxer options used to configure the proxy
+        :param listen_ports: The ports, one per session, that the proxy will listen on.  Defaults
+                             to a single session on the port specified in the options.
+        """
+        if not listen_ports:
+            listen_ports = [options.mitmproxy_port]
+
+        mitmproxy_options = [_get_mitmproxy_options(options, port) for port in listen_ports]
+        return Runner(mitmproxy_options[0], session_options=mitmproxy_options[1:])
+
+
+def _get_mitmproxy_options(options: seproxer.options.Options,
+                           listen_port: int
+                           ) -> mitmproxy_extensions.options.MitmproxyExtendedOptions:
+    return mitmproxy_extensions.options.MitmproxyExtendedOptions(
+        strip_headers=options.strip_headers,
+        inject_js_error_detection=(
+            options.selenium_webdriver_type is seproxer_enums.SeleniumBrowserTypes.FIREFOX
+        ),
+        inject_js_activity_tracker=options.check_activity_state,
+        flow_spool_directory=options.flow_spool_directory,
+        stream_memory_limit=options.proxy_memory_limit,
+        capture_filter=options.capture_filter,
+        capture_body_limit=options.capture_body_limit,
+        capture_headers_only_types=options.capture_headers_only_types,
+        asset_cache_size=options.asset_cache_size,
+        asset_cache_filter=options.asset_cache_filter,
+        replay_flows=options.replay_flows,
+        # The servers are never contacted when replaying, certificates are generated
+        # without inspecting the server's certificate
+        no_upstream_cert=bool(options.replay_flows),
+        keepserving=True,
+        listen_port=listen_port,
+        ssl_insecure=options.ignore_certificates,
+        setheaders=options.set_headers,
+    )
@@ -0,0 +1,136 @@
+"""
+Command line interface that answers common questions about a results database, see
+`seproxer.result_database`.
+"""
+import argparse
+import os
+import sys
+
+import seproxer.seproxer_enums
+from seproxer import result_database
+
+
+def _print_rows(rows, columns):
+    print("\t".join(columns))
+    for row in rows:
+        print("\t".join("" if row[c] is None else str(row[c]) for c in columns))
+
+
+def _runs(database, parsed_args):
+    _print_rows(
+        database.runs(limit=parsed_args.limit),
+        ("id", "started", "results", "ok", "warning", "error"),
+    )
+
+
+def _history(database, parsed_args):
+    _print_rows(
+        database.url_history(parsed_args.url, limit=parsed_args.limit),
+        ("run_id", "time", "status", "uuid", "url"),
+    )
+
+
+def _messages(database, parsed_args):
+    if not parsed_args.text and not parsed_args.fingerprint:
+        raise argparse.ArgumentTypeError("Either a message text or --fingerprint is required")
+
+    _print_rows(
+        database.find_messages(
+            text=parsed_args.text,
+            fingerprint=parsed_args.fingerprint,
+            level=parsed_args.level,
+            runs=parsed_args.runs,
+            limit=parsed_args.limit,
+        ),
+        ("run_id", "level", "fingerprint", "url", "uuid", "text"),
+    )
+
+
+def _fingerprints(database, parsed_args):
+    _print_rows(
+        database.top_fingerprints(
+            level=parsed_args.level,
+            runs=parsed_args.runs,
+            limit=parsed_args.limit,
+        ),
+        ("fingerprint", "urls", "occurrences", "example"),
+    )
+
+
+def _add_runs_argument(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        "--runs",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Only query the results of the N most recent runs",
+    )
+
+
+def get_parsed_args(args=None):
+    levels = [level.name for level in seproxer.seproxer_enums.ResultLevel]
+
+    parser = argparse.ArgumentParser(
+        prog="seproxer-query",
+        description="Query a seproxer results database, results are printed as tab separated "
+                    "values",
+    )
+    parser.add_argument(
+        "database",
+        metavar="DATABASE",
+        type=str,
+        help="The results database, see the --results-database option of seproxer",
+    )
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.required = True
+
+    runs_parser = subparsers.add_parser("runs", help="List the most recent runs")
+    runs_parser.add_argument("--limit", type=int, default=10)
+    runs_parser.set_defaults(func=_runs)
+
+    history_parser = subparsers.add_parser("history", help="List the results of a URL")
+    history_parser.add_argument("url", type=str)
+    history_parser.add_argument("--limit", type=int, default=10)
+    history_parser.set_defaults(func=_history)
+
+    messages_parser = subparsers.add_parser(
+        "messages",
+        help="List the messages containing a text, such as TypeError, and their URLs",
+    )
+    messages_parser.add_argument("text", type=str, nargs="?", default=None)
+    messages_parser.add_argument(
+        "--fingerprint", type=str, default=None, help="Only list messages with this fingerprint",
+    )
+    messages_parser.add_argument("--level", choices=levels, default=None)
+    messages_parser.add_argument("--limit", type=int, default=100)
+    _add_runs_argument(messages_parser)
+    messages_parser.set_defaults(func=_messages)
+
+    fingerprints_parser = subparsers.add_parser(
+        "fingerprints", help="List the most common message fingerprints",
+    )
+    fingerprints_parser.add_argument("--level", choices=levels, default="ERROR")
+    fingerprints_parser.add_argument("--limit", type=int, default=20)
+    _add_runs_argument(fingerprints_parser)
+    fingerprints_parser.set_defaults(func=_fingerprints)
+
+    return parser.parse_args(args=args)
+
+
+def main(args=None):
+    parsed_args = get_parsed_args(args=args)
+    if not os.path.isfile(parsed_args.database):
+        sys.exit("Results database {} does not exist".format(parsed_args.database))
+
+    # Queries never write to the database, which may be written by a run
+    database = result_database.ResultDatabase(parsed_args.database, read_only=True)
+    try:
+        parsed_args.func(database, parsed_args)
+    except argparse.ArgumentTypeError as e:
+        sys.exit(str(e))
+    finally:
+        database.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -9,3 +9,8 @@ console_error_detection = resources.get_javascript_resource(
     name="Console Error Detection",
     resource_path="injectables/error_detection.js",
 )
+
+activity_tracker = resources.get_javascript_resource(
+    name="Activity Tracker",
+    resource_path="injectables/activity_tracker.js",
+)
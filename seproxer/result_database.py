@@ -0,0 +1,287 @@
+"""
+This module stores results in an indexed SQLite database.  Every seproxer run is recorded
+as a run, results reference their run and every validator message is stored as a separate
+row with its' fingerprint, which allows results to be queried without reading them all.
+
+Message texts are indexed by an FTS5 trigram index when SQLite supports it, so that
+searching messages for a text doesn't scan all messages.
+"""
+import typing as t
+import os
+import json
+import sqlite3
+import datetime
+import urllib.request
+
+from seproxer import fingerprints
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    uuid TEXT NOT NULL UNIQUE,
+    url TEXT NOT NULL,
+    status TEXT NOT NULL,
+    time TEXT NOT NULL,
+    known_states TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    result_id INTEGER NOT NULL REFERENCES results (id),
+    validator TEXT NOT NULL,
+    level TEXT NOT NULL,
+    message TEXT,
+    text TEXT NOT NULL,
+    fingerprint TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_url ON results (url);
+CREATE INDEX IF NOT EXISTS results_status ON results (status, run_id);
+CREATE INDEX IF NOT EXISTS results_run_id ON results (run_id);
+CREATE INDEX IF NOT EXISTS messages_fingerprint ON messages (fingerprint);
+CREATE INDEX IF NOT EXISTS messages_result_id ON messages (result_id);
+"""
+
+# The full text index of message texts, it is an external content table that only stores
+# the index.  The trigram tokenizer matches any substring of at least 3 characters.
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE messages_fts USING fts5(
+    text, content='messages', content_rowid='id', tokenize='trigram'
+);
+"""
+
+# Texts shorter than this can't be searched with the trigram index
+FTS_MIN_TEXT_LENGTH = 3
+
+
+class Error(Exception):
+    """
+    Generic module level error
+    """
+
+
+class DatabaseClosedError(Error):
+    """
+    Exception is raised when using a database that has been closed
+    """
+
+
+def _now() -> str:
+    return str(datetime.datetime.now().replace(microsecond=0))
+
+
+class ResultDatabase:
+    """
+    The SQLite results database, writes are only committed when `commit` is called so that
+    results can be inserted in batched transactions.
+
+    The schema is created, and migrated, by writers.  A read-only database never writes to
+    the database, it may be queried while a run is writing results.
+    """
+    def __init__(self, path: str, read_only: bool=False) -> None:
+        self.path = path
+        self.read_only = read_only
+        # The connection is created by one thread and may be closed by another once it is idle
+        if read_only:
+            self._connection = sqlite3.connect(
+                "file:{}?mode=ro".format(urllib.request.pathname2url(os.path.abspath(path))),
+                uri=True, check_same_thread=False,
+            )  # type: t.Optional[sqlite3.Connection]
+        else:
+            self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+
+        if read_only:
+            self.has_full_text_index = self._has_full_text_index()
+            return
+        # Allows the database to be queried while results are written
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(SCHEMA)
+        self.has_full_text_index = self._create_full_text_index()
+
+    def _has_full_text_index(self) -> bool:
+        return self._connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'messages_fts'").fetchone() is not None
+
+    def _create_full_text_index(self) -> bool:
+        """
+        Creates the full text index of message texts unless it exists, returns whether the
+        index is available
+        """
+        if self._has_full_text_index():
+            return True
+
+        try:
+            self._connection.executescript(FTS_SCHEMA)
+        except sqlite3.OperationalError:
+            # SQLite was built without FTS5 or the trigram tokenizer, texts are scanned
+            return False
+
+        # Index the messages of a database created without the index
+        self._connection.execute("INSERT INTO messages_fts (messages_fts) VALUES ('rebuild')")
+        self._connection.commit()
+        return True
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            raise DatabaseClosedError("The database {} is closed".format(self.path))
+        return self._connection
+
+    def start_run(self) -> int:
+        """
+        Records a new run and returns its' id
+        """
+        cursor = self.connection.execute("INSERT INTO runs (started) VALUES (?)", (_now(),))
+        self.connection.commit()
+        return cursor.lastrowid
+
+    def insert_result(self, run_id: int, result):
+        """
+        Inserts a `seproxer.main.SeproxerUrlResult` and its' validator messages
+        """
+        known_states = {s.name: s.is_state_reached for s in result.state_results if s.is_supported}
+        cursor = self.connection.execute(
+            "INSERT INTO results (run_id, uuid, url, status, time, known_states) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                run_id, result.uuid, result.url, result.status_code.name, _now(),
+                json.dumps(known_states, sort_keys=True),
+            ),
+        )
+        result_id = cursor.lastrowid
+
+        self.connection.executemany(
+            "INSERT INTO messages (result_id, validator, level, message, text, fingerprint) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            self._message_rows(result_id, result.validator_results),
+        )
+        if self.has_full_text_index:
+            self.connection.execute(
+                "INSERT INTO messages_fts (rowid, text) "
+                "SELECT id, text FROM messages WHERE result_id = ?",
+                (result_id,),
+            )
+
+    @staticmethod
+    def _message_rows(result_id: int, validator_results) -> t.Iterator[tuple]:
+        for validator_result in (
+                validator_results.error + validator_results.warning + validator_results.ok):
+            for text in fingerprints.result_texts(validator_result):
+                yield (
+                    result_id, validator_result.name, validator_result.status.name,
+                    validator_result.message, text, fingerprints.fingerprint(
+                        text, validator_result.name, validator_result.status.name),
+                )
+
+    def commit(self):
+        self.connection.commit()
+
+    def close(self):
+        if self._connection is not None:
+            if not self.read_only:
+                self._connection.commit()
+            self._connection.close()
+            self._connection = None
+
+    @staticmethod
+    def _recent_runs_clause(runs: t.Optional[int]) -> t.Tuple[str, tuple]:
+        if not runs:
+            return "", ()
+        return (
+            "AND results.run_id IN (SELECT id FROM runs ORDER BY id DESC LIMIT ?)",
+            (runs,),
+        )
+
+    def runs(self, limit: int=10) -> t.List[sqlite3.Row]:
+        """
+        Returns the most recent runs with the number of results of every status
+        """
+        return self.connection.execute(
+            "SELECT runs.id, runs.started, COUNT(results.id) AS results, "
+            "SUM(results.status = 'OK') AS ok, "
+            "SUM(results.status = 'WARNING') AS warning, "
+            "SUM(results.status = 'ERROR') AS error "
+            "FROM runs LEFT JOIN results ON results.run_id = runs.id "
+            "GROUP BY runs.id ORDER BY runs.id DESC LIMIT ?",
+            (limit,),
+        ).fetchall()
+
+    def url_history(self, url: str, limit: int=10) -> t.List[sqlite3.Row]:
+        """
+        Returns the most recent results of a URL
+        """
+        return self.connection.execute(
+            "SELECT run_id, uuid, url, status, time FROM results WHERE url = ? "
+            "ORDER BY id DESC LIMIT ?",
+            (url, limit),
+        ).fetchall()
+
+    def find_messages(self,
+                      text: t.Optional[str]=None,
+                      fingerprint: t.Optional[str]=None,
+                      level: t.Optional[str]=None,
+                      runs: t.Optional[int]=None,
+                      limit: t.Optional[int]=None) -> t.List[sqlite3.Row]:
+        """
+        Returns the messages, with their result's URL, that contain the text and/or have the
+        fingerprint
+
+        :param text: A substring of the message texts, texts of at least
+            `FTS_MIN_TEXT_LENGTH` characters are looked up in the full text index
+        :param fingerprint: The fingerprint of the messages
+        :param level: The level of the messages, for example: ERROR
+        :param runs: Only search the results of this number of most recent runs
+        :param limit: The maximum number of messages returned
+        """
+        conditions = ["1"]
+        parameters = []  # type: t.List[t.Any]
+        if text:
+            if self.has_full_text_index and len(text) >= FTS_MIN_TEXT_LENGTH:
+                # The index matches case insensitively, instr keeps the match exact
+                conditions.append(
+                    "messages.id IN (SELECT rowid FROM messages_fts WHERE messages_fts MATCH ?)")
+                parameters.append('"{}"'.format(text.replace('"', '""')))
+            conditions.append("instr(messages.text, ?) > 0")
+            parameters.append(text)
+        if fingerprint:
+            conditions.append("messages.fingerprint = ?")
+            parameters.append(fingerprint)
+        if level:
+            conditions.append("messages.level = ?")
+            parameters.append(level)
+
+        runs_clause, runs_parameters = self._recent_runs_clause(runs)
+        parameters.extend(runs_parameters)
+        parameters.append(limit or -1)
+
+        return self.connection.execute(
+            "SELECT results.run_id, results.url, results.uuid, messages.level, "
+            "messages.validator, messages.fingerprint, messages.text "
+            "FROM messages JOIN results ON results.id = messages.result_id "
+            "WHERE {} {} ORDER BY messages.id DESC LIMIT ?".format(
+                " AND ".join(conditions), runs_clause),
+            parameters,
+        ).fetchall()
+
+    def top_fingerprints(self,
+                         level: str="ERROR",
+                         runs: t.Optional[int]=None,
+                         limit: int=20) -> t.List[sqlite3.Row]:
+        """
+        Returns the most common message fingerprints with the number of URLs they occurred on
+        and an example message
+        """
+        runs_clause, runs_parameters = self._recent_runs_clause(runs)
+        return self.connection.execute(
+            "SELECT messages.fingerprint, COUNT(DISTINCT results.url) AS urls, "
+            "COUNT(*) AS occurrences, MAX(messages.text) AS example "
+            "FROM messages JOIN results ON results.id = messages.result_id "
+            "WHERE messages.level = ? {} GROUP BY messages.fingerprint "
+            "ORDER BY urls DESC, occurrences DESC LIMIT ?".format(runs_clause),
+            (level,) + runs_parameters + (limit,),
+        ).fetchall()
@@ -10,6 +10,8 @@ import time
 from seproxer.selenium_extensions import webdriver_factory
 from seproxer.selenium_extensions import states
 from seproxer.selenium_extensions import validators
+from seproxer.selenium_extensions import inspection
+import seproxer.selenium_extensions.states.base
 import seproxer.selenium_extensions.states.managers
 import seproxer.selenium_extensions.validators.managers
 import seproxer.options
@@ -91,6 +93,8 @@ class DriverController:
                  validator_manager: validators.managers.PageValidatorManager) -> None:
 
         self._webdriver = driver
+        # Set once, in-page waits of the states end on their own before the script timeout
+        self._webdriver.set_script_timeout(states.base.LoadedStateHandler.SCRIPT_TIMEOUT)
         self._loaded_state_manager = loaded_state_manager
         self._validator_manager = validator_manager
 
@@ -108,11 +112,27 @@ class DriverController:
                 except ControllerWaitTimeout:
                     logger.warning("ControllerWait state not reached for {}".format(url))
 
+            # Inspect the page for all states and validators in a single batched script, the
+            # states and validators only execute their own scripts when the inspected values
+            # are stale, that is, once a state had to be waited for
+            page_inspection = inspection.PageInspection()
+            self._loaded_state_manager.add_inspection_snippets(page_inspection)
+            self._validator_manager.add_inspection_snippets(page_inspection)
+            inspection_result = page_inspection.run(self._webdriver)
+
+            # Validators run as soon as the states they require are resolved
+            validation_schedule = self._validator_manager.schedule(
+                self._webdriver,
+                self._loaded_state_manager.state_names(),
+                inspection_result=inspection_result,
+            )
             # Perform our auditors -- also block until certain states are reached
-            state_results = self._loaded_state_manager.get_state_results(self._webdriver)
-            # After our the page reaches a testable state, now let's run all our validators on it
-            # TODO: Consider dependant graphs for validators based on states
-            validator_results = self._validator_manager.validate(self._webdriver)
+            state_results = self._loaded_state_manager.get_state_results(
+                self._webdriver,
+                inspection_result=inspection_result,
+                on_state_result=validation_schedule.state_resolved,
+            )
+            validator_results = validation_schedule.finish()
         except selenium_exceptions.WebDriverException as e:
             logging.exception("Failed result attempt for {}".format(url))
             raise ControllerResultsFailed(e)
@@ -123,8 +143,9 @@ class DriverController:
         self._webdriver.quit()
 
     @staticmethod
-    def from_options(options: seproxer.options.Options) -> "DriverController":
-        driver = webdriver_factory.get_webdriver(options)
+    def from_options(options: seproxer.options.Options,
+                     proxy_port: t.Optional[int]=None) -> "DriverController":
+        driver = webdriver_factory.get_webdriver(options, proxy_port=proxy_port)
         loaded_state_manager = states.managers.LoadedStateManager.from_options(options)
         validator_manager = validators.managers.PageValidatorManager.from_options(options)
 
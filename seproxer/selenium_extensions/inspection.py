@@ -0,0 +1,112 @@
+"""
+This module batches the javascript that loaded state handlers and page validators execute
+in a page.  Every handler and validator contributes a named snippet, a javascript expression,
+and all snippets are evaluated by a single script which returns a single JSON object.
+Inspecting a page then costs one WebDriver round-trip rather than one per state and validator.
+"""
+import typing as t
+import json
+
+import selenium.common.exceptions as selenium_exceptions
+from selenium.webdriver.remote import webdriver
+
+
+SCRIPT_TEMPLATE = """
+var snippets = [
+{snippets}
+];
+var results = {{}};
+var errors = {{}};
+for (var i = 0; i < snippets.length; i++) {{
+    try {{
+        results[snippets[i][0]] = snippets[i][1]();
+    }} catch (e) {{
+        errors[snippets[i][0]] = String(e);
+    }}
+}}
+return JSON.stringify({{results: results, errors: errors}});
+"""
+
+SNIPPET_TEMPLATE = "[{key}, function() {{ return ({snippet}); }}]"
+
+
+class Error(Exception):
+    """
+    Generic module level error
+    """
+
+
+class SnippetError(Error, selenium_exceptions.WebDriverException):
+    """
+    Exception is raised when retrieving the value of a snippet that threw an exception in
+    the page, which is how a failed `execute_script` call of the snippet would have failed
+    """
+
+
+def state_key(state_name: str, script_name: str) -> str:
+    return "state:{}:{}".format(state_name, script_name)
+
+
+def validator_key(validator_name: str) -> str:
+    return "validator:{}".format(validator_name)
+
+
+class InspectionResult:
+    """
+    The values of the snippets of an inspection.  A result is marked stale once the page may
+    have changed since it was inspected, for example, after waiting for a state.
+    """
+    def __init__(self,
+                 values: t.Optional[t.Dict[str, t.Any]]=None,
+                 errors: t.Optional[t.Dict[str, str]]=None) -> None:
+        self._values = values or {}
+        self._errors = errors or {}
+        self.stale = False
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._values or key in self._errors
+
+    def get(self, key: str, default: t.Any=None) -> t.Any:
+        """
+        :raises SnippetError: If the snippet threw an exception in the page
+        """
+        if key in self._errors:
+            raise SnippetError("Inspection snippet {} failed: {}".format(key, self._errors[key]))
+        return self._values.get(key, default)
+
+    def mark_stale(self):
+        self.stale = True
+
+
+class PageInspection:
+    """
+    A collection of named javascript snippets that are evaluated by a single script.  The
+    snippets are evaluated in the order they were added, a snippet that throws does not
+    prevent the following snippets from being evaluated.
+    """
+    def __init__(self) -> None:
+        self._snippets = []  # type: t.List[t.Tuple[str, str]]
+
+    def __len__(self) -> int:
+        return len(self._snippets)
+
+    def add(self, key: str, snippet: str):
+        """
+        :param key: The unique key of the snippet's value in the inspection result
+        :param snippet: A javascript expression, its' value must be JSON serializable
+        """
+        self._snippets.append((key, snippet))
+
+    @property
+    def script(self) -> str:
+        return SCRIPT_TEMPLATE.format(snippets=",\n".join(
+            SNIPPET_TEMPLATE.format(key=json.dumps(key), snippet=snippet)
+            for key, snippet in self._snippets
+        ))
+
+    def run(self, driver: webdriver) -> InspectionResult:
+        if not self._snippets:
+            return InspectionResult()
+
+        inspection = json.loads(driver.execute_script(self.script))
+        return InspectionResult(values=inspection["results"], errors=inspection["errors"])
@@ -0,0 +1,47 @@
+from seproxer.selenium_extensions.states import base
+
+from selenium.webdriver.remote import webdriver
+
+
+class ActivityIdleLoadedState(base.LoadedStateHandler):
+    """
+    This loaded state uses the activity tracker that the proxy injects into pages, see
+    `seproxer/javascript/injectables/activity_tracker.js`, and is reached once the document
+    is loaded and there were no pending XMLHttpRequests, fetch requests or short timers for
+    the quiet time.  Unlike framework specific states it works for any page.
+    """
+    SUPPORTED_SCRIPT = "window.__seproxer_activity !== undefined"
+    CHECK_SCRIPT_TEMPLATE = (
+        "(window.__seproxer_activity !== undefined) && window.__seproxer_activity.isIdle({})"
+    )
+    READY_SCRIPT_TEMPLATE = """
+        var callback = arguments[arguments.length - 1];
+        if (window.__seproxer_activity === undefined) {{
+            callback(false);
+            return;
+        }}
+        window.__seproxer_activity.whenIdle({}, callback);
+    """
+
+    def __init__(self, timeout: int=0, quiet_time: int=500) -> None:
+        """
+        :param quiet_time: The number of milliseconds the page must be idle for
+        """
+        super().__init__(timeout=timeout)
+        self._check_script = self.CHECK_SCRIPT_TEMPLATE.format(int(quiet_time))
+        self._ready_script = self.READY_SCRIPT_TEMPLATE.format(int(quiet_time))
+
+    def is_state_supported(self, driver: webdriver):
+        return driver.execute_script("return ({})".format(self.SUPPORTED_SCRIPT))
+
+    def check(self, driver: webdriver):
+        return driver.execute_script("return ({})".format(self._check_script))
+
+    def supported_script(self):
+        return self.SUPPORTED_SCRIPT
+
+    def check_script(self):
+        return self._check_script
+
+    def ready_script(self):
+        return self._ready_script
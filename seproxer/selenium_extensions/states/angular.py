@@ -8,15 +8,41 @@ class AngularLoadedState(base.LoadedStateHandler):
     This loaded state checks to see if Angular is part of the application and if so,
     checks to make sure angular
     """
+    # We simply need to know if angular is available
+    SUPPORTED_SCRIPT = "window.angular !== undefined"
+    CHECK_SCRIPT = (
+        "(window.angular !== undefined) && "
+        "(angular.element(document).injector() !== undefined) && "
+        "(angular.element(document).injector().get('$http').pendingRequests.length === 0)"
+    )
+
+    # Angular notifies the callback once there are no outstanding $http requests and
+    # $timeout callbacks, which is also how protractor waits for angular
+    READY_SCRIPT = """
+        var callback = arguments[arguments.length - 1];
+        if (window.angular === undefined ||
+                angular.element(document).injector() === undefined) {
+            callback(false);
+            return;
+        }
+        angular.element(document).injector().get('$browser').notifyWhenNoOutstandingRequests(
+            function() {
+                callback(true);
+            }
+        );
+    """
+
     def is_state_supported(self, driver: webdriver):
-        """
-        We simply need to know if angular is available
-        """
-        return driver.execute_script("return (window.angular !== undefined)")
+        return driver.execute_script("return ({})".format(self.SUPPORTED_SCRIPT))
 
     def check(self, driver: webdriver):
-        return driver.execute_script(
-            "return (window.angular !== undefined) && "
-            "(angular.element(document).injector() !== undefined) && "
-            "(angular.element(document).injector().get('$http').pendingRequests.length === 0)"
-        )
+        return driver.execute_script("return ({})".format(self.CHECK_SCRIPT))
+
+    def supported_script(self):
+        return self.SUPPORTED_SCRIPT
+
+    def check_script(self):
+        return self.CHECK_SCRIPT
+
+    def ready_script(self):
+        return self.READY_SCRIPT
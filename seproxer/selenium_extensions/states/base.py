@@ -1,8 +1,39 @@
 import abc
 import time
+import typing as t
 
 from seproxer.selenium_extensions import states
 from selenium.webdriver.remote import webdriver
+import selenium.common.exceptions as selenium_exceptions
+
+
+# The activity tracker counts short timeouts as pending page activity, in-page waits use its'
+# untracked setTimeout for their wait time when the tracker was injected
+SET_WAIT_TIMER_SCRIPT = (
+    "((window.__seproxer_activity !== undefined) ? "
+    "window.__seproxer_activity.setTimeout : window.setTimeout)"
+)
+
+# Waits in the page for a ready script until it calls back or the wait time passed, in which
+# case the callback is called with null
+READY_WAIT_TEMPLATE = """
+var callback = arguments[arguments.length - 1];
+var isDone = false;
+var timerId = null;
+var finish = function(isReady) {{
+    if (!isDone) {{
+        isDone = true;
+        clearTimeout(timerId);
+        callback(isReady);
+    }}
+}};
+timerId = {set_timer}.call(window, function() {{
+    finish(null);
+}}, {wait_time});
+(function() {{
+{ready_script}
+}})(finish);
+"""
 
 
 class LoadedStateHandler(metaclass=abc.ABCMeta):
@@ -10,6 +41,15 @@ class LoadedStateHandler(metaclass=abc.ABCMeta):
     This is an abstract class for defining that a given web driver
     is on a page that is in a loaded state.
     """
+    # The time between two checks while polling for the state
+    POLL_INTERVAL = 0.2
+    # The maximum time of a single in-page wait of a `ready_script`, waits without a timeout
+    # are repeated until the state is reached
+    READY_SCRIPT_TIMEOUT = 30.0
+    # The script timeout drivers are set up with, in-page waits end on their own after their
+    # wait time so that the script timeout of a driver is never changed
+    SCRIPT_TIMEOUT = READY_SCRIPT_TIMEOUT + 5.0
+
     def __init__(self, timeout: int=0) -> None:
         self._timeout = timeout
 
@@ -39,19 +79,77 @@ class LoadedStateHandler(metaclass=abc.ABCMeta):
         is in the state expected for the implemented state handler.
         """
 
+    def supported_script(self) -> t.Optional[str]:
+        """
+        A javascript expression that evaluates to the result of `is_state_supported`, which
+        allows the check to be batched with the scripts of other states and validators.
+        Handlers that can not be expressed as a script return None.
+        """
+        return None
+
+    def check_script(self) -> t.Optional[str]:
+        """
+        A javascript expression that evaluates to the result of `check`, see
+        `supported_script`
+        """
+        return None
+
+    def ready_script(self) -> t.Optional[str]:
+        """
+        The body of an asynchronous javascript function that waits in the page for the state,
+        it must call its' last argument, the callback, with true once the state is reached or
+        with false when it is unable to wait, for example, when the application has not
+        bootstrapped yet.
+
+        Waiting in the page ends as soon as the state is reached rather than on the next
+        polling tick of `check`.  Handlers without an in-page wait return None.
+        """
+        return None
+
+    def _block_until_ready(self, driver: webdriver, ready_script: str) -> bool:
+        start_time = time.time()
+        while True:
+            wait_time = self.READY_SCRIPT_TIMEOUT
+            if self._timeout:
+                wait_time = min(wait_time, self._timeout - (time.time() - start_time))
+                if wait_time <= 0:
+                    raise states.StateNotReached(
+                        "Timed out while waiting for state to be reached")
+
+            try:
+                is_ready = driver.execute_async_script(READY_WAIT_TEMPLATE.format(
+                    set_timer=SET_WAIT_TIMER_SCRIPT,
+                    wait_time=max(int(wait_time * 1000), 1),
+                    ready_script=ready_script,
+                ))
+            except selenium_exceptions.TimeoutException:
+                continue
+            if is_ready:
+                return True
+            if is_ready is None:
+                # The wait time passed
+                continue
+            # The page was unable to wait for the state, try again on the next tick
+            time.sleep(self.POLL_INTERVAL)
+
     def block_until_state(self, driver) -> bool:
         """
         Will continue in a blocking loop until the driver reaches the expected state
         or the time exceeds the specified timeout.
 
+        The state is waited for in the page when the handler provides a `ready_script`,
+        otherwise `check` is polled.
+
         :param driver: The Selenium WebDriver object that needs its' state verified.
         """
+        ready_script = self.ready_script()
+        if ready_script is not None:
+            return self._block_until_ready(driver, ready_script)
+
         start_time = time.time() if self._timeout else None
 
-        # TODO: When more states get implemented, it would probably be a good idea to make this
-        # an async coroutine so we can sleep and let another state validator have a go!
         while not self.check(driver):
-            time.sleep(0.2)
+            time.sleep(self.POLL_INTERVAL)
 
             if start_time and (time.time() - start_time) >= self._timeout:
                 raise states.StateNotReached("Timed out while waiting for state to be reached")
@@ -1,36 +1,185 @@
 import typing as t
 import logging
+import json
+import time
 
 import seproxer.options
 
 from seproxer.selenium_extensions import states
+from seproxer.selenium_extensions import inspection
 import seproxer.selenium_extensions.states.base
 import seproxer.selenium_extensions.states.angular
+import seproxer.selenium_extensions.states.activity
 
 from selenium.webdriver.remote import webdriver
+import selenium.common.exceptions as selenium_exceptions
 
 
 logger = logging.getLogger(__name__)
 
 
+# Registers the ready scripts of the pending states in the page, once per URL.  Every state
+# reports to the "window.__seproxer_ready_states" registry once it is reached or when it is
+# unable to wait for the state in the page, the states that reported right away are returned.
+REGISTER_READY_SCRIPTS_TEMPLATE = """
+var registry = window.__seproxer_ready_states = {{
+    startTime: new Date().getTime(),
+    reports: {{}},
+    listeners: []
+}};
+var readyScripts = [
+{ready_scripts}
+];
+readyScripts.forEach(function(readyScript) {{
+    var report = function(isReady) {{
+        // Reports to a registry that was replaced, by the states of a later URL, are ignored
+        if (window.__seproxer_ready_states !== registry ||
+                registry.reports.hasOwnProperty(readyScript[0])) {{
+            return;
+        }}
+        registry.reports[readyScript[0]] = {{
+            ready: Boolean(isReady),
+            elapsed: new Date().getTime() - registry.startTime
+        }};
+        registry.listeners.slice().forEach(function(listener) {{
+            listener();
+        }});
+    }};
+    try {{
+        readyScript[1](report);
+    }} catch (e) {{
+        report(false);
+    }}
+}});
+return JSON.stringify(registry.reports);
+"""
+
+# Waits for one of the registered states to report, or for the wait time to pass, and calls
+# the callback with all reports of the registry, null when the page no longer has a registry.
+WAIT_FOR_READY_STATES_TEMPLATE = """
+var callback = arguments[arguments.length - 1];
+var registry = window.__seproxer_ready_states;
+if (registry === undefined) {{
+    callback(null);
+    return;
+}}
+var names = {names};
+var isDone = false;
+var timerId = null;
+var listener = null;
+var finish = function() {{
+    if (isDone) {{
+        return;
+    }}
+    isDone = true;
+    clearTimeout(timerId);
+    registry.listeners.splice(registry.listeners.indexOf(listener), 1);
+    callback(JSON.stringify(registry.reports));
+}};
+listener = function() {{
+    for (var i = 0; i < names.length; i++) {{
+        if (registry.reports.hasOwnProperty(names[i])) {{
+            finish();
+            return;
+        }}
+    }}
+}};
+registry.listeners.push(listener);
+timerId = {set_timer}.call(window, finish, {wait_time});
+listener();
+"""
+
+READY_SCRIPT_TEMPLATE = "[{name}, function() {{ {ready_script} }}]"
+
+
 class StateResult:
-    def __init__(self, name: str, is_supported: bool, is_state_reached: bool) -> None:
+    def __init__(self, name: str, is_supported: bool, is_state_reached: bool,
+                 elapsed_time: t.Optional[float]=None) -> None:
+        """
+        :param elapsed_time: The number of seconds, since the states started being audited,
+            it took for the state to be reached or given up on.  None for unsupported states.
+        """
         self.name = name
         self.is_supported = is_supported
         self.is_state_reached = is_state_reached
+        self.elapsed_time = elapsed_time
+
+
+# Called with every StateResult as soon as its' state is resolved
+StateResultCallback = t.Callable[[StateResult], None]
+
+
+def _ignore_state_result(state_result: StateResult):
+    pass
 
 
 class LoadedStateManager:
     def __init__(self,
                  state_auditors: t.Iterable[states.base.LoadedStateHandler]=None,
-                 timeout_time: int=0
+                 timeout_time: int=0,
+                 concurrent: bool=False,
                  ) -> None:
+        """
+        :param timeout_time: The time, in seconds, all states of a page share to be reached
+            when they are audited concurrently, 0 for no timeout.
+        :param concurrent: Audit all supported states together rather than waiting for each
+            state, with its' own timeout, one after another.  The ready scripts of the states
+            are registered in the page once, see `_register_ready_states`.
+        """
         if state_auditors is None:
             state_auditors = []
         self._state_auditors = {s.name(): s for s in state_auditors}
         self._timeout_time = timeout_time
+        self._concurrent = concurrent
 
-    def get_state_results(self, driver: webdriver) -> t.List[StateResult]:
+    def state_names(self) -> t.List[str]:
+        return list(self._state_auditors)
+
+    def add_inspection_snippets(self, page_inspection: inspection.PageInspection):
+        """
+        Adds the support and check scripts of the state handlers to a batched inspection
+        """
+        for name, state in self._state_auditors.items():
+            supported_script = state.supported_script()
+            check_script = state.check_script()
+            if supported_script is None or check_script is None:
+                continue
+            page_inspection.add(inspection.state_key(name, "supported"), supported_script)
+            page_inspection.add(inspection.state_key(name, "check"), check_script)
+
+    @staticmethod
+    def _get_inspected(inspection_result: t.Optional[inspection.InspectionResult],
+                       key: str) -> t.Optional[bool]:
+        """
+        Returns the inspected value of a state script, None when it must be executed
+        """
+        if inspection_result is None or inspection_result.stale or key not in inspection_result:
+            return None
+        return bool(inspection_result.get(key))
+
+    def _is_state_supported(self,
+                            driver: webdriver,
+                            name: str,
+                            state: states.base.LoadedStateHandler,
+                            inspection_result: t.Optional[inspection.InspectionResult]) -> bool:
+        is_state_supported = self._get_inspected(
+            inspection_result, inspection.state_key(name, "supported"))
+        if is_state_supported is None:
+            is_state_supported = state.is_state_supported(driver)
+
+        if not is_state_supported:
+            logger.debug(
+                "Ignored LoadedState %s checker, not supported for URL: %s",
+                state.name(),
+                driver.current_url,
+            )
+        return bool(is_state_supported)
+
+    def get_state_results(self,
+                          driver: webdriver,
+                          inspection_result: t.Optional[inspection.InspectionResult]=None,
+                          on_state_result: t.Optional[StateResultCallback]=None,
+                          ) -> t.List[StateResult]:
         """
         Returns a list of StateResults that are produced by auditing the contents
         and/or javascript execution of a web page using the webdriver.
@@ -39,32 +188,240 @@ class LoadedStateManager:
         desired state.  For example, if we have determined that a web page performs
         additional network requests, in order for the state to be fulfilled, it must
         wait for all the network requests to be resolved.
+
+        :param inspection_result: The result of a batched inspection that contains the
+            scripts of the state handlers, see `add_inspection_snippets`.  The inspected
+            values are only used until a state has to be waited for, after which the result
+            is marked stale.
+        :param on_state_result: Called with every StateResult as soon as the state is
+            resolved, before the remaining states are waited for.
         """
+        if on_state_result is None:
+            on_state_result = _ignore_state_result
+        if self._concurrent:
+            return self._get_concurrent_state_results(driver, inspection_result, on_state_result)
+        return self._get_sequential_state_results(driver, inspection_result, on_state_result)
+
+    def _get_sequential_state_results(self,
+                                      driver: webdriver,
+                                      inspection_result: t.Optional[inspection.InspectionResult],
+                                      on_state_result: StateResultCallback,
+                                      ) -> t.List[StateResult]:
+        start_time = time.time()
         state_results = []
-        for state in self._state_auditors.values():
-            is_supported = False
-            is_reached = False
-            if state.is_state_supported(driver):
-                is_supported = True
+        for name, state in self._state_auditors.items():
+            if not self._is_state_supported(driver, name, state, inspection_result):
+                state_results.append(StateResult(name, False, False))
+                on_state_result(state_results[-1])
+                continue
+
+            is_reached = bool(self._get_inspected(
+                inspection_result, inspection.state_key(name, "check")))
+            if not is_reached:
+                if inspection_result is not None:
+                    inspection_result.mark_stale()
                 try:
                     is_reached = state.block_until_state(driver)
                 except states.StateNotReached:
                     pass
+
+            state_results.append(
+                StateResult(name, True, is_reached, elapsed_time=time.time() - start_time)
+            )
+            on_state_result(state_results[-1])
+        return state_results
+
+    def _check_states(self,
+                      driver: webdriver,
+                      pending_states: t.Dict[str, states.base.LoadedStateHandler]
+                      ) -> t.List[str]:
+        """
+        Checks the pending states, the scripts of the states are checked in a single batched
+        inspection, returns the names of the reached states
+        """
+        page_inspection = inspection.PageInspection()
+        reached = []
+        for name, state in pending_states.items():
+            check_script = state.check_script()
+            if check_script is not None:
+                page_inspection.add(inspection.state_key(name, "check"), check_script)
+            elif state.check(driver):
+                reached.append(name)
+
+        inspection_result = page_inspection.run(driver)
+        reached.extend(
+            name for name in pending_states
+            if inspection_result.get(inspection.state_key(name, "check"))
+        )
+        return reached
+
+    @staticmethod
+    def _parse_ready_reports(reports: str) -> t.Dict[str, t.Tuple[bool, float]]:
+        """
+        Returns whether the reported states were reached and the number of seconds, since the
+        ready scripts were registered, it took for them to report
+        """
+        return {
+            name: (report["ready"], report["elapsed"] / 1000.0)
+            for name, report in json.loads(reports).items()
+        }
+
+    def _register_ready_states(self,
+                               driver: webdriver,
+                               ready_states: t.Dict[str, states.base.LoadedStateHandler],
+                               ) -> t.Dict[str, t.Tuple[bool, float]]:
+        """
+        Registers the ready scripts of the states in the page, returns the states that
+        reported right away, see `_parse_ready_reports`.  States that report false are unable
+        to wait for the state in the page.
+        """
+        script = REGISTER_READY_SCRIPTS_TEMPLATE.format(
+            ready_scripts=",\n".join(
+                READY_SCRIPT_TEMPLATE.format(
+                    name=json.dumps(name), ready_script=state.ready_script())
+                for name, state in ready_states.items()
+            ),
+        )
+        return self._parse_ready_reports(driver.execute_script(script))
+
+    def _wait_for_ready_states(self,
+                               driver: webdriver,
+                               names: t.List[str],
+                               wait_time: float,
+                               ) -> t.Optional[t.Dict[str, t.Tuple[bool, float]]]:
+        """
+        Waits in the page until one of the registered states reports or the wait time passed,
+        returns all reports, None when the page lost the registered ready scripts, for
+        example, after it navigated.
+        """
+        script = WAIT_FOR_READY_STATES_TEMPLATE.format(
+            names=json.dumps(names),
+            set_timer=states.base.SET_WAIT_TIMER_SCRIPT,
+            wait_time=max(int(wait_time * 1000), 1),
+        )
+        try:
+            reports = driver.execute_async_script(script)
+        except selenium_exceptions.TimeoutException:
+            return {}
+        if reports is None:
+            return None
+        return self._parse_ready_reports(reports)
+
+    def _get_concurrent_state_results(self,
+                                      driver: webdriver,
+                                      inspection_result: t.Optional[inspection.InspectionResult],
+                                      on_state_result: StateResultCallback,
+                                      ) -> t.List[StateResult]:
+        """
+        Waits for all supported states together until they are reached or the shared timeout
+        passes, the timeouts of the state handlers are not used.
+
+        The ready scripts of the states are registered in the page once and the states are
+        waited for until one of them reports, the remaining states, and states that are
+        unable to wait in the page, are polled.  While states are polled the in-page wait
+        ends after a poll interval.
+        """
+        start_time = time.time()
+        # The states were checked by the inspection, the first check of ours can wait a tick
+        is_checked = inspection_result is not None and not inspection_result.stale
+        state_results = {}  # type: t.Dict[str, StateResult]
+        pending_states = {}  # type: t.Dict[str, states.base.LoadedStateHandler]
+        for name, state in self._state_auditors.items():
+            if not self._is_state_supported(driver, name, state, inspection_result):
+                state_results[name] = StateResult(name, False, False)
+            elif self._get_inspected(inspection_result, inspection.state_key(name, "check")):
+                state_results[name] = StateResult(name, True, True, elapsed_time=0.0)
             else:
+                pending_states[name] = state
+
+        # The states that were resolved by the inspection are reported while it is current
+        for state_result in list(state_results.values()):
+            on_state_result(state_result)
+
+        if pending_states and inspection_result is not None:
+            inspection_result.mark_stale()
+
+        polled_states = {
+            name: state for name, state in pending_states.items()
+            if state.ready_script() is None
+        }
+        registered_time = time.time() - start_time
+
+        def resolve_reported(reported: t.Dict[str, t.Tuple[bool, float]]):
+            for name, (is_reached, elapsed_time) in reported.items():
+                if name not in pending_states or name in polled_states:
+                    continue
+                if not is_reached:
+                    polled_states[name] = pending_states[name]
+                    continue
+                del pending_states[name]
+                state_results[name] = StateResult(
+                    name, True, True, elapsed_time=registered_time + elapsed_time)
+                on_state_result(state_results[name])
+
+        if len(polled_states) < len(pending_states):
+            resolve_reported(self._register_ready_states(driver, {
+                name: state for name, state in pending_states.items()
+                if name not in polled_states
+            }))
+
+        while pending_states:
+            waiting_names = [name for name in pending_states if name not in polled_states]
+            if waiting_names:
+                wait_time = states.base.LoadedStateHandler.READY_SCRIPT_TIMEOUT
+                if polled_states:
+                    wait_time = states.base.LoadedStateHandler.POLL_INTERVAL
+                if self._timeout_time:
+                    wait_time = min(wait_time, self._timeout_time - (time.time() - start_time))
+
+                reported = self._wait_for_ready_states(driver, waiting_names, wait_time)
+                if reported is None:
+                    polled_states.update((name, pending_states[name]) for name in waiting_names)
+                else:
+                    resolve_reported(reported)
+            elif is_checked:
+                time.sleep(states.base.LoadedStateHandler.POLL_INTERVAL)
+            is_checked = True
+
+            if polled_states:
+                reached = self._check_states(driver, polled_states)
+                elapsed_time = time.time() - start_time
+                for name in reached:
+                    del pending_states[name]
+                    del polled_states[name]
+                    state_results[name] = StateResult(
+                        name, True, True, elapsed_time=elapsed_time)
+                    on_state_result(state_results[name])
+
+            elapsed_time = time.time() - start_time
+            if pending_states and self._timeout_time and elapsed_time >= self._timeout_time:
                 logger.debug(
-                    "Ignored LoadedState %s checker, not supported for URL: %s",
-                    state.name(),
+                    "Timed out waiting for LoadedStates %s for URL: %s",
+                    ", ".join(pending_states),
                     driver.current_url,
                 )
-            state_results.append(
-                StateResult(state.name(), is_supported, is_reached)
-            )
-        return state_results
+                for name in pending_states:
+                    state_results[name] = StateResult(
+                        name, True, False, elapsed_time=elapsed_time)
+                    on_state_result(state_results[name])
+                break
+
+        return [state_results[name] for name in self._state_auditors]
 
     @staticmethod
     def from_options(options: seproxer.options.Options) -> "LoadedStateManager":
         state_auditors = []
         if options.check_angular_app:
-            state_auditors.append(states.angular.AngularLoadedState())
+            state_auditors.append(
+                states.angular.AngularLoadedState(timeout=options.angular_state_timeout))
+        if options.check_activity_state:
+            state_auditors.append(states.activity.ActivityIdleLoadedState(
+                timeout=options.activity_state_timeout,
+                quiet_time=options.activity_quiet_time,
+            ))
 
-        return LoadedStateManager(state_auditors=state_auditors)
+        return LoadedStateManager(
+            state_auditors=state_auditors,
+            timeout_time=options.state_timeout,
+            concurrent=options.concurrent_states,
+        )
@@ -4,6 +4,7 @@ import typing as t
 import logging
 
 from seproxer import seproxer_enums
+from seproxer.selenium_extensions.states import activity
 
 import selenium.webdriver.remote.webdriver
 
@@ -55,11 +56,15 @@ class PageValidatorResults:
                  ok: t.Optional[t.List[Result]]=None,
                  warning: t.Optional[t.List[Result]]=None,
                  error: t.Optional[t.List[Result]]=None,
+                 skipped: t.Optional[t.List[str]]=None,
                  ) -> None:
-
+        """
+        :param skipped: The names of the validators that were skipped
+        """
         self._ok = ok or []
         self._warning = warning or []
         self._error = error or []
+        self._skipped = skipped or []
 
     def append(self, result: Result):
         if result.status is seproxer_enums.ResultLevel.OK:
@@ -69,6 +74,9 @@ class PageValidatorResults:
         else:
             self._error.append(result)
 
+    def skip(self, validator_name: str):
+        self._skipped.append(validator_name)
+
     def overall_status(self):
         if self._error:
             return seproxer_enums.ResultLevel.ERROR
@@ -88,12 +96,25 @@ class PageValidatorResults:
     def error(self):
         return self._error.copy()
 
+    @property
+    def skipped(self):
+        return self._skipped.copy()
+
 
 class PageValidator(metaclass=abc.ABCMeta):
     """
     Interface for defining a page validator class which is used to validate
     the result of a loaded page.
     """
+    # The names of the loaded states the validator requires to be resolved before it runs,
+    # None requires all states.  The validator is skipped when any of the named states is
+    # not supported by the page, or not audited, unless `requires_supported_states` is unset.
+    required_states = None  # type: t.Optional[t.Tuple[str, ...]]
+    # Validators that don't require supported states only wait for their required states,
+    # those that are not audited are ignored.  When none of them is audited the validator
+    # waits for all states.
+    requires_supported_states = True
+
     @classmethod
     def class_name(cls):
         return cls.__name__
@@ -108,6 +129,21 @@ class PageValidator(metaclass=abc.ABCMeta):
         Performs the validation method and returns a Result object of the validation result.
         """
 
+    def inspection_script(self) -> t.Optional[str]:
+        """
+        A javascript expression whose value the validator requires, which allows it to be
+        batched with the scripts of states and other validators.  When a script is provided,
+        `extend_results_from_inspection` is called with its' value instead of `extend_results`.
+        """
+        return None
+
+    def extend_results_from_inspection(self, driver: selenium.webdriver.remote.webdriver,
+                                       inspected: t.Any, results: PageValidatorResults):
+        """
+        Performs the validation method with the value of the `inspection_script`
+        """
+        self.extend_results(driver, results)
+
 
 # This type allows any subclasses of PageValidator to work
 PageValidatorType = t.TypeVar("PageValidatorType", bound=PageValidator)
@@ -121,6 +157,11 @@ class ConsoleErrorValidator(PageValidator):
     WARNING_MESSAGE = "Warnings and/or network errors in the console were present"
     INFO_MESSAGE = "Info messages in the console were present"
 
+    # Console messages are logged until the page has no more pending requests and timers,
+    # which the activity state waits for, regardless of the framework of the page
+    required_states = (activity.ActivityIdleLoadedState.class_name(),)
+    requires_supported_states = False
+
     def __init__(self, check_js_injected_console: bool=False) -> None:
         self._check_js_injected_console = check_js_injected_console
 
@@ -167,10 +208,7 @@ class ConsoleErrorValidator(PageValidator):
         return info, warnings, errors
 
     @staticmethod
-    def _get_result_from_injected_js(driver: selenium.webdriver.remote.webdriver
-                                     ) -> t.Tuple[set, set, set]:
-        # TODO: put the container variable name in a static location
-        log_container = driver.execute_script("return window.__seproxer_logs;")
+    def _get_result_from_injected_js(log_container: t.Optional[dict]) -> t.Tuple[set, set, set]:
         if not log_container:
             logger.warning("Unable to extract __seproxer_logs from js console")
             log_container = {}
@@ -181,14 +219,30 @@ class ConsoleErrorValidator(PageValidator):
 
         return info, warnings, errors
 
+    def inspection_script(self):
+        if self._check_js_injected_console:
+            # TODO: put the container variable name in a static location
+            return "window.__seproxer_logs"
+        # The browser log can only be retrieved through the webdriver
+        return None
+
     def extend_results(self, driver: selenium.webdriver.remote.webdriver,
                        results: PageValidatorResults):
-        # TODO: The following is ugly, could be significantly improved, it'll do for now
         if self._check_js_injected_console:
-            info, warnings, errors = self._get_result_from_injected_js(driver)
+            self.extend_results_from_inspection(
+                driver, driver.execute_script("return {};".format(self.inspection_script())),
+                results,
+            )
         else:
-            info, warnings, errors = self._get_result_from_driver_log(driver)
+            self._extend_results(self._get_result_from_driver_log(driver), results)
+
+    def extend_results_from_inspection(self, driver: selenium.webdriver.remote.webdriver,
+                                       inspected: t.Any, results: PageValidatorResults):
+        self._extend_results(self._get_result_from_injected_js(inspected), results)
 
+    def _extend_results(self, console_messages: t.Tuple[set, set, set],
+                        results: PageValidatorResults):
+        info, warnings, errors = console_messages
         if info:
             results.append(self._get_as_result(list(info), seproxer_enums.ResultLevel.OK))
         if warnings:
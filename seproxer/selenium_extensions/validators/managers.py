@@ -1,9 +1,124 @@
 import typing as t
+import logging
 
 import seproxer.options
 from seproxer import seproxer_enums
 
 from seproxer.selenium_extensions import validators
+from seproxer.selenium_extensions import inspection
+from seproxer.selenium_extensions.states import managers as states_managers
+
+from selenium.webdriver.remote import webdriver
+
+
+logger = logging.getLogger(__name__)
+
+
+def _add_inspection_snippets(page_inspection: inspection.PageInspection,
+                             page_validators: t.Dict[str, validators.PageValidatorType]):
+    for name, validator in page_validators.items():
+        script = validator.inspection_script()
+        if script is not None:
+            page_inspection.add(inspection.validator_key(name), script)
+
+
+def _extend_results(driver: webdriver,
+                    page_validators: t.Dict[str, validators.PageValidatorType],
+                    inspection_result: t.Optional[inspection.InspectionResult],
+                    results: validators.PageValidatorResults):
+    """
+    Runs the validators, when there is no inspection result or the result is stale, the
+    inspection scripts of the validators are inspected in a new batch
+    """
+    if inspection_result is None or inspection_result.stale:
+        page_inspection = inspection.PageInspection()
+        _add_inspection_snippets(page_inspection, page_validators)
+        inspection_result = page_inspection.run(driver)
+
+    # TODO: implement this via async coroutines
+    for name, validator in page_validators.items():
+        key = inspection.validator_key(name)
+        if key in inspection_result:
+            validator.extend_results_from_inspection(driver, inspection_result.get(key), results)
+        else:
+            validator.extend_results(driver, results)
+
+
+class ValidationSchedule:
+    """
+    Runs the validators of a page as soon as the loaded states they require are resolved,
+    that is, the states are either reached, timed out or not supported by the page.
+    Validators that require a state that is not supported by the page, or not audited at
+    all, are skipped, see `PageValidator.requires_supported_states`.  Skipped validators
+    are listed by the results.
+    """
+    def __init__(self,
+                 driver: webdriver,
+                 page_validators: t.Dict[str, validators.PageValidatorType],
+                 state_names: t.Iterable[str],
+                 inspection_result: t.Optional[inspection.InspectionResult]=None) -> None:
+        self._driver = driver
+        self._pending_validators = page_validators.copy()
+        self._state_names = frozenset(state_names)
+        self._inspection_result = inspection_result
+        self._state_results = {}  # type: t.Dict[str, states_managers.StateResult]
+        self._results = validators.PageValidatorResults()
+
+        # Validators that require no states run right away
+        self._run_ready_validators()
+
+    def _get_required_states(self, validator: validators.PageValidatorType) -> t.FrozenSet[str]:
+        if validator.required_states is None:
+            return self._state_names
+        required_states = frozenset(validator.required_states)
+        if not validator.requires_supported_states and not required_states & self._state_names:
+            return self._state_names
+        return required_states
+
+    def _is_skipped(self, validator: validators.PageValidatorType) -> bool:
+        if validator.required_states is None or not validator.requires_supported_states:
+            return False
+        return any(
+            name not in self._state_names or not self._state_results[name].is_supported
+            for name in validator.required_states
+        )
+
+    def _run_ready_validators(self):
+        ready_validators = {}  # type: t.Dict[str, validators.PageValidatorType]
+        for name, validator in list(self._pending_validators.items()):
+            required_states = self._get_required_states(validator)
+            # States that are not audited are never resolved, but they cause a skip
+            if not (required_states & self._state_names).issubset(self._state_results):
+                continue
+
+            del self._pending_validators[name]
+            if self._is_skipped(validator):
+                logger.debug(
+                    "Skipped validator %s, required states not supported for URL: %s",
+                    name,
+                    self._driver.current_url,
+                )
+                self._results.skip(name)
+            else:
+                ready_validators[name] = validator
+
+        if ready_validators:
+            _extend_results(self._driver, ready_validators, self._inspection_result, self._results)
+
+    def state_resolved(self, state_result: states_managers.StateResult):
+        self._state_results[state_result.name] = state_result
+        self._run_ready_validators()
+
+    def finish(self) -> validators.PageValidatorResults:
+        """
+        Runs the validators whose states were not resolved, returns the results of all
+        validators
+        """
+        if self._pending_validators:
+            _extend_results(
+                self._driver, self._pending_validators, self._inspection_result, self._results)
+            self._pending_validators = {}
+        return self._results
 
 
 class PageValidatorManager:
@@ -21,14 +136,40 @@ class PageValidatorManager:
     def get_validator(self, validator_name: str):
         return self._validators.get(validator_name)
 
-    def validate(self, driver) -> validators.PageValidatorResults:
-        # TODO: implement this via async coroutines
-        results = validators.PageValidatorResults()
-        for validator in self._validators.values():
-            validator.extend_results(driver, results)
+    def add_inspection_snippets(self, page_inspection: inspection.PageInspection):
+        """
+        Adds the inspection scripts of the validators to a batched inspection
+        """
+        _add_inspection_snippets(page_inspection, self._validators)
+
+    def validate(self,
+                 driver,
+                 inspection_result: t.Optional[inspection.InspectionResult]=None
+                 ) -> validators.PageValidatorResults:
+        """
+        Runs all validators regardless of their required states
 
+        :param inspection_result: The result of a batched inspection that contains the
+            inspection scripts of the validators.  When there is no result or the result is
+            stale, the scripts are inspected in a new batch.
+        """
+        results = validators.PageValidatorResults()
+        _extend_results(driver, self._validators, inspection_result, results)
         return results
 
+    def schedule(self,
+                 driver,
+                 state_names: t.Iterable[str],
+                 inspection_result: t.Optional[inspection.InspectionResult]=None
+                 ) -> ValidationSchedule:
+        """
+        Returns a schedule that runs the validators as the audited states are resolved, see
+        `ValidationSchedule`
+
+        :param state_names: The names of the states that are audited for the page
+        """
+        return ValidationSchedule(driver, self._validators, state_names, inspection_result)
+
     @staticmethod
     def from_options(options: seproxer.options.Options) -> "PageValidatorManager":
         managed_validators = []
@@ -1,4 +1,5 @@
 import functools
+import typing as t
 
 import seproxer.seproxer_enums
 from seproxer import options
@@ -42,9 +43,9 @@ def register_factory(browser_type: seproxer.seproxer_enums.SeleniumBrowserTypes)
 
 
 @register_factory(seproxer.seproxer_enums.SeleniumBrowserTypes.CHROME)
-def chrome_webdriver(opts: options.Options) -> selenium.webdriver.Chrome:
+def chrome_webdriver(opts: options.Options, proxy_port: int) -> selenium.webdriver.Chrome:
     chrome_options = selenium.webdriver.ChromeOptions()
-    chrome_options.add_argument("--proxy-server=127.0.0.1:{}".format(opts.mitmproxy_port))
+    chrome_options.add_argument("--proxy-server=127.0.0.1:{}".format(proxy_port))
     # We will always ignore certificates going to the proxy!
     chrome_options.add_argument("--ignore-certificate-errors")
 
@@ -58,9 +59,9 @@ def chrome_webdriver(opts: options.Options) -> selenium.webdriver.Chrome:
 
 
 @register_factory(seproxer.seproxer_enums.SeleniumBrowserTypes.PHANTOM_JS)
-def phantom_js_webdriver(opts: options.Options) -> selenium.webdriver.PhantomJS:
+def phantom_js_webdriver(opts: options.Options, proxy_port: int) -> selenium.webdriver.PhantomJS:
     service_args = [
-        "--proxy=127.0.0.1:{}".format(opts.mitmproxy_port),
+        "--proxy=127.0.0.1:{}".format(proxy_port),
         "--proxy-type=http",
         "--ignore-ssl-errors=true",
     ]
@@ -77,13 +78,13 @@ def phantom_js_webdriver(opts: options.Options) -> selenium.webdriver.PhantomJS:
 
 
 @register_factory(seproxer.seproxer_enums.SeleniumBrowserTypes.FIREFOX)
-def firefox_webdriver(opts: options.Options) -> selenium.webdriver.Firefox:
+def firefox_webdriver(opts: options.Options, proxy_port: int) -> selenium.webdriver.Firefox:
     firefox_profile = selenium.webdriver.FirefoxProfile()
     firefox_profile.set_preference("network.proxy.no_proxies_on", "")
     firefox_profile.set_preference("network.proxy.http", "127.0.0.1")
-    firefox_profile.set_preference("network.proxy.http_port", opts.mitmproxy_port)
+    firefox_profile.set_preference("network.proxy.http_port", proxy_port)
     firefox_profile.set_preference("network.proxy.ssl", "127.0.0.1")
-    firefox_profile.set_preference("network.proxy.ssl_port", opts.mitmproxy_port)
+    firefox_profile.set_preference("network.proxy.ssl_port", proxy_port)
     firefox_profile.set_preference("network.proxy.type", 1)
     firefox_profile.update_preferences()
 
@@ -100,11 +101,20 @@ def firefox_webdriver(opts: options.Options) -> selenium.webdriver.Firefox:
     return selenium.webdriver.Firefox(**args)
 
 
-def get_webdriver(options: seproxer.options.Options) -> remote_webdriver.WebDriver:
+def get_webdriver(options: seproxer.options.Options,
+                  proxy_port: t.Optional[int]=None) -> remote_webdriver.WebDriver:
+    """
+    :param options: The seproxer options used to configure the webdriver
+    :param proxy_port: The port of the proxy the webdriver will use, defaults to the
+                       port specified in the options
+    """
     browser_type = options.selenium_webdriver_type
 
     factory_function = FACTORY_DISPATCHER.get(options.selenium_webdriver_type)
     if not factory_function:
         raise InvalidBrowserType("Specified browser type: {} is not supported".format(browser_type))
 
-    return factory_function(options)
+    if proxy_port is None:
+        proxy_port = options.mitmproxy_port
+
+    return factory_function(options, proxy_port)
@@ -15,6 +15,22 @@ class ResultLevel(enum.Enum):
         return ResultLevel.ERROR, ResultLevel.WARNING, ResultLevel.OK
 
 
+class ResultsFileFormat(enum.Enum):
+    # A JSON array that is rewritten for every result
+    JSON = 0
+    # JSON Lines, results are appended to the file
+    JSONL = 1
+
+
+class QueuePolicy(enum.Enum):
+    # Block until the queue has room
+    BLOCK = 0
+    # Drop the oldest queued result to make room
+    DROP_OLDEST = 1
+    # Drop the result when its' level is below the drop level, otherwise block
+    DROP_BELOW_LEVEL = 2
+
+
 class SeleniumBrowserTypes(enum.Enum):
     CHROME = 0
     PHANTOM_JS = 1
@@ -0,0 +1,92 @@
+"""
+This module provides lazy sources of URLs to test, URLs are read line by line so
+inputs of any size are consumed in constant memory.
+"""
+import typing as t
+import io
+import gzip
+import sys
+
+
+# The path that indicates URLs should be read from stdin
+STDIN_PATH = "-"
+# Lines starting with this prefix are ignored
+COMMENT_PREFIX = "#"
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+class Error(Exception):
+    """
+    Generic module level error
+    """
+
+
+class UrlSourceError(Error):
+    """
+    The URL source could not be read
+    """
+
+
+def iter_urls(lines: t.Iterable[str]) -> t.Iterator[str]:
+    """
+    Yields the stripped URLs of the specified lines, skipping blank lines and comments
+    """
+    for line in lines:
+        url = line.strip()
+        if url and not url.startswith(COMMENT_PREFIX):
+            yield url
+
+
+class UrlSource:
+    """
+    An iterable of URLs read from a file, a gzip compressed file or stdin.  The source
+    is only opened once it is iterated over.
+    """
+    def __init__(self, path: str, encoding: str="utf-8") -> None:
+        """
+        :param path: The path of the file containing newline separated URLs or `STDIN_PATH`
+                     to read from stdin.  Gzip compressed input is detected automatically.
+        :param encoding: The encoding of the URLs
+        """
+        self.path = path
+        self.encoding = encoding
+
+    @property
+    def is_stdin(self) -> bool:
+        return self.path == STDIN_PATH
+
+    def _open_binary(self) -> io.BufferedReader:
+        if self.is_stdin:
+            return sys.stdin.buffer  # type: ignore
+        try:
+            return open(self.path, "rb")
+        except IOError as e:
+            raise UrlSourceError("Unable to read URL file {}: {}".format(self.path, e))
+
+    def check(self):
+        """
+        Ensures that the source can be read without consuming it
+
+        :raises UrlSourceError: When the source cannot be read
+        """
+        if not self.is_stdin:
+            self._open_binary().close()
+
+    def __iter__(self) -> t.Iterator[str]:
+        fp = self._open_binary()
+        lines = None  # type: t.Optional[io.TextIOWrapper]
+        try:
+            stream = fp  # type: t.IO[bytes]
+            if fp.peek(len(GZIP_MAGIC))[:len(GZIP_MAGIC)] == GZIP_MAGIC:
+                stream = gzip.GzipFile(fileobj=fp, mode="rb")
+
+            lines = io.TextIOWrapper(stream, encoding=self.encoding)  # type: ignore
+            yield from iter_urls(lines)
+        finally:
+            # The wrapper closes the stream it wraps once it is garbage collected, detach it
+            # so that stdin stays open for the rest of the process
+            if lines is not None:
+                lines.detach()
+            if not self.is_stdin:
+                fp.close()
@@ -35,6 +35,8 @@ setuptools.setup(
     entry_points={
         "console_scripts": [
             'seproxer=runner:main',
+            'seproxer-query=seproxer.query:main',
+            'seproxer-archive=seproxer.flow_archive:main',
         ]
     },
     install_requires=[
@@ -46,6 +48,9 @@ setuptools.setup(
         "lint": [
             "mypy>=0.471",
             "flake8>=3.3.0",
-        ]
+        ],
+        "test": [
+            "pytest>=3.0.7",
+        ],
     }
 )
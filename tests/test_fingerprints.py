@@ -0,0 +1,96 @@
+import pytest
+
+from seproxer import fingerprints
+from seproxer import seproxer_enums
+from seproxer.selenium_extensions import validators
+
+
+@pytest.mark.parametrize("message, normalized", [
+    (
+        "Failed to load https://cdn.test/app.js?v=123#main",
+        "Failed to load https://cdn.test/app.js",
+    ),
+    (
+        "Uncaught TypeError: x is undefined (https://cdn.test/app.js:12:34)",
+        "Uncaught TypeError: x is undefined (https://cdn.test/app.js:<line>)",
+    ),
+    ("https://cdn.test/app.js 12:34 Uncaught", "https://cdn.test/app.js <line> Uncaught"),
+    (
+        "Missing item 0b7d2c3e-8f41-4d2a-9a6e-2f8d0c1b3a4e",
+        "Missing item <uuid>",
+    ),
+    ("Failed to load /static/main.3f9a8b7c1d.js", "Failed to load /static/main.<hex>.js"),
+    ("GET /api/users/1234/posts failed", "GET /api/users/<n>/posts failed"),
+    ("Request 123456 failed with 404", "Request <n> failed with 404"),
+    ("  Uncaught   Error\n  at main  ", "Uncaught Error at main"),
+])
+def test_normalize_message(message, normalized):
+    assert fingerprints.normalize_message(message) == normalized
+
+
+def test_keeps_words_and_short_numbers():
+    message = "Deadbeef handler failed with status 500"
+    assert fingerprints.normalize_message(message) == message
+
+
+def test_occurrences_of_an_error_share_a_fingerprint():
+    first = fingerprints.fingerprint(
+        "Error at https://a.test/app.js?cb=1:10:2", "console", "ERROR")
+    second = fingerprints.fingerprint(
+        "Error at https://a.test/app.js?cb=2:99:7", "console", "ERROR")
+
+    assert first == second
+    assert len(first) == fingerprints.FINGERPRINT_LENGTH
+
+
+def test_fingerprint_is_keyed_by_validator_and_level():
+    message = "Failed to load resource"
+    keys = {
+        fingerprints.fingerprint(message, "console", "ERROR"),
+        fingerprints.fingerprint(message, "console", "WARNING"),
+        fingerprints.fingerprint(message, "network", "ERROR"),
+    }
+    assert len(keys) == 3
+
+
+def test_message_texts():
+    assert fingerprints.message_texts(None) == []
+    assert fingerprints.message_texts("a") == ["a"]
+    assert fingerprints.message_texts(["a", {"b": 1}]) == ["a", '{"b": 1}']
+    assert fingerprints.message_texts({"b": 1, "a": 2}) == ['{"a": 2, "b": 1}']
+
+
+def _result(message, data=None, name="console", level=seproxer_enums.ResultLevel.ERROR):
+    return validators.Result(name, level, message=message, data=data)
+
+
+def test_result_texts_falls_back_to_message():
+    assert fingerprints.result_texts(_result("Failed")) == ["Failed"]
+    assert fingerprints.result_texts(_result(None)) == [""]
+    assert fingerprints.result_texts(_result("Failed", data=["a", "b"])) == ["a", "b"]
+
+
+def test_index_counts_fingerprints_once_per_result():
+    index = fingerprints.FingerprintIndex()
+    keys = index.add("http://a.test/", [
+        _result("Failed", data=["Error at /items/1", "Error at /items/2"]),
+    ])
+    index.add("http://b.test/", [_result("Failed", data=["Error at /items/3"])])
+    index.add("http://c.test/", [
+        _result("Failed", data=["Error at /items/4"], level=seproxer_enums.ResultLevel.WARNING),
+    ])
+
+    assert len(keys) == 1
+    assert len(index) == 2
+
+    most_common, warning = index.report()
+    assert most_common["fingerprint"] in keys
+    assert most_common["message"] == "Error at /items/<n>"
+    assert most_common["example"] == "Error at /items/1"
+    assert most_common["level"] == "ERROR"
+    assert most_common["validator"] == "console"
+    assert most_common["results"] == 2
+    assert most_common["url_count"] == 2
+    assert most_common["urls"] == ["http://a.test/", "http://b.test/"]
+    assert warning["level"] == "WARNING"
+    assert warning["urls"] == ["http://c.test/"]
@@ -0,0 +1,106 @@
+import os
+import pickle
+
+from seproxer import flow_dumps
+
+
+def test_spool(tmpdir):
+    flow_dump = flow_dumps.FlowDump.spool(b"flows", str(tmpdir))
+
+    assert flow_dump.size == 5
+    assert os.path.dirname(flow_dump.path) == str(tmpdir)
+    assert flow_dump.read() == b"flows"
+    assert not flow_dump.is_owner
+
+
+def test_unclaimed_dump_keeps_file(tmpdir):
+    flow_dump = flow_dumps.FlowDump.spool(b"flows", str(tmpdir))
+    path = flow_dump.path
+
+    flow_dump.release()
+    del flow_dump
+    assert os.path.exists(path)
+
+
+def test_claimed_dump_removes_file_on_release(tmpdir):
+    flow_dump = flow_dumps.FlowDump.spool(b"flows", str(tmpdir))
+    flow_dump.claim()
+    assert flow_dump.is_owner
+
+    flow_dump.release()
+    assert not flow_dump.is_owner
+    assert not os.path.exists(flow_dump.path)
+    # Releasing again, or a missing file, is not an error
+    flow_dump.claim()
+    flow_dump.release()
+
+
+def test_claimed_dump_removes_file_once_collected(tmpdir):
+    flow_dump = flow_dumps.FlowDump.spool(b"flows", str(tmpdir))
+    path = flow_dump.path
+    flow_dump.claim()
+
+    del flow_dump
+    assert not os.path.exists(path)
+
+
+def test_pickled_copy_does_not_own_file(tmpdir):
+    flow_dump = flow_dumps.FlowDump.spool(b"flows", str(tmpdir))
+    flow_dump.claim()
+
+    copy = pickle.loads(pickle.dumps(flow_dump))
+    assert copy.path == flow_dump.path
+    assert copy.size == flow_dump.size
+    assert not copy.is_owner
+
+    del copy
+    assert os.path.exists(flow_dump.path)
+    flow_dump.release()
+
+
+def test_link_to(tmpdir):
+    flow_dump = flow_dumps.FlowDump.spool(b"flows", str(tmpdir))
+    flow_dump.claim()
+    destination = str(tmpdir.join("archived.flow"))
+
+    flow_dump.link_to(destination)
+    flow_dump.release()
+    with open(destination, "rb") as fp:
+        assert fp.read() == b"flows"
+
+
+def test_buffer_in_memory(tmpdir):
+    buffer = flow_dumps.SpooledFlowBuffer(str(tmpdir), memory_limit=10)
+    buffer.write(b"12345")
+    buffer.write(b"67890")
+
+    assert not buffer.is_spilled
+    assert tmpdir.listdir() == []
+
+    flow_dump = buffer.dump()
+    assert flow_dump.size == 10
+    assert flow_dump.read() == b"1234567890"
+
+
+def test_buffer_spills_over_memory_limit(tmpdir):
+    buffer = flow_dumps.SpooledFlowBuffer(str(tmpdir), memory_limit=10)
+    buffer.write(b"12345")
+    buffer.write(b"678901")
+
+    assert buffer.is_spilled
+    assert len(tmpdir.listdir()) == 1
+
+    flow_dump = buffer.dump()
+    assert flow_dump.size == 11
+    assert flow_dump.read() == b"12345678901"
+    assert tmpdir.listdir() == [tmpdir.join(os.path.basename(flow_dump.path))]
+
+
+def test_buffer_discard_removes_spilled_file(tmpdir):
+    buffer = flow_dumps.SpooledFlowBuffer(str(tmpdir), memory_limit=1)
+    buffer.write(b"12345")
+    assert buffer.is_spilled
+
+    buffer.discard()
+    assert not buffer.is_spilled
+    assert tmpdir.listdir() == []
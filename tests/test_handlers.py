@@ -0,0 +1,93 @@
+import queue
+import threading
+
+import pytest
+
+from seproxer import seproxer_enums
+
+# The handlers import the flow archive, which requires mitmproxy
+pytest.importorskip("mitmproxy")
+from seproxer import handlers  # NOQA: E402
+
+
+class Result:
+    def __init__(self, name, status_code=seproxer_enums.ResultLevel.OK):
+        self.name = name
+        self.status_code = status_code
+
+
+def _bounded_queue(policy, maxsize=2, **kwargs):
+    results_queue = handlers.BoundedResultQueue(maxsize, policy=policy, **kwargs)
+    dropped = []
+    results_queue.on_drop = dropped.append
+    return results_queue, dropped
+
+
+def _names(results_queue):
+    names = []
+    while True:
+        try:
+            names.append(results_queue.get(block=False).name)
+        except queue.Empty:
+            return names
+
+
+def test_block_policy():
+    results_queue, dropped = _bounded_queue(seproxer_enums.QueuePolicy.BLOCK)
+    results_queue.put(Result("a"))
+    results_queue.put(Result("b"))
+
+    with pytest.raises(queue.Full):
+        results_queue.put(Result("c"), timeout=0.01)
+
+    # The put completes once a result is taken
+    put = threading.Thread(target=results_queue.put, args=(Result("c"),))
+    put.start()
+    assert results_queue.get().name == "a"
+    put.join(timeout=5)
+    assert not put.is_alive()
+
+    assert _names(results_queue) == ["b", "c"]
+    assert dropped == []
+    assert results_queue.max_depth == 2
+
+
+def test_drop_oldest_policy():
+    results_queue, dropped = _bounded_queue(seproxer_enums.QueuePolicy.DROP_OLDEST)
+    for name in "abcd":
+        results_queue.put(Result(name))
+
+    assert _names(results_queue) == ["c", "d"]
+    assert [r.name for r in dropped] == ["a", "b"]
+    # The dropped results are done, joining the queue doesn't wait for them
+    for _ in range(2):
+        results_queue.task_done()
+    results_queue.join()
+
+
+def test_drop_below_level_policy():
+    results_queue, dropped = _bounded_queue(
+        seproxer_enums.QueuePolicy.DROP_BELOW_LEVEL,
+        drop_level=seproxer_enums.ResultLevel.WARNING,
+    )
+    results_queue.put(Result("ok-1"))
+    results_queue.put(Result("ok-2"))
+    results_queue.put(Result("ok-3"))
+    assert [r.name for r in dropped] == ["ok-3"]
+
+    # Results at or above the drop level block rather than being dropped
+    with pytest.raises(queue.Full):
+        results_queue.put(
+            Result("warning", seproxer_enums.ResultLevel.WARNING), timeout=0.01)
+    assert [r.name for r in dropped] == ["ok-3"]
+
+    assert _names(results_queue) == ["ok-1", "ok-2"]
+
+
+def test_non_blocking_put_ignores_policy():
+    results_queue, dropped = _bounded_queue(seproxer_enums.QueuePolicy.DROP_OLDEST, maxsize=1)
+    results_queue.put(Result("a"))
+
+    with pytest.raises(queue.Full):
+        results_queue.put(Result("b"), block=False)
+    assert dropped == []
@@ -0,0 +1,80 @@
+import pytest
+
+from seproxer import html_injection
+
+
+SCRIPT = "window.injected = true;"
+SCRIPT_TAG = html_injection.script_tag(SCRIPT)
+
+
+def test_injects_after_head_tag():
+    html = b"<html><head><title>t</title></head><body></body></html>"
+
+    assert html_injection.inject_script(html, SCRIPT) == (
+        b"<html><head>" + SCRIPT_TAG + b"<title>t</title></head><body></body></html>"
+    )
+
+
+def test_head_tag_with_attributes():
+    html = b'<html><HEAD data-x="a>b" lang=\'en\'><title>t</title></HEAD></html>'
+
+    injected = html_injection.inject_script(html, SCRIPT)
+    assert injected == (
+        b'<html><HEAD data-x="a>b" lang=\'en\'>' + SCRIPT_TAG + b"<title>t</title></HEAD></html>"
+    )
+
+
+@pytest.mark.parametrize("html", [
+    b"<!-- <head> --><html><head></head></html>",
+    b"<script>var s = '<head>';</script><html><head></head></html>",
+    b"<style>/* <head> */</style><html><head></head></html>",
+])
+def test_skips_head_tags_in_comments_scripts_and_styles(html):
+    insertion_point = html_injection.find_head_insertion_point(html)
+    assert insertion_point == html.rindex(b"<head>") + len(b"<head>")
+
+
+def test_header_element_is_not_head():
+    html = b"<html><body><header></header></body></html>"
+
+    assert html_injection.find_head_insertion_point(html) is None
+    assert html_injection.inject_script(html, SCRIPT) is None
+
+
+def test_document_bytes_are_not_re_encoded():
+    html = "<html><head></head><body>café &amp; <b>x</body></html>".encode("latin-1")
+
+    injected = html_injection.inject_script(html, SCRIPT)
+    assert injected == html.replace(b"<head>", b"<head>" + SCRIPT_TAG)
+
+
+def test_encoded_script_tag_is_used():
+    html = b"<html><head></head></html>"
+
+    assert html_injection.inject_script(html, SCRIPT, encoded_script_tag=b"<x>") == (
+        b"<html><head><x></head></html>"
+    )
+
+
+@pytest.mark.parametrize("html", [
+    b"<html><!-- unterminated <head></head></html>",
+    b"<html><script>unterminated <head></head></html>",
+    b"<html><head unterminated",
+])
+def test_unscannable_documents_raise(html):
+    with pytest.raises(ValueError):
+        html_injection.find_head_insertion_point(html)
+
+
+def test_unscannable_documents_are_parsed():
+    html = b"<html><head><title>t</title></head><body><script>x</body></html>"
+
+    injected = html_injection.inject_script(html, SCRIPT)
+    assert injected is not None
+    assert injected.index(SCRIPT.encode()) < injected.index(b"<title>")
+
+
+def test_unscannable_documents_without_head():
+    html = b"<html><body><script>x</body></html>"
+
+    assert html_injection.inject_script(html, SCRIPT) is None
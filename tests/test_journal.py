@@ -0,0 +1,96 @@
+import os
+
+import pytest
+
+from seproxer import journal
+
+
+@pytest.fixture
+def journal_path(tmpdir):
+    return str(tmpdir.join("journal.tsv"))
+
+
+def test_record_and_contains(journal_path):
+    result_journal = journal.ResultJournal(journal_path)
+    result_journal.record("http://a.test/", "uuid-a")
+
+    assert "http://a.test/" in result_journal
+    assert "http://b.test/" not in result_journal
+    assert len(result_journal) == 1
+    result_journal.close()
+
+    with open(journal_path, encoding="utf-8") as fp:
+        assert fp.read() == "uuid-a\thttp://a.test/\n"
+
+
+def test_resume_loads_completed_urls(journal_path):
+    result_journal = journal.ResultJournal(journal_path)
+    result_journal.record("http://a.test/", "uuid-a")
+    result_journal.record("http://b.test/", "uuid-b")
+    result_journal.close()
+
+    resumed = journal.ResultJournal(journal_path, resume=True)
+    assert len(resumed) == 2
+    assert list(resumed.filter_completed(
+        ["http://a.test/", "http://c.test/", "http://b.test/", "http://d.test/"]
+    )) == ["http://c.test/", "http://d.test/"]
+
+    # A resumed journal is appended to
+    resumed.record("http://c.test/", "uuid-c")
+    resumed.close()
+    assert len(journal.ResultJournal(journal_path, resume=True)) == 3
+
+
+def test_resume_counts_duplicate_entries_once(journal_path):
+    with open(journal_path, "w", encoding="utf-8") as fp:
+        fp.write("uuid-1\thttp://a.test/\nuuid-2\thttp://a.test/\n")
+
+    assert len(journal.ResultJournal(journal_path, resume=True)) == 1
+
+
+def test_resume_skips_partial_and_malformed_entries(journal_path):
+    with open(journal_path, "w", encoding="utf-8") as fp:
+        fp.write("uuid-a\thttp://a.test/\nmalformed\nuuid-b\thttp://b.te")
+
+    resumed = journal.ResultJournal(journal_path, resume=True)
+    assert len(resumed) == 1
+    assert "http://a.test/" in resumed
+    assert "http://b.te" not in resumed
+    assert "malformed" not in resumed
+
+
+def test_resume_without_journal(journal_path):
+    resumed = journal.ResultJournal(journal_path, resume=True)
+    assert len(resumed) == 0
+    assert os.path.exists(journal_path)
+
+
+def test_new_journal_backs_up_previous_run(tmpdir, journal_path):
+    result_journal = journal.ResultJournal(journal_path)
+    result_journal.record("http://a.test/", "uuid-a")
+    result_journal.close()
+
+    new_journal = journal.ResultJournal(journal_path)
+    assert len(new_journal) == 0
+    assert "http://a.test/" not in new_journal
+    new_journal.close()
+
+    backups = [p for p in tmpdir.listdir() if p.basename.startswith("journal.tsv.")]
+    assert len(backups) == 1
+    assert backups[0].read_text("utf-8") == "uuid-a\thttp://a.test/\n"
+    assert os.path.getsize(journal_path) == 0
+
+
+def test_new_journal_does_not_back_up_empty_journal(tmpdir, journal_path):
+    journal.ResultJournal(journal_path).close()
+    journal.ResultJournal(journal_path).close()
+
+    assert [p.basename for p in tmpdir.listdir()] == ["journal.tsv"]
+
+
+def test_record_to_closed_journal(journal_path):
+    result_journal = journal.ResultJournal(journal_path)
+    result_journal.close()
+
+    with pytest.raises(journal.JournalClosedError):
+        result_journal.record("http://a.test/", "uuid-a")
@@ -0,0 +1,195 @@
+import sqlite3
+import uuid
+
+import pytest
+
+from seproxer import fingerprints
+from seproxer import result_database
+from seproxer import seproxer_enums
+from seproxer.selenium_extensions import validators
+from seproxer.selenium_extensions.states import managers
+
+
+class UrlResult:
+    """
+    The attributes of a `seproxer.main.SeproxerUrlResult` that are stored
+    """
+    def __init__(self, url, *validator_results):
+        self.url = url
+        self.uuid = str(uuid.uuid4())
+        self.state_results = [
+            managers.StateResult("AngularLoadedState", False, False),
+            managers.StateResult("ActivityIdleLoadedState", True, True, 1.5),
+        ]
+        self.validator_results = validators.PageValidatorResults()
+        for validator_result in validator_results:
+            self.validator_results.append(validator_result)
+        self.status_code = self.validator_results.overall_status()
+
+
+def _error(message, data=None, name="console"):
+    return validators.Result(name, seproxer_enums.ResultLevel.ERROR, message=message, data=data)
+
+
+def _warning(message, name="console"):
+    return validators.Result(name, seproxer_enums.ResultLevel.WARNING, message=message)
+
+
+@pytest.fixture
+def database_path(tmpdir):
+    return str(tmpdir.join("results.db"))
+
+
+@pytest.fixture
+def database(database_path):
+    database = result_database.ResultDatabase(database_path)
+    yield database
+    database.close()
+
+
+def _insert(database, run_id, *results):
+    for result in results:
+        database.insert_result(run_id, result)
+    database.commit()
+
+
+def test_runs(database):
+    first_run = database.start_run()
+    _insert(database, first_run, UrlResult("http://a.test/"), UrlResult(
+        "http://b.test/", _error("Failed")))
+    second_run = database.start_run()
+    _insert(database, second_run, UrlResult("http://a.test/", _warning("Slow")))
+
+    runs = database.runs()
+    assert [(r["id"], r["results"], r["ok"], r["warning"], r["error"]) for r in runs] == [
+        (second_run, 1, 0, 1, 0),
+        (first_run, 2, 1, 0, 1),
+    ]
+    assert len(database.runs(limit=1)) == 1
+
+
+def test_url_history(database):
+    first_run = database.start_run()
+    first = UrlResult("http://a.test/")
+    _insert(database, first_run, first, UrlResult("http://b.test/"))
+    second_run = database.start_run()
+    second = UrlResult("http://a.test/", _error("Failed"))
+    _insert(database, second_run, second)
+
+    history = database.url_history("http://a.test/")
+    assert [(r["run_id"], r["uuid"], r["status"]) for r in history] == [
+        (second_run, second.uuid, "ERROR"),
+        (first_run, first.uuid, "OK"),
+    ]
+    assert database.url_history("http://c.test/") == []
+
+
+def test_known_states(database):
+    result = UrlResult("http://a.test/")
+    _insert(database, database.start_run(), result)
+
+    known_states = database.connection.execute(
+        "SELECT known_states FROM results WHERE uuid = ?", (result.uuid,)).fetchone()[0]
+    assert known_states == '{"ActivityIdleLoadedState": true}'
+
+
+def test_messages_are_stored_per_text(database):
+    _insert(database, database.start_run(), UrlResult(
+        "http://a.test/",
+        _error("Console errors", data=["Error at /items/1", "Error at /items/2"]),
+        _warning("Slow"),
+    ))
+
+    messages = database.find_messages()
+    assert sorted(m["text"] for m in messages) == [
+        "Error at /items/1", "Error at /items/2", "Slow",
+    ]
+    first, second = [m for m in messages if m["level"] == "ERROR"]
+    assert first["fingerprint"] == second["fingerprint"] == fingerprints.fingerprint(
+        "Error at /items/1", "console", "ERROR")
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("TypeError", ["http://a.test/"]),
+    # The full text index matches case insensitively, matches are exact
+    ("typeerror", []),
+    ("undefined", ["http://a.test/", "http://b.test/"]),
+    # Shorter than the trigram index can look up
+    ("is", ["http://a.test/", "http://b.test/"]),
+    ('"quoted"', ["http://b.test/"]),
+])
+def test_find_messages_by_text(database, text, expected):
+    _insert(
+        database, database.start_run(),
+        UrlResult("http://a.test/", _error("Uncaught TypeError: x is undefined")),
+        UrlResult("http://b.test/", _error('Uncaught ReferenceError: "quoted" is undefined')),
+    )
+
+    messages = database.find_messages(text=text)
+    assert sorted(m["url"] for m in messages) == expected
+
+
+def test_find_messages_filters(database):
+    first_run = database.start_run()
+    _insert(database, first_run, UrlResult("http://a.test/", _error("Failed")))
+    second_run = database.start_run()
+    _insert(
+        database, second_run,
+        UrlResult("http://b.test/", _error("Failed")),
+        UrlResult("http://c.test/", _warning("Failed")),
+    )
+    error_fingerprint = fingerprints.fingerprint("Failed", "console", "ERROR")
+
+    by_fingerprint = database.find_messages(fingerprint=error_fingerprint)
+    assert [m["url"] for m in by_fingerprint] == ["http://b.test/", "http://a.test/"]
+    assert [m["url"] for m in database.find_messages(level="WARNING")] == ["http://c.test/"]
+    assert [m["url"] for m in database.find_messages(level="ERROR", runs=1)] == [
+        "http://b.test/"]
+    assert len(database.find_messages(limit=1)) == 1
+
+
+def test_top_fingerprints(database):
+    first_run = database.start_run()
+    _insert(
+        database, first_run,
+        UrlResult("http://a.test/", _error("Error at /items/1"), _error("Rare")),
+        UrlResult("http://b.test/", _error("Error at /items/2")),
+    )
+    second_run = database.start_run()
+    _insert(database, second_run, UrlResult("http://a.test/", _error("Error at /items/3")))
+
+    top = database.top_fingerprints()
+    assert [(r["urls"], r["occurrences"]) for r in top] == [(2, 3), (1, 1)]
+    assert top[0]["fingerprint"] == fingerprints.fingerprint(
+        "Error at /items/1", "console", "ERROR")
+    assert top[0]["example"] == "Error at /items/3"
+
+    assert [(r["urls"], r["occurrences"]) for r in database.top_fingerprints(runs=1)] == [
+        (1, 1)]
+    assert database.top_fingerprints(level="WARNING") == []
+    assert len(database.top_fingerprints(limit=1)) == 1
+
+
+def test_read_only_database(database, database_path):
+    _insert(database, database.start_run(), UrlResult("http://a.test/", _error("Failed")))
+
+    read_only = result_database.ResultDatabase(database_path, read_only=True)
+    try:
+        assert read_only.has_full_text_index == database.has_full_text_index
+        assert [m["text"] for m in read_only.find_messages(text="Failed")] == ["Failed"]
+        with pytest.raises(sqlite3.OperationalError):
+            read_only.start_run()
+    finally:
+        read_only.close()
+
+
+def test_read_only_database_must_exist(database_path):
+    with pytest.raises(sqlite3.OperationalError):
+        result_database.ResultDatabase(database_path, read_only=True)
+
+
+def test_closed_database(database):
+    database.close()
+
+    with pytest.raises(result_database.DatabaseClosedError):
+        database.runs()